@@ -24,8 +24,13 @@ Communication = {
         time_lease_seconds = 30,              # When the controller is removed, the Profiler will stay in bidirectional
                                               # mode for this amount of seconds. The communication is re-initiated every  
                                               # half of this value. 
-        tuner_mode = True                     # If set to True, Tuner information is only sent by the Kemper when in tuner 
+        tuner_mode = True,                    # If set to True, Tuner information is only sent by the Kemper when in tuner 
                                               # mode. Set to False to make it send the info all the time.
+
+        #parameter_set = 0x02,                # Optional: Parameter set the Kemper shall send (default is 2). For parameter sets 
+        #parameters = [ ... ],                # other than 2, you have to list the mappings the device sends in "parameters".
+        #additional_parameters = [ ... ],     # Optional: Further mappings which are sent by the device in the selected set. These 
+                                              # are not requested anymore but listened to.
     ),
 
     # MIDI setup. This defines all MIDI routings. You at least have to define routings from and to 
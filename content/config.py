@@ -11,20 +11,73 @@ Config = {
     # Max. number of MIDI messages being parsed before the next switch state evaluation
     # is triggered. If set to 0, only one message is parsed per tick, which leads to 
     # flickering states sometimes. If set too high, switch states will not be read for too long.
-    # A good value is the maximum amount of switches. Default is 10.
+    # A good value is the maximum amount of switches. Default is 10. The messages are received
+    # in batches of this size (plus one), switch states are evaluated between the batches.
     #"maxConsecutiveMidiMessages": 10,
 
+    # Adaptive mode for maxConsecutiveMidiMessages: The amount of messages received before the switches are
+    # evaluated again is adjusted at runtime. It is increased during MIDI bursts, and decreased when one receive
+    # pass (receiving and parsing the messages) takes longer than adaptiveMidiDrainMaxPassMillis (default 10). 
+    # The amount is kept between adaptiveMidiDrainMin and adaptiveMidiDrainMax (defaults 1 and 100, the max. is 
+    # also limited by the MIDI receive buffer size). maxConsecutiveMidiMessages is used as initial value. The 
+    # chosen values are reported by debugStats. Default is False.
+    #"adaptiveMidiDrain": False,
+    #"adaptiveMidiDrainMaxPassMillis": 10,
+    #"adaptiveMidiDrainMin": 1,
+    #"adaptiveMidiDrainMax": 100,
+
     # Clear MIDI buffer before starting processing. Default is True.
     #"clearBuffers": True,                 
 
+    # Input filter: If enabled, MIDI messages which are not needed by any mapping are dropped by the MIDI devices 
+    # before being parsed (for example active sensing or clock). Routings to other devices can specify the status 
+    # bytes they need with the "allow" parameter, else they receive everything. The filter is updated when mappings 
+    # with new response statuses are registered later on. Default is False.
+    #"midiInputFilter": True,
+
+    # Additional status bytes to let through to the application when "midiInputFilter" is enabled. For channel
+    # messages, the channel is ignored (0xb0 allows all Control Change messages). Default is [].
+    #"midiInputAllow": [ 0x90 ],
+
+    # Tracks incoming MIDI clock (tempo and beat position) on the raw input, without parsing the clock messages. Can be 
+    # used by actions like SHOW_TEMPO(use_midi_clock = True). Clock, start, continue and stop messages are not passed 
+    # to the application when enabled (routings to other devices only forward them with raw thru). Default is False.
+    #"midiClock": True,
+
     # Max. milliseconds until a request is being terminated and it is
     # assumed that the Kemper device is offline. Optional, default is 2 seconds.
     #"maxRequestLifetimeMillis": 2000,
 
+    # Max. number of requests which are waiting for an answer at the same time. Further requests are queued
+    # and sent when answers come in (requests of mappings with higher priority first). Optional, default is 0 (no limit).
+    #"maxRequestsInFlight": 5,
+
+    # Max. number of requests sent per processing tick. Further requests are queued and sent in the next ticks.
+    # Optional, default is 0 (no limit).
+    #"maxRequestsPerTick": 2,
+
+    # Time (milliseconds) a received parameter value is considered fresh: Requests for the parameter are answered from
+    # the received value without sending MIDI during this time. Can be overridden per mapping. Optional, default is 0 (no caching).
+    #"requestCacheTtlMillis": 500,
+
     # Update interval, for updating the rig date (which triggers all other data to update when changed) (milliseconds)
-    # and other displays if assigned. 200 is the default.
+    # and other displays if assigned. 200 is the default. Actions and callbacks can define individual update intervals
+    # (for example with the "updateInterval" action option), which are independent of this value.
     #"updateInterval": 200,
 
+    # Max. time (milliseconds) used for updating actions, displays etc. per tick. If set, the updates of one update interval
+    # are spread over multiple ticks, so switches and MIDI input are not delayed by long update rounds. Budget overruns are
+    # shown with the "debugStats" option. Default is 0 (all updates are done in one tick).
+    #"updateBudgetMillis": 10,
+
+    # Use the asyncio based runtime: Switch scanning/MIDI input, client requests/MIDI output, updates and the display run as
+    # separate tasks with their own intervals (milliseconds, see the options below), instead of one busy loop. Default is False.
+    #"asyncController": True,
+    #"asyncInputIntervalMillis": 2,                # Switch scanning and MIDI input. Default is 2.
+    #"asyncClientIntervalMillis": 5,               # Sending requests and MIDI output. Default is 5.
+    #"asyncUpdateIntervalMillis": 10,              # Check for due updates. Default is 10.
+    #"asyncDisplayIntervalMillis": 200,            # Display updates. Default is the "updateInterval" option.
+
     # Amount of bytes that must at least be free at the time processing starts (normally the program requires anther about
     # 10kB for character loading etc., default threshold for the warning is 15kB).
     #"memoryWarnLimitBytes": 1024 * 15,
@@ -56,6 +109,9 @@ Config = {
     #"debugSentMessages": True,                       # Shows all sent messages
     #"excludeMessageTypes": [ "SystemExclusive" ],    # Types to excude from "debugUnparsedMessage"
     #"debugClientStats": True,                        # Periodically shows client information (pending requests etc.). "debugStatsInterval" is used as period.
+    #"clientStatistics": True,                        # Records round trip times, timeouts and unmatched responses per mapping (shown with "debugClientStats")
+    #"clientStatisticsDumpInterval": 5000,            # If "clientStatistics" is enabled, periodically sends the statistics as SysEx (manufacturer ID 0x7d) 
+                                                      # to the MIDI output, for example to watch them in a MIDI monitor (milliseconds, default is 0 = off)
 
     # When a ClientParameterMapping instance is set here, incoming messages for this mapping will be shown.
     #"debugMapping": MAPPING_MORPH_PEDAL(),
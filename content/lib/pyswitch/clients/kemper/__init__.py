@@ -7,7 +7,8 @@ from adafruit_midi.program_change import ProgramChange
 from ...misc import PeriodCounter, do_print, PYSWITCH_VERSION
 from ...colors import Colors
 from ...controller.callbacks import Callback
-from ...controller.client import ClientParameterMapping, ClientTwoPartParameterMapping
+from ...controller.client import ClientParameterMapping, ClientTwoPartParameterMapping, ClientReceivePipeline
+from ...controller.midi import MidiOutputQueue
 from ...ui.elements import TunerDisplay
 
 
@@ -70,9 +71,10 @@ class KemperRigNameCallback(Callback):
 
     def __init__(self, 
                  show_name = True,     # Show the rig name in the label
-                 show_rig_id = False   # Show the rig ID (like 1-1) in the label. Can be False, 'rig', 'bank' or True (to show both rig and bank)
+                 show_rig_id = False,  # Show the rig ID (like 1-1) in the label. Can be False, 'rig', 'bank' or True (to show both rig and bank)
+                 update_interval = 500 # Update interval in milliseconds. The rig name only changes with the rig, so this can be longer than the global interval.
     ):
-        Callback.__init__(self)
+        Callback.__init__(self, update_interval = update_interval)
 
         # Rig name
         self.__show_name = show_name
@@ -412,6 +414,13 @@ _NRPN_STRING_PARAMETER_ID_RIG_DATE = const(0x03)
 # More specific mappings exist in the mappings folder.
 class KemperMappings:
 
+    # Declares the passed mappings as rig dependent: They will only be requested again when the rig date 
+    # has changed, which saves lots of MIDI traffic when no bidirectional protocol is used. (Effect types,
+    # rig/amp/cabinet names and the rig comment are rig dependent by default)
+    @staticmethod
+    def set_rig_dependent(mappings):
+        ClientParameterMapping.set_group_parent(KemperMappings.RIG_DATE(), mappings)
+
     # Effect slot enable/disable
     @staticmethod
     def EFFECT_STATE(slot_id):
@@ -433,10 +442,11 @@ class KemperMappings:
             )
         )
     
-    # Effect slot type (request only)
+    # Effect slot type (request only). Only requested when the rig has changed.
     @staticmethod
     def EFFECT_TYPE(slot_id):
         return ClientParameterMapping.get(
+            depends = KemperMappings.RIG_DATE(),
             name = f"Slot Type { KemperEffectSlot.EFFECT_SLOT_NAME[slot_id] }",
             request = KemperNRPNMessage(               
                 NRPN_FUNCTION_REQUEST_SINGLE_PARAMETER, 
@@ -464,7 +474,8 @@ class KemperMappings:
                 NRPN_ADDRESS_PAGE_STRINGS,
                 _NRPN_STRING_PARAMETER_ID_RIG_DATE
             ),
-            type = ClientParameterMapping.PARAMETER_TYPE_STRING
+            type = ClientParameterMapping.PARAMETER_TYPE_STRING,
+            priority = 10
         )
 
     # Rig name (request only)
@@ -482,7 +493,8 @@ class KemperMappings:
                 NRPN_ADDRESS_PAGE_STRINGS,
                 _NRPN_STRING_PARAMETER_ID_RIG_NAME
             ),
-            type = ClientParameterMapping.PARAMETER_TYPE_STRING
+            type = ClientParameterMapping.PARAMETER_TYPE_STRING,
+            priority = 10
         )
 
     # Switch tuner mode on/off (no receive possible when not in bidirectional mode)
@@ -552,6 +564,10 @@ class KemperMappings:
 ####################################################################################################################
 
 
+# Parameter set IDs of the bidirectional protocol
+BIDIRECTIONAL_PARAMETER_SET_2 = const(0x02)
+
+# Mappings pushed by the device in parameter set 2
 _PARAMETER_SET_2 = [
     KemperMappings.EFFECT_TYPE(KemperEffectSlot.EFFECT_SLOT_ID_A),
     KemperMappings.EFFECT_STATE(KemperEffectSlot.EFFECT_SLOT_ID_A),
@@ -578,8 +594,10 @@ _PARAMETER_SET_2 = [
     KemperMappings.TUNER_DEVIANCE()
 ]
 
-_SELECTED_PARAMETER_SET_ID = const(0x02)
-_SELECTED_PARAMETER_SET = _PARAMETER_SET_2
+# Known parameter sets: Set ID -> list of mappings the device sends values for
+BIDIRECTIONAL_PARAMETER_SETS = {
+    BIDIRECTIONAL_PARAMETER_SET_2: _PARAMETER_SET_2
+}
 
 
 # Implements the internal Kemper bidirectional communication protocol
@@ -588,13 +606,37 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
     _STATE_OFFLINE = 10   # No commmunication initiated
     _STATE_RUNNING = 20   # Bidirectional communication established
 
+    # parameter_set:         ID of the parameter set the device shall send. Default is set 2.
+    #
+    # parameters:            List of mappings the device sends in the parameter set. These are not requested 
+    #                        but just listened to. Only needed for parameter sets not listed in 
+    #                        BIDIRECTIONAL_PARAMETER_SETS (custom sets).
+    #
+    # additional_parameters: Optional list of mappings to add to the parameters of the set. Only add mappings 
+    #                        the device actually sends in the selected set, or they will never be updated!
     def __init__(self, 
                  time_lease_seconds,
-                 tuner_mode = True
+                 tuner_mode = True,
+                 parameter_set = BIDIRECTIONAL_PARAMETER_SET_2,
+                 parameters = None,
+                 additional_parameters = None
         ):
         self.state = self._STATE_OFFLINE
         self.__time_lease_encoded = self.__encode_time_lease(time_lease_seconds)
         self.__tuner_mode = tuner_mode
+        self.__parameter_set_id = parameter_set
+
+        if parameters == None:
+            parameters = BIDIRECTIONAL_PARAMETER_SETS.get(parameter_set, None)
+
+            if parameters == None:
+                raise Exception() # Unknown parameter set: You have to specify the parameters sent by the device
+
+        # Set of the bidirectional mappings (for fast lookup, this is checked on every user action)
+        self.__parameters = set(parameters)
+
+        if additional_parameters:
+            self.__parameters.update(additional_parameters)
 
         # This is the reponse template for the status sensing message the Profiler sends every
         # about 500ms.
@@ -621,9 +663,12 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
         self.__midi = midi  
         self.__client = client
 
+        # The beacon is sent with high priority if the MIDI handler supports it (see MidiOutputQueue)
+        self.__send_prioritized = getattr(midi, "send_prioritized", None)
+
     # Must return (boolean) if the passed mapping is handled in the bidirectional protocol
     def is_bidirectional(self, mapping):
-        return mapping in _SELECTED_PARAMETER_SET
+        return mapping in self.__parameters
 
     # Must return a color representation for the current state
     def get_color(self):
@@ -660,6 +705,16 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
 
                 self.__send_beacon()
 
+    # Registers the receive stage for the sensing messages with the client. The stage is called before the
+    # client requests, and only for SysEx messages with the Kemper manufacturer ID.
+    def register_receive_handlers(self, pipeline):
+        pipeline.add(
+            self.__receive_sensing, 
+            ClientReceivePipeline.ORDER_PROTOCOL,
+            status = 0xf0,
+            manufacturer_id = self.__mapping_sense.response.manufacturer_id
+        )
+
     # Receive sensing messages and re-init (with init = 1 again) when they stop appearing for longer then 1 second
     def receive(self, midi_message):
         if not self.__init_sent:
@@ -672,6 +727,13 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
         if midi_message.manufacturer_id != self.__mapping_sense.response.manufacturer_id:
             return False
         
+        return self.__receive_sensing(midi_message)
+
+    # Receive stage for sensing messages (status and manufacturer ID have been checked already)
+    def __receive_sensing(self, midi_message):
+        if not self.__init_sent:
+            return False
+        
         if self.debug:                     # pragma: no cover
             self.__count_relevant_messages += 1
 
@@ -682,7 +744,10 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
         #
         # The first two values are ignored (the Kemper MIDI specification implies this would contain the product type
         # and device ID as for the request, however the device just sends two zeroes)
-        if midi_message.data[2:5] != self.__mapping_sense.response.data[2:5]:
+        data = midi_message.data
+        template = self.__mapping_sense.response.data
+
+        if len(data) < 5 or data[2] != template[2] or data[3] != template[3] or data[4] != template[4]:
             return False
         
         if self.state != self._STATE_RUNNING:
@@ -700,21 +765,24 @@ class KemperBidirectionalProtocol: #(BidirectionalProtocol):
 
     # Send beacon for bidirection communication
     def __send_beacon(self, init = False):
-        self.__midi.send(
-            KemperNRPNExtendedMessage(
-                0x7e,
-                [
-                    0x40,
-                    _SELECTED_PARAMETER_SET_ID,
-                    self.__get_flags(
-                        init = init,
-                        tunemode = self.__tuner_mode
-                    ),
-                    self.__time_lease_encoded
-                ]
-            )
+        msg = KemperNRPNExtendedMessage(
+            0x7e,
+            [
+                0x40,
+                self.__parameter_set_id,
+                self.__get_flags(
+                    init = init,
+                    tunemode = self.__tuner_mode
+                ),
+                self.__time_lease_encoded
+            ]
         )
 
+        if self.__send_prioritized:
+            self.__send_prioritized(msg, MidiOutputQueue.PRIORITY_HIGH)
+        else:
+            self.__midi.send(msg)
+
     # Encode time lease (this is done in 2 second steps for the Kemper)
     def __encode_time_lease(self, time_lease_seconds):
         return int(time_lease_seconds / 2)
@@ -35,7 +35,8 @@ def SHOW_TEMPO(display = None,
                id = False, 
                use_leds = True, 
                enable_callback = None, 
-               led_brightness = 0.02              # LED brightness in range [0..1]
+               led_brightness = 0.02,             # LED brightness in range [0..1]
+               use_midi_clock = False             # Use incoming MIDI clock instead of the Kemper tempo parameters (needs "midiClock" enabled in config.py)
     ):
     return Action({
         "callback": _KemperShowTempoCallback(
@@ -44,7 +45,8 @@ def SHOW_TEMPO(display = None,
             text = text,
             color = color,
             led_brightness = led_brightness,
-            resolve_bpm = display or change_display
+            resolve_bpm = display or change_display,
+            use_midi_clock = use_midi_clock
         ),
         "display": display,
         "id": id,
@@ -63,18 +65,26 @@ class _KemperShowTempoCallback(Callback):
                  color, 
                  text, 
                  led_brightness,
-                 resolve_bpm
+                 resolve_bpm,
+                 use_midi_clock = False
         ):
         
-        super().__init__()
+        # With MIDI clock, the callback is updated more often to follow the beats
+        super().__init__(update_interval = 20 if use_midi_clock else 0)
 
-        self.__tempo_mapping = MAPPING_TEMPO_DISPLAY()
-        self.register_mapping(self.__tempo_mapping)        
+        self.__use_midi_clock = use_midi_clock
+        self.__clock = None
+
+        if not use_midi_clock:
+            self.__tempo_mapping = MAPPING_TEMPO_DISPLAY()
+            self.register_mapping(self.__tempo_mapping)        
+        else:
+            self.__tempo_mapping = None
 
         self.__tuner_mapping = KemperMappings.TUNER_MODE_STATE()
         self.register_mapping(self.__tuner_mapping)
 
-        if resolve_bpm:
+        if resolve_bpm and not use_midi_clock:
             self.__bpm_mapping = MAPPING_TEMPO_BPM()
             self.register_mapping(self.__bpm_mapping)
         else:
@@ -86,6 +96,9 @@ class _KemperShowTempoCallback(Callback):
             self.__preview = ValuePreview.get(change_display)
             self.__change_timeout_millis = change_timeout_millis
 
+            if not use_midi_clock:
+                self.update_interval = ValuePreview.UPDATE_INTERVAL_MILLIS
+
             # Also listen to rig changes to avoid display BPM after each rig change
             self.__rig_id_mapping = KemperMappings.RIG_ID()
             self.register_mapping(self.__rig_id_mapping)
@@ -99,6 +112,13 @@ class _KemperShowTempoCallback(Callback):
         self.__last_bpm = None
         self.__last_rig = None
 
+    def init(self, appl, listener = None):
+        super().init(appl, listener)
+
+        if self.__use_midi_clock:
+            # MidiClockTracker of the controller (None if "midiClock" is not enabled)
+            self.__clock = appl.clock
+
     def push(self):
         pass
 
@@ -111,13 +131,17 @@ class _KemperShowTempoCallback(Callback):
         if self.__preview:
             self.__preview.update()
 
+        # The clock does not notify about changes, so the displays are updated when the beat state or tempo changed
+        if self.__clock and (self.__get_beat() != self.__current_value or self.__get_bpm() != self.__last_bpm):
+            self.update_displays()
+
     def update_displays(self):
         # Tuner mode: Do nothing
         if self.__tuner_mapping.value == 1:
             return
 
         # LED blinking
-        value = self.__tempo_mapping.value
+        value = self.__get_beat()
         if value != None and value != self.__current_value:
             self.__current_value = value
 
@@ -126,9 +150,10 @@ class _KemperShowTempoCallback(Callback):
 
         # Text to show
         text = None
-        if self.__bpm_mapping and self.__bpm_mapping.value != None:
-            if self.__bpm_mapping.value != self.__last_bpm:
-                bpm = convert_bpm(self.__bpm_mapping.value)
+        bpm_value = self.__get_bpm()
+        if bpm_value != None:
+            if bpm_value != self.__last_bpm:
+                bpm = str(bpm_value) if self.__clock else convert_bpm(bpm_value)
                 text = self._text.replace('{bpm}', bpm)
 
                 # Show in preview display? Dont do this for the first value that comes in.
@@ -138,7 +163,7 @@ class _KemperShowTempoCallback(Callback):
                         timeout_millis = self.__change_timeout_millis
                     )
 
-                self.__last_bpm = self.__bpm_mapping.value
+                self.__last_bpm = bpm_value
 
                 if self.__preview:
                     self.__last_rig = self.__rig_id_mapping.value
@@ -148,3 +173,24 @@ class _KemperShowTempoCallback(Callback):
 
             if text:
                 self.action.label.text = text
+
+    # Returns 1 in the first part of the beat, 0 else, or None if unknown
+    def __get_beat(self):
+        if self.__clock:
+            return 1 if self.__clock.active and self.__clock.beat_on else 0
+        
+        if self.__tempo_mapping:
+            return self.__tempo_mapping.value
+        
+        return None
+
+    # Returns the current (raw) BPM value or None if unknown
+    def __get_bpm(self):
+        if self.__clock:
+            bpm = self.__clock.bpm
+            return round(bpm) if bpm != None and self.__clock.active else None
+        
+        if self.__bpm_mapping:
+            return self.__bpm_mapping.value
+        
+        return None
@@ -72,6 +72,8 @@ class _ParameterChangeCallback(Callback):
 
             self.__preview = ValuePreview.get(change_display)
             self.__change_timeout_millis = change_timeout_millis
+
+            self.update_interval = ValuePreview.UPDATE_INTERVAL_MILLIS
         else:
             self.__preview = None
 
@@ -114,7 +116,7 @@ class _ParameterChangeCallback(Callback):
         if v > self._max_value:
             v = self._max_value
         
-        self.__appl.client.set(self._mapping, v)
+        self.__appl.client.set(self._mapping, v, coalesce = True)
 
         if self.__preview:
             self.__preview.preview_mapping(
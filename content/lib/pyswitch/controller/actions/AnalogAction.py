@@ -57,6 +57,8 @@ class AnalogAction(Updateable):
             from ..preview import ValuePreview
             self.__preview = ValuePreview.get(change_display)
             self.__change_timeout_millis = change_timeout_millis
+
+            self.update_interval = ValuePreview.UPDATE_INTERVAL_MILLIS
         else:
             self.__preview = None
 
@@ -124,7 +126,7 @@ class AnalogAction(Updateable):
             if self.__last_value != v:
                 # Update value on client
                 self.__last_value = v
-                self.__appl.client.set(self.__mapping, v)
+                self.__appl.client.set(self.__mapping, v, coalesce = True)
 
                 if self.__preview:
                     if not self.__convert_value:
@@ -1,4 +1,4 @@
-from ...misc import Updateable
+from ...misc import Updateable, PeriodCounter, get_option
 
 from adafruit_midi.system_exclusive import SystemExclusive
 
@@ -71,6 +71,8 @@ class EncoderAction(Updateable):
             self.__preview_timeout_millis = preview_timeout_millis
             self.__blink_interval_millis = preview_blink_period_millis
             self.__blink_color = preview_blink_color
+
+            self.update_interval = ValuePreview.UPDATE_INTERVAL_MILLIS
                 
             if accept_action:
                 self.__preview_reset_mapping = preview_reset_mapping
@@ -87,12 +89,16 @@ class EncoderAction(Updateable):
 
         appl.client.register(self._mapping)
 
+        # The mapping is still requested in the global update interval only
+        self.__request_period = PeriodCounter(get_option(appl.config, "updateInterval", 200)) if self.update_interval else None
+
         # Also register the reset mapping for the preview display
         if self.__preview and self.__preselect and self.__preview_reset_mapping:
             appl.client.register(self.__preview_reset_mapping)
 
     def update(self):
-        self._appl.client.request(self._mapping)
+        if not self.__request_period or self.__request_period.exceeded:
+            self._appl.client.request(self._mapping)
 
         if self.__preview:
             self.__preview.update()
@@ -190,7 +196,7 @@ class EncoderAction(Updateable):
             return
         
         # Send message
-        self._appl.client.set(self._mapping, self._last_value)
+        self._appl.client.set(self._mapping, self._last_value, coalesce = True)
         self._set_value(self._last_value)
 
         self.cancel(immediately = False)
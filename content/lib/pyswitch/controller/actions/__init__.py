@@ -32,9 +32,13 @@ class Action(Updateable):
     #
     #      "useSwitchLeds":        Use LEDs to visualize state. Optional, default is False.
     #
+    #      "updateInterval":       Individual update interval in milliseconds for the action and its callback. Optional, default is 0 
+    #                              (global update interval, or the default interval of the callback).
+    #
     # }
     def __init__(self, config = {}):
         self.uses_switch_leds = get_option(config, "useSwitchLeds", False)
+        self.update_interval = get_option(config, "updateInterval", 0)
 
         self.label = get_option(config, "display", None)
 
@@ -42,6 +46,10 @@ class Action(Updateable):
         if self.callback:
             self.callback.action = self
 
+            # The callback does the periodic work (requests, displays), so it uses the interval of the action, too
+            if self.update_interval:
+                self.callback.update_interval = self.update_interval
+
         self.id = get_option(config, "id", None)
 
         self.__enable_callback = get_option(config, "enableCallback", None)
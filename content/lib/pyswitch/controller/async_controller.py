@@ -0,0 +1,94 @@
+from asyncio import sleep as _sleep, gather as _gather, run as _run
+
+from .controller import Controller
+from ..misc import get_option
+
+
+# Alternative runtime for the application, based on asyncio: Instead of polling everything in one busy loop
+# (see Controller.tick()), the subsystems run as separate tasks with their own cadences, and yield in between:
+#
+# - Inputs:  Switch scanning and MIDI receive
+# - Client:  Sending queued requests, coalesced SET messages and buffered MIDI output
+# - Updates: Updateables (actions, callbacks, protocol etc.) in the global update interval, or their individual ones
+# - Display: User interface
+#
+# Uses the same configuration as the Controller. Enabled with the "asyncController" option.
+class AsyncController(Controller):
+
+    # Parameters are the same as for Controller, plus:
+    # sleep: Coroutine function used for waiting (seconds). Optional, default is asyncio.sleep.
+    def __init__(self, led_driver, midi, protocol = None, config = {}, inputs = [], ui = None, period_counter = None, sleep = None):
+        super().__init__(
+            led_driver = led_driver,
+            midi = midi,
+            protocol = protocol,
+            config = config,
+            inputs = inputs,
+            ui = ui,
+            period_counter = period_counter
+        )
+
+        self.__sleep = sleep if sleep else _sleep
+
+        # Cadences of the tasks (seconds)
+        self.__input_interval = get_option(config, "asyncInputIntervalMillis", 2) / 1000
+        self.__client_interval = get_option(config, "asyncClientIntervalMillis", 5) / 1000
+        self.__update_interval = get_option(config, "asyncUpdateIntervalMillis", 10) / 1000
+        self.__display_interval = get_option(config, "asyncDisplayIntervalMillis", get_option(config, "updateInterval", 200)) / 1000
+
+        # The user interface is updated by its own task
+        self.__ui = ui
+        if ui in self.updateables:
+            self.updateables.remove(ui)
+
+        self.__running = False
+
+    # Runs the tasks until stop() is called (blocking). init() must be called before.
+    def start(self):
+        _run(self.run())
+
+    # Coroutine running all tasks until stop() is called
+    async def run(self):
+        self.__running = True
+
+        await _gather(
+            self.__input_task(),
+            self.__client_task(),
+            self.__update_task(),
+            self.__display_task()
+        )
+
+    # Lets all tasks terminate
+    def stop(self):
+        self.__running = False
+
+    # Returns if the tasks are running
+    @property
+    def running(self):
+        return self.__running
+
+    async def __input_task(self):
+        while self.__running:
+            self._receive()
+            await self.__sleep(self.__input_interval)
+
+    async def __client_task(self):
+        while self.__running:
+            self.client.send_requests()
+            self._flush()
+            await self.__sleep(self.__client_interval)
+
+    async def __update_task(self):
+        while self.__running:
+            self._update()
+
+            # Rounds spread over multiple slices (see UpdateScheduler) are continued as soon as possible
+            await self.__sleep(0 if self.update_scheduler.running else self.__update_interval)
+
+    async def __display_task(self):
+        if not self.__ui:
+            return
+
+        while self.__running:
+            self.__ui.update()
+            await self.__sleep(self.__display_interval)
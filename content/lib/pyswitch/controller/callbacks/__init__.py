@@ -1,14 +1,20 @@
 from micropython import const
-from ...misc import Updateable, get_option
+from ...misc import Updateable, PeriodCounter, get_option
 from ...colors import DEFAULT_SWITCH_COLOR, dim_color
 
 
 class Callback(Updateable):
-    def __init__(self, mappings = []):
+
+    # update_interval: Individual update interval in milliseconds (see Updateable.update_interval). 
+    #                  0 for the global update interval. If shorter than the global update interval, 
+    #                  the mappings are still requested in the global interval only.
+    def __init__(self, mappings = [], update_interval = 0):
         super().__init__()
         
+        self.update_interval = update_interval
         self.__initialized = False
         self.__mappings = []
+        self.__request_period = None
 
         for m in mappings:
             self.register_mapping(m)
@@ -31,6 +37,11 @@ class Callback(Updateable):
         for m in self.__mappings:
             self.__appl.client.register(m, self)
 
+        if self.update_interval:
+            global_interval = get_option(appl.config, "updateInterval", 200)
+            if self.update_interval < global_interval:
+                self.__request_period = PeriodCounter(global_interval)
+
         self.__appl.add_updateable(self)
 
         self.__initialized = True
@@ -41,6 +52,9 @@ class Callback(Updateable):
 
     #@RuntimeStatistics.measure
     def update(self):
+        if self.__request_period and not self.__request_period.exceeded:
+            return
+
         for m in self.__mappings:
             self.__appl.client.request(m, self)
 
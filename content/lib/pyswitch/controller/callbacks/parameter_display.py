@@ -1,13 +1,23 @@
 from . import Callback
+from ..client import ClientParameterMapping
 
 # Callback for DisplayLabel to show a parameter value
 class ParameterDisplayCallback(Callback):
+
+    # Default update interval for string parameters (names, comments etc.), which rarely change
+    STRING_UPDATE_INTERVAL_MILLIS = 1000
+
     def __init__(self, 
                  mapping, 
                  convert_value = None,   # Conversion routine: (value) => string/None (None for default behaviour)
-                 default_text = ""
+                 default_text = "",
+                 update_interval = None  # Individual update interval in milliseconds. If None, string parameters use STRING_UPDATE_INTERVAL_MILLIS,
+                                         # all others the global update interval.
         ):
-        Callback.__init__(self, mappings = [mapping])
+        if update_interval == None:
+            update_interval = self.STRING_UPDATE_INTERVAL_MILLIS if mapping.type == ClientParameterMapping.PARAMETER_TYPE_STRING else 0
+
+        Callback.__init__(self, mappings = [mapping], update_interval = update_interval)
         
         self.__mapping = mapping
         self.__convert_value = convert_value
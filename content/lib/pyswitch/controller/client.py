@@ -1,6 +1,6 @@
-from math import floor
 from micropython import const
-from ..misc import EventEmitter, PeriodCounter, Updateable, get_option, do_print
+from ..misc import EventEmitter, PeriodCounter, DeadlineQueue, Updateable, get_option, do_print, get_current_millis
+from .midi import MidiOutputQueue
 
 from adafruit_midi.control_change import ControlChange
 from adafruit_midi.system_exclusive import SystemExclusive
@@ -10,17 +10,18 @@ from adafruit_midi.program_change import ProgramChange
 # Midi mapping for a client command. Contains commands to set or request a parameter
 class ClientParameterMapping:
     
-    _mappings = []
+    # Registry of all mappings created by the factories, by name (shared with all subclasses)
+    _mappings = {}
 
     # Singleton factory
     @staticmethod
-    def get(name, set = None, request = None, response = None, value = None, type = 0, depends = None):
+    def get(name, set = None, request = None, response = None, value = None, type = 0, depends = None, priority = 0, min_interval = 0, ttl = None):
         if not name:
             raise Exception() # You must provide an unique name!
         
-        for m in ClientParameterMapping._mappings:
-            if m.name == name:
-                return m
+        m = ClientParameterMapping._mappings.get(name, None)
+        if m:
+            return m
             
         m = ClientParameterMapping(
             name = name,
@@ -30,11 +31,66 @@ class ClientParameterMapping:
             response = response,
             value = value,
             type = type,
-            depends = depends
+            depends = depends,
+            priority = priority,
+            min_interval = min_interval,
+            ttl = ttl
         )
 
-        ClientParameterMapping._mappings.append(m)
+        ClientParameterMapping._mappings[name] = m
         return m
+    
+    # Declares a group of mappings as depending on the passed parent mapping: The mappings of the group 
+    # will only be requested again when the parent has changed its value (see Client.request()).
+    @staticmethod
+    def set_group_parent(parent, mappings):
+        for m in mappings:
+            # Prevent circular dependencies
+            p = parent
+            while p:
+                if p == m:
+                    raise Exception() # Circular dependency
+                p = p.depends
+
+            m.depends = parent
+
+    # Returns a list of the status bytes of all response templates of the registered mappings (without 
+    # duplicates). Used to filter MIDI input (see MidiController.set_input_filter()).
+    @staticmethod
+    def response_statuses():
+        ret = []
+
+        for m in ClientParameterMapping._mappings.values():
+            if not m.response:
+                continue
+
+            responses = m.response if isinstance(m.response, list) else [m.response]
+
+            for r in responses:
+                status = get_status(r)
+                if status != None and status not in ret:
+                    ret.append(status)
+
+        return ret
+
+    # Returns a list of all registered mappings with their message shapes, for debugging and 
+    # introspection. Each entry is a dict holding the name, class and type of the mapping, as well as
+    # the shapes of its set, request and response messages (see describe_message()), and the name of
+    # the mapping it depends on, if any.
+    @staticmethod
+    def registered_mappings():
+        ret = []
+        for m in ClientParameterMapping._mappings.values():
+            ret.append({
+                "name": m.name,
+                "class": m.__class__.__name__,
+                "type": "string" if m.type == ClientParameterMapping.PARAMETER_TYPE_STRING else "numeric",
+                "set": describe_message(m.set),
+                "request": describe_message(m.request),
+                "response": describe_message(m.response),
+                "depends": m.depends.name if m.depends else None
+            })
+        return ret
             
     ##########################################################################################################################
 
@@ -43,7 +99,7 @@ class ClientParameterMapping:
     PARAMETER_TYPE_STRING = const(1)
 
     # Takes MIDI messages as argument (ControlChange or SystemExclusive)
-    def __init__(self, name, create_key, set = None, request = None, response = None, value = None, type = 0, depends = None):
+    def __init__(self, name, create_key, set = None, request = None, response = None, value = None, type = 0, depends = None, priority = 0, min_interval = 0, ttl = None):
         if create_key != ClientParameterMapping:
             raise Exception() # Use the get method exclusively to create mappings!
         
@@ -54,8 +110,14 @@ class ClientParameterMapping:
         self.value = value        # Value of the parameter (buffer). After receiving an answer, the value 
                                   # is buffered here.
         self.type = type          # Numeric or string
-        self.depends = depends    # If another mapping is set here, this mapping will only be requested when the dependency has changed value
-                                  # NOTE: In 2.4.1, this is prepared but not realized already
+        self.depends = depends    # If another mapping is set here, this mapping will only be requested when the dependency has changed value.
+                                  # Dependencies can be chained (see Client.request()).
+        self.priority = priority  # Requests of mappings with higher priority are sent first when the request scheduler has to queue requests
+        self.min_interval = min_interval  # Minimum time between two requests for this mapping (milliseconds). 0 means no limit.
+        self.ttl = ttl            # Time (milliseconds) a received value is considered fresh: Requests are answered from the value without
+                                  # sending MIDI in this time. None uses the client's default (see Client.request()), 0 disables caching.
+
+        self.__matchers = []      # Compiled response templates (ResponseMatcher instances, see parse_against())
 
     # Parse the incoming MIDI message and set its value on the mapping.
     # If the response template does not match, returns False, and
@@ -68,83 +130,41 @@ class ClientParameterMapping:
         
         return False
 
-    # Parse a message against a response message
-    def parse_against(self, midi_message, response):     
-        # SysEx (NRPN) Messages
-        if isinstance(midi_message, SystemExclusive):
-            if not isinstance(response, SystemExclusive):
-                return None
-                     
-            # Compare manufacturer IDs
-            if midi_message.manufacturer_id != response.manufacturer_id:
-                return None
-            
-            # Check if the message belongs to the mapping. The following have to match:
-            #   2: function code, 
-            #   3: instance ID, 
-            #   4: address page, 
-            #   5: address nunber
-            #
-            # The first two values are ignored (the Kemper MIDI specification implies this would contain the product type
-            # and device ID as for the request, however the device just sends two zeroes)
-            if midi_message.data[2:6] != response.data[2:6]:
-                return None
-            
-            # The values starting from index 6 are the value of the response.
-            if self.type == self.PARAMETER_TYPE_STRING:
-                # Take as string
-                return ''.join(chr(int(c)) for c in list(midi_message.data[6:-1]))
-            else:
-                # Decode 14-bit value to int
-                return midi_message.data[-2] * 128 + midi_message.data[-1]
-
-        # CC Messages
-        elif isinstance(midi_message, ControlChange):
-            if not isinstance(response, ControlChange):
-                return None
-            
-            if midi_message.control == response.control:
-                return midi_message.value
-
-        # PC Messages
-        elif isinstance(midi_message, ProgramChange):
-            if not isinstance(response, ProgramChange):
-                return None
+    # Parse a message against a response message. The response template is compiled to a
+    # ResponseMatcher on first use.
+    def parse_against(self, midi_message, response):
+        matcher = self.__get_matcher(response)
+        if not matcher:
+            return None
+        
+        return matcher.match(midi_message)
+    
+    # Returns the matcher for the passed response template (compiled on first use), or None if no template is passed.
+    # Mappings only have one or two templates, so they are just searched by identity.
+    def __get_matcher(self, response):
+        for matcher in self.__matchers:
+            if matcher.template is response:
+                return matcher
             
-            return midi_message.patch
-
-        # MIDI Clock
-        #elif isinstance(midi_message, MidiClockMessage):
-        #    self._count_clock += 1
-
-        #    if self._count_clock >= 24:
-        #        self._count_clock = 0
-
-        #    if self._count_clock >= 12:
-        #        mapping.value = 1
-        #    else:
-        #        mapping.value = 0    
-
-        #    return True
+        if response == None:
+            return None
         
-        # MIDI Clock start
-        #elif isinstance(midi_message, Start):
-        #    self._count_clock = 0
-
-        #    mapping.value = 1
-
-        #    return True
+        matcher = ResponseMatcher(response, self.type)
+        self.__matchers.append(matcher)
 
-        return None
+        return matcher
     
-    # Set the passed value(s) on the SET message(s) of the mapping.
+    # Set the passed value(s) on the SET message(s) of the mapping. SysEx SET messages are replaced
+    # by preallocated ones on first use (see PreallocatedSystemExclusive).
     def set_value(self, value):
-        if isinstance(self.set, list):
-            for i in range(len(self.set)):
-                self.__set_value(self.set[i], value[i])
+        set = self.set
+        if isinstance(set, list):
+            for i in range(len(set)):
+                set[i] = self.__set_value(set[i], value[i])
         else:
-            self.__set_value(self.set, value)
+            self.set = self.__set_value(set, value)
 
+    # Sets the value on the passed message in place and returns the message
     def __set_value(self, midi_message, value):
         if self.type == self.PARAMETER_TYPE_STRING:
             raise Exception() # Setting strings is not implemented yet
@@ -154,25 +174,48 @@ class ClientParameterMapping:
             midi_message.value = value
 
         elif isinstance(midi_message, SystemExclusive):            
-            # Fill up message to appropriate length for the specification
-            data = list(midi_message.data)
-            while len(data) < 8:
-                data.append(0)
+            # Fill up message to appropriate length for the specification (only done once)
+            if not isinstance(midi_message, PreallocatedSystemExclusive):
+                midi_message = PreallocatedSystemExclusive(midi_message, 8)
             
             # Set value as 14 bit
-            data[6] = int(floor(value / 128))
+            data = midi_message.data
+            data[6] = int(value // 128)
             data[7] = int(value % 128)
 
-            midi_message.data = bytes(data)
-
         elif isinstance(midi_message, ProgramChange):
             # Set patch
             midi_message.patch = value
 
+        return midi_message
+
     # Returns if the mapping has finished receiving a result. Per default,
     # this returns True which is valid for mappings with one response.
     def result_finished(self):
         return True
+
+    # Returns a list of keys for the response index of the client (one for each response template).
+    # Incoming messages are only passed to the requests whose keys match the message's key. If None
+    # is returned, the mapping is offered every incoming message (override this in custom mappings which
+    # do not parse against their response templates).
+    def response_keys(self):
+        if not self.response:
+            return None
+        
+        if isinstance(self.response, list):
+            ret = []
+            for r in self.response:
+                matcher = self.__get_matcher(r)
+                key = matcher.key if matcher else None
+                if key != None and key not in ret:
+                    ret.append(key)
+            return ret
+        
+        key = self.__get_matcher(self.response).key
+        if key == None:
+            return None
+        
+        return [key]
     
     # def __repr__(self):
     #     return self.name
@@ -184,10 +227,13 @@ class ClientTwoPartParameterMapping(ClientParameterMapping):
 
     # Singleton factory
     @staticmethod
-    def get(name, set = None, request = None, response = None, value = None, type = 0, depends = None):
-        for m in ClientParameterMapping._mappings:
-            if m.name == name:
-                return m
+    def get(name, set = None, request = None, response = None, value = None, type = 0, depends = None, priority = 0, min_interval = 0, ttl = None):
+        if not name:
+            raise Exception() # You must provide an unique name!
+        
+        m = ClientParameterMapping._mappings.get(name, None)
+        if m:
+            return m
             
         m = ClientTwoPartParameterMapping(
             name = name,
@@ -197,16 +243,19 @@ class ClientTwoPartParameterMapping(ClientParameterMapping):
             response = response,
             value = value,
             type = type,
-            depends = depends
+            depends = depends,
+            priority = priority,
+            min_interval = min_interval,
+            ttl = ttl
         )
 
-        ClientParameterMapping._mappings.append(m)
+        ClientParameterMapping._mappings[name] = m
         return m
 
     ##########################################################################################################################
 
-    def __init__(self, name, create_key, set = None, request = None, response = None, value = None, type = 0, depends = None):
-        super().__init__(name = name, create_key = create_key, set = set, request = request, response = response, value = value, type = type, depends = depends)
+    def __init__(self, name, create_key, set = None, request = None, response = None, value = None, type = 0, depends = None, priority = 0, min_interval = 0, ttl = None):
+        super().__init__(name = name, create_key = create_key, set = set, request = request, response = response, value = value, type = type, depends = depends, priority = priority, min_interval = min_interval, ttl = ttl)
 
         self.__value_1 = None
     
@@ -232,30 +281,334 @@ class ClientTwoPartParameterMapping(ClientParameterMapping):
 ############################################################################################################
 
 
+# SysEx message holding a preallocated buffer with the complete message as sent to the MIDI port. The data
+# is a view into this buffer, so values can be patched in place, and sending does not need to encode
+# the message again (adafruit_midi sends the result of __bytes__()).
+#
+# Contract: __bytes__() returns the buffer itself (a bytearray, not a copy), so the send path does not 
+# allocate. Callers must call msg.__bytes__() directly like adafruit_midi does: bytes(msg) is not supported
+# (CPython raises a TypeError as the result is not a bytes instance). The buffer is changed by the next
+# value set, so anyone keeping the data beyond sending must copy it (like MidiOutputQueue does).
+class PreallocatedSystemExclusive(SystemExclusive):
+
+    # Creates the message from a template. The data is padded with zeroes up to min_length.
+    def __init__(self, template, min_length = 0):
+        super().__init__(manufacturer_id = template.manufacturer_id, data = template.data)
+
+        length = len(template.data)
+        if length < min_length:
+            length = min_length
+
+        offset = 1 + len(template.manufacturer_id)
+        
+        buffer = bytearray(offset + length + 1)
+        buffer[0] = 0xf0
+        buffer[1:offset] = bytes(template.manufacturer_id)
+        buffer[offset:offset + len(template.data)] = bytes(template.data)
+        buffer[-1] = 0xf7
+
+        self.buffer = buffer
+        self.data = memoryview(buffer)[offset:offset + length]
+
+    # Returns the buffer without copying (see contract above)
+    def __bytes__(self):
+        return self.buffer
+
+
+############################################################################################################
+
+
+# Range of the SysEx data bytes which identify a response (see ResponseMatcher.match())
+_SYSEX_PREFIX_START = const(2)
+_SYSEX_PREFIX_END = const(6)
+
+# Compiled response template: Checks incoming messages against the template and decodes their value.
+# All data needed for matching is extracted from the template once, so no type checks or slicing 
+# (which means a heap allocation on CircuitPython) are needed when matching.
+class ResponseMatcher:
+
+    def __init__(self, template, type = 0):
+        self.template = template
+        self.status = get_status(template)    # Status byte of matching messages (None: Matches nothing)
+        self.key = get_message_key(template)  # Key for the response index of the client (see get_message_key())
+        
+        self.__string = (type == ClientParameterMapping.PARAMETER_TYPE_STRING)
+        self.__control = None
+        self.__manufacturer_id = None
+        self.__prefix = None
+
+        if self.status == 0xf0:
+            self.__manufacturer_id = tuple(template.manufacturer_id)
+            self.__prefix = tuple(template.data[_SYSEX_PREFIX_START:_SYSEX_PREFIX_END])
+
+        elif self.status == 0xb0:
+            self.__control = template.control
+
+        elif self.status != 0xc0:
+            self.status = None
+
+    # Returns the value of the message if it matches the template, None otherwise.
+    def match(self, midi_message):
+        status = self.status
+        if status == None or get_status(midi_message) != status:
+            return None
+        
+        # SysEx (NRPN) Messages
+        if status == 0xf0:
+            # Compare manufacturer IDs
+            manufacturer_id = midi_message.manufacturer_id
+            own_id = self.__manufacturer_id
+
+            if len(manufacturer_id) != len(own_id):
+                return None
+            
+            i = 0
+            while i < len(own_id):
+                if manufacturer_id[i] != own_id[i]:
+                    return None
+                i += 1
+            
+            # Check if the message belongs to the mapping. The following have to match:
+            #   2: function code, 
+            #   3: instance ID, 
+            #   4: address page, 
+            #   5: address nunber
+            #
+            # The first two values are ignored (the Kemper MIDI specification implies this would contain the product type
+            # and device ID as for the request, however the device just sends two zeroes)
+            data = midi_message.data
+            prefix = self.__prefix
+            
+            num = len(data) - _SYSEX_PREFIX_START
+            if num > _SYSEX_PREFIX_END - _SYSEX_PREFIX_START:
+                num = _SYSEX_PREFIX_END - _SYSEX_PREFIX_START
+            
+            if num != len(prefix):
+                return None
+            
+            i = 0
+            while i < num:
+                if data[i + _SYSEX_PREFIX_START] != prefix[i]:
+                    return None
+                i += 1
+
+            # The values starting from index 6 are the value of the response.
+            if self.__string:
+                # Take as string (the last byte is the terminating zero)
+                return _string_interner.decode(data, 6, len(data) - 1)
+            else:
+                # Decode 14-bit value to int
+                return data[-2] * 128 + data[-1]
+            
+        # CC Messages
+        elif status == 0xb0:
+            if midi_message.control == self.__control:
+                return midi_message.value
+            
+            return None
+
+        # PC Messages
+        return midi_message.patch
+
+
+# Returns the status byte of the passed message type (without channel), or None
+def get_status(midi_message):
+    return getattr(midi_message, "_STATUS", None)
+
+
+# Decodes strings from MIDI message data, and interns them in a small bounded cache: If the same 
+# string is received again (for example a polled rig name), the existing string object is returned, 
+# so nothing is allocated at all.
+class StringInterner:
+    
+    def __init__(self, size = 32):
+        self.__size = size
+        self.__entries = {}       # Hash -> (raw bytes, string)
+        self.__order = []         # Hashes in order of adding (oldest are removed first)
+
+    # Returns the string contained in data[start:end]
+    def decode(self, data, start, end):
+        if end <= start:
+            return ""
+        
+        # Hash the data (kept small to avoid long integers on CircuitPython)
+        h = 0
+        i = start
+        while i < end:
+            h = (h * 31 + data[i]) & 0xfffff
+            i += 1
+
+        entry = self.__entries.get(h, None)
+        if entry and self.__equals(entry[0], data, start, end):
+            return entry[1]
+        
+        # Not cached yet (or hash collision): Decode and remember
+        raw = bytes(data[start:end])
+        ret = raw.decode()
+
+        if not h in self.__entries:
+            self.__order.append(h)
+            
+            if len(self.__order) > self.__size:
+                del self.__entries[self.__order.pop(0)]
+
+        self.__entries[h] = (raw, ret)
+        return ret
+    
+    # Number of cached strings
+    def __len__(self):
+        return len(self.__entries)
+
+    def __equals(self, raw, data, start, end):
+        if len(raw) != end - start:
+            return False
+        
+        i = start
+        while i < end:
+            if data[i] != raw[i - start]:
+                return False
+            i += 1
+
+        return True
+
+
+# Shared interner for all mappings
+_string_interner = StringInterner()
+
+
+############################################################################################################
+
+
+# Mask for the SysEx message keys (keeps the keys and all intermediate values small integers, which are 
+# not allocated on the heap on CircuitPython)
+_KEY_MASK = const(0xffffff)
+
+# Returns an integer key for the passed message, derived from the message type and all bytes which 
+# are used to determine if the message belongs to a mapping (see ResponseMatcher.match()). Messages
+# which match the same template always have the same key. Different templates may share a key
+# (which is resolved by the matchers). The bytes are read in place, so nothing is allocated.
+# Returns None for message types which are not parsed by mappings.
+def get_message_key(midi_message):
+    status = get_status(midi_message)
+
+    if status == 0xf0:
+        # Hash of manufacturer ID, function code, instance ID, address page and address number
+        key = 0xf0
+
+        manufacturer_id = midi_message.manufacturer_id
+        i = 0
+        while i < len(manufacturer_id):
+            key = (key * 31 + manufacturer_id[i]) & _KEY_MASK
+            i += 1
+
+        data = midi_message.data
+        end = len(data)
+        if end > _SYSEX_PREFIX_END:
+            end = _SYSEX_PREFIX_END
+
+        i = _SYSEX_PREFIX_START
+        while i < end:
+            key = (key * 31 + data[i]) & _KEY_MASK
+            i += 1
+
+        return key
+    
+    elif status == 0xb0:
+        return 0xb000 + midi_message.control
+    
+    elif status == 0xc0:
+        return 0xc0
+    
+    return None
+
+
+# Returns a short description of the shape of the passed message (or list of messages), like 
+# "SystemExclusive [0, 20, 33] [2, 7f, 41, 0, 32, 3]" or "ControlChange 17". Values are omitted.
+def describe_message(midi_message):
+    if midi_message == None:
+        return None
+    
+    if isinstance(midi_message, list):
+        return [describe_message(m) for m in midi_message]
+    
+    if isinstance(midi_message, SystemExclusive):
+        man_id = ", ".join([hex(b)[2:] for b in midi_message.manufacturer_id])
+        data = ", ".join([hex(b)[2:] for b in midi_message.data])
+        return f"SystemExclusive [{ man_id }] [{ data }]"
+    
+    elif isinstance(midi_message, ControlChange):
+        return f"ControlChange { repr(midi_message.control) }"
+    
+    return midi_message.__class__.__name__
+
+
+############################################################################################################
+
+
 # Implements all MIDI communication to and from the client device
 class Client: #(ClientRequestListener):
 
-    # Listener for dependency mappings
+    # Listener for a parent mapping in the dependency graph. Holds all mappings depending on the 
+    # parent, with their listeners. Also listens to the requests of the dependent mappings.
     class _DependencyListener:
-        def __init__(self, client, orig_mapping, listener = None):
+        def __init__(self, client, parent):
             self.__client = client
-            self.__orig_mapping = orig_mapping
+            self.__parent = parent
             self.__last_value = None
-            self.__listener = listener
+            self.__children = {}      # Dependent mapping -> list of its listeners
+
+        # Adds a dependent mapping (and its listener, if any). If the parent value is known already, 
+        # the mapping is requested immediately (else it would have to wait for the next parent change).
+        def add(self, mapping, listener):
+            added = False
 
+            listeners = self.__children.get(mapping, None)
+            if listeners == None:
+                listeners = []
+                self.__children[mapping] = listeners
+                added = True
+
+            if listener and not listener in listeners:
+                listeners.append(listener)
+                added = True
+
+            if added and self.__last_value != None:
+                self.__client._request_dependent(mapping, [listener] if listener else [], self)
+
+        # Re-request all dependent mappings when the parent has changed value. Dependent mappings which 
+        # are parents themselves are listened to by their own dependency listener, so this is transitive.
         def parameter_changed(self, mapping):
-            if mapping.value != self.__last_value:
-                self.__last_value = mapping.value
+            if mapping != self.__parent:
+                return
 
-                self.__client._register_mapping(self.__orig_mapping, self.__listener, True)           
+            if mapping.value == self.__last_value:
+                return
+            
+            self.__last_value = mapping.value
+
+            for child, listeners in self.__children.items():
+                self.__client._request_dependent(child, listeners, self)
         
+        # When the parent request terminates, its dependents are invalid, too. When a dependent request 
+        # terminates, it must be requested again. In both cases, the last value is forgotten so the 
+        # dependents are requested again as soon as the parent is answered again.
         def request_terminated(self, mapping):
-            pass
+            self.__last_value = None
+
+            if mapping != self.__parent:
+                return
+
+            for child, listeners in self.__children.items():
+                for listener in listeners:
+                    listener.request_terminated(child)
 
     ##########################################################################################################
 
     def __init__(self, midi, config):
         self.midi = midi
+
+        # Prioritized send function of the MIDI handler, if supported (see MidiController.send_prioritized())
+        self.__send_prioritized = getattr(midi, "send_prioritized", None)
         
         self.debug_unparsed_messages = get_option(config, "debugUnparsedMessages", False)
         self.__debug_sent_messages = get_option(config, "debugSentMessages", False)
@@ -269,18 +622,89 @@ class Client: #(ClientRequestListener):
         # List of ClientRequest objects    
         self.__requests = []
 
-        # Dict of dependency listeners
+        # Response index: Maps message keys (see get_message_key()) to lists of requests whose 
+        # response templates match the key. Requests whose mappings do not provide keys are held 
+        # in a separate list and are offered every message.
+        self.__response_index = {}
+        self.__unindexed_requests = []
+
+        # Requests by mapping (for fast lookup of matching requests)
+        self.__requests_by_mapping = {}
+
+        # Optional callback called with the response statuses of new mappings (see set_response_status_callback()),
+        # and the mappings already reported
+        self.__response_status_callback = None
+        self.__response_status_mappings = {}
+
+        # Dependency graph: Dict of dependency listeners by parent mapping
         self.__dependencies = {}
 
         self.__max_request_lifetime = get_option(config, "maxRequestLifetimeMillis", 2000)
 
-        # Helper to only clean up hanging requests from time to time as this is not urgent at all
-        self.__cleanup_terminated_period = PeriodCounter(self.__max_request_lifetime / 2)    
+        # Deadlines of the sent requests (requests are terminated when they have not been answered in time)
+        self.__timeouts = DeadlineQueue()
+        self.__expire_callback = self.__request_expired
+
+        # Scheduler for sending the request messages
+        self.scheduler = ClientRequestScheduler(config)
+
+        # Mappings with coalesced SET messages, waiting to be sent at the end of the tick (see set())
+        self.__pending_sets = []
+
+        # Receive pipeline: Incoming messages are dispatched to the waiting requests, and the unparsed
+        # ones are printed if enabled. Further stages can be added by client implementations.
+        self.receive_pipeline = ClientReceivePipeline()
+        self.receive_pipeline.add(self.__receive_requests, ClientReceivePipeline.ORDER_REQUESTS)
+
+        if self.debug_unparsed_messages:
+            self.receive_pipeline.add(self.__receive_unparsed, ClientReceivePipeline.ORDER_DEBUG)
+
+        # Value cache: Default freshness time for received values in milliseconds (0 means no caching), 
+        # and timestamps of the received values by mapping (see request())
+        self.__default_ttl = get_option(config, "requestCacheTtlMillis", 0)
+        self.__value_timestamps = {}
+
+        # Value cache statistics
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Request statistics (round trip times and timeouts per mapping, see ClientStatistics). None if disabled.
+        self.statistics = ClientStatistics() if get_option(config, "clientStatistics", False) else None
+
+        # Response keys of all requests ever registered (only used for the statistics)
+        self.__known_response_keys = set()
+
+        dump_interval = get_option(config, "clientStatisticsDumpInterval", 0)
+        self.__statistics_dump_period = PeriodCounter(dump_interval) if self.statistics and dump_interval else None
 
     @property
     def requests(self):
         return self.__requests
 
+    # Sends queued requests as far as the scheduler limits allow. Must be called once every tick.
+    def send_requests(self):
+        self.scheduler.process()
+
+        if self.__statistics_dump_period and self.__statistics_dump_period.exceeded:
+            self.send_statistics()
+
+    # Sends a MIDI message with a priority class (see MidiOutputQueue): SET messages are sent with high 
+    # priority, requests with low priority so they are deferred first on congested ports.
+    def send(self, midi_message, priority = MidiOutputQueue.PRIORITY_NORMAL):
+        if self.__send_prioritized:
+            self.__send_prioritized(midi_message, priority)
+        else:
+            self.midi.send(midi_message)
+
+    # Sends the request statistics as SysEx messages (see ClientStatistics.sysex_dump()), 
+    # for example to be shown in a MIDI monitor. Does nothing if statistics are disabled.
+    def send_statistics(self):
+        if not self.statistics:
+            return
+        
+        for msg in self.statistics.sysex_dump():
+            self.send(msg, MidiOutputQueue.PRIORITY_LOW)
+
     # Register the mapping and listener in advance (only plays a role for bidirectional parameters,
     # here this is redundant)
     def register(self, mapping, listener = None):
@@ -288,12 +712,47 @@ class Client: #(ClientRequestListener):
             self._register_mapping(mapping, listener, False)
 
     # Sends the SET message of a mapping. Value has to be a list if the mapping's set field is a list, too!
-    def set(self, mapping, value):
+    # If coalesce is set, the message is not sent immediately but at the end of the tick (see flush()), and
+    # only the latest value is sent when the mapping is set multiple times in between. Use this for continuous
+    # parameters (pedals, encoders etc.) only. All other SET messages (program changes, tap tempo, looper etc.)
+    # are sent immediately, after all pending coalesced messages, so their order is kept.
+    def set(self, mapping, value, coalesce = False):
         if not mapping.set:
             return
         
         mapping.set_value(value)
-                
+
+        # The cached value is outdated now
+        if mapping in self.__value_timestamps:
+            del self.__value_timestamps[mapping]
+
+        pending = self.__pending_sets
+        if coalesce:
+            # The value is set on the SET message already, so the mapping only has to be remembered
+            if not mapping in pending:
+                pending.append(mapping)
+            return
+        
+        if pending:
+            if mapping in pending:
+                pending.remove(mapping)
+
+            self.flush()
+
+        self.__send_set(mapping)
+
+    # Sends all pending coalesced SET messages (see set()). Must be called at the end of every tick.
+    def flush(self):
+        pending = self.__pending_sets
+        if not pending:
+            return
+        
+        for mapping in pending:
+            self.__send_set(mapping)
+
+        pending.clear()
+
+    def __send_set(self, mapping):
         if isinstance(mapping.set, list):
             for m in mapping.set:
                 if not m:
@@ -302,27 +761,63 @@ class Client: #(ClientRequestListener):
                 if self.__debug_sent_messages:   # pragma: no cover
                     self.print_message(m)
 
-                self.midi.send(m)
+                self.send(m, MidiOutputQueue.PRIORITY_HIGH)
         else:
             if self.__debug_sent_messages:       # pragma: no cover
                 self.print_message(mapping.set)
                 
-            self.midi.send(mapping.set)
+            self.send(mapping.set, MidiOutputQueue.PRIORITY_HIGH)
 
     # Send the request message of a mapping. Calls the passed listener when the answer has arrived.
+    # If the mapping depends on another mapping, the parent is requested instead, and the mapping
+    # is only requested when the parent has changed its value (this works transitively).
+    # If the value of the mapping has been received within its freshness time (see ClientParameterMapping.ttl, 
+    # default can be set with the "requestCacheTtlMillis" option), the listener is called immediately with the
+    # current value instead.
     #@RuntimeStatistics.measure
     def request(self, mapping, listener = None):
         if not mapping.request or not mapping.response:
             return
         
-        if mapping.depends:
-            if not mapping in self.__dependencies:
-                self.__dependencies[mapping] = self._DependencyListener(self, mapping, listener)
+        ttl = mapping.ttl if mapping.ttl != None else self.__default_ttl
+        if ttl:
+            timestamp = self.__value_timestamps.get(mapping, None)
+            
+            if timestamp != None and get_current_millis() - timestamp <= ttl:
+                self.cache_hits += 1
+
+                if listener:
+                    listener.parameter_changed(mapping)
+                return
+            
+            self.cache_misses += 1
+
+        self.__request(mapping, listener)
+
+    def __request(self, mapping, listener):
+        parent = mapping.depends
+        
+        if parent:
+            dep = self.__dependencies.get(parent, None)
+            if not dep:
+                dep = self._DependencyListener(self, parent)
+                self.__dependencies[parent] = dep
 
-            # Register the dependency rather than the mapping itself
-            self._register_mapping(mapping.depends, self.__dependencies[mapping], True)
+            dep.add(mapping, listener)
+
+            # Request the parent rather than the mapping itself
+            self.__request(parent, dep)
         else:
             self._register_mapping(mapping, listener, True)
+
+    # Requests a dependent mapping after its parent has changed. The dependency listener of the 
+    # parent is registered, too. Internal use only.
+    def _request_dependent(self, mapping, listeners, dependency):
+        self._register_mapping(mapping, dependency, True)
+        
+        # If the mapping has dependents itself, its dependency listener is contained in the listeners
+        for listener in listeners:
+            self._register_mapping(mapping, listener, True)
         
     # Registers a mapping request or adds the listener to an existing one. Optionally sends the
     # request message. Internal use only.
@@ -336,18 +831,23 @@ class Client: #(ClientRequestListener):
             if listener:
                 req.add_listener(listener)
 
-            # Add to list
-            self.__requests.append(req)
+            # Add to list and index
+            self.__add_request(req)
             
-            # Send 
+            # Send (or queue, if the scheduler limits are reached)
             if send:           
-                req.send()
+                self.scheduler.enqueue(req)
 
         else:
             # Existing request: Add listener
             if listener:
                 req.add_listener(listener)
 
+    # Sets a callback which is called with the response status bytes of every mapping requested for the first
+    # time (used to update the MIDI input filter when mappings with new response statuses are registered, see Controller)
+    def set_response_status_callback(self, callback):
+        self.__response_status_callback = callback
+
     # Create a new request
     def __create_request(self, mapping):
         return ClientRequest(              
@@ -356,63 +856,177 @@ class Client: #(ClientRequestListener):
             self.__max_request_lifetime if mapping.request else 0
         )
 
+    # Adds a request to the list and the response index
+    def __add_request(self, request):
+        self.__requests.append(request)
+        self.__requests_by_mapping[request.mapping] = request
+
+        callback = self.__response_status_callback
+        if callback and not request.mapping in self.__response_status_mappings:
+            self.__response_status_mappings[request.mapping] = True
+
+            response = request.mapping.response
+            if isinstance(response, list):
+                for r in response:
+                    callback(get_status(r))
+            elif response:
+                callback(get_status(response))
+
+        if request.response_keys == None:
+            self.__unindexed_requests.append(request)
+            return
+        
+        index = self.__response_index
+        for key in request.response_keys:
+            if key in index:
+                index[key].append(request)
+            else:
+                index[key] = [request]
+
+        # Remember the keys for the statistics (see __receive_requests())
+        if self.statistics:
+            self.__known_response_keys.update(request.response_keys)
+
+    # Removes a request from the response index
+    def __remove_from_index(self, request):
+        self.scheduler.remove(request)
+
+        if self.__requests_by_mapping.get(request.mapping) == request:
+            del self.__requests_by_mapping[request.mapping]
+
+        if request.response_keys == None:
+            self.__unindexed_requests.remove(request)
+            return
+        
+        index = self.__response_index
+        for key in request.response_keys:
+            candidates = index[key]
+            candidates.remove(request)
+            
+            if not candidates:
+                del index[key]
+
     # Receive MIDI messages
     #@RuntimeStatistics.measure
     def receive(self, midi_message):
-        if self.__cleanup_terminated_period.exceeded:
-            self.__cleanup_hanging_requests()
+        # Terminate requests which took too long
+        if self.__timeouts:
+            self.__timeouts.process(self.__expire_callback, get_current_millis())
 
         if self.__debug_stats and self.__stats_period.exceeded:  # pragma: no cover 
-            do_print(f"    { len(self.__requests) } requests pending:")
+            do_print(f"    { len(self.__requests) } requests pending ({ self.scheduler.num_queued } queued, { self.scheduler.num_in_flight } in flight), cache hits: { self.cache_hits }, misses: { self.cache_misses }:")
             for r in self.__requests:
                 do_print(f"{ r.mapping.name }: { repr([l.__class__.__name__ for l in r.listeners]) }")
 
+            if self.statistics:
+                self.statistics.print()
+
         if not midi_message:
             return False
         
-        # See if one of the waiting requests matches
-        do_cleanup = False
+        return self.receive_pipeline.receive(midi_message)
 
+    # Receive stage: Passes the message to the waiting requests. Returns if the message has been parsed.
+    def __receive_requests(self, midi_message):
+        # See if one of the waiting requests matches. Only the requests indexed for the message's
+        # key are checked, plus the ones which could not be indexed.
+        finished = None
         parsed = False
-        for request in self.__requests:
+
+        key = get_message_key(midi_message)
+        if key != None:
+            candidates = self.__response_index.get(key, None)
+            if candidates:
+                for request in candidates:
+                    if request.parse(midi_message):
+                        parsed = True
+                        self.__value_received(request)
+
+                    if request.finished:
+                        finished = self.__add_finished(finished, request)
+
+        for request in self.__unindexed_requests:
             if request.parse(midi_message):
                 parsed = True
+                self.__value_received(request)
 
             if request.finished:
-                do_cleanup = True
+                finished = self.__add_finished(finished, request)
 
-        # Check for finished requests
-        if do_cleanup:
-            self.__cleanup_requests()
+        # Remove finished requests
+        if finished:
+            for request in finished:
+                self.__remove_request(request)
 
-        # Debug unparsed messages
-        if not parsed and self.debug_unparsed_messages:           # pragma: no cover
-            self.print_message(midi_message)
+        # Responses of known mappings arriving while no request is waiting (late or unsolicited answers)
+        if not parsed and self.statistics and key in self.__known_response_keys:
+            self.statistics.unmatched_responses += 1
 
         return parsed
+    
+    # Receive stage for debugging: All messages reaching this stage have not been parsed by any other stage.
+    # The message is only printed, not consumed.
+    def __receive_unparsed(self, midi_message):
+        self.print_message(midi_message)
+        return False
             
     # Returns a matching request from the list if any, or None if no matching
     # request has been found.
     #@RuntimeStatistics.measure
     def get_matching_request(self, mapping):
-        for request in self.__requests:
-            if request.mapping == mapping:
-                return request
-            
-        return None
+        request = self.__requests_by_mapping.get(mapping, None)
 
-    # Remove all finished requests, and terminate the ones which took too long already
-    def __cleanup_requests(self):
-        self.__requests = [i for i in self.__requests if not i.finished]
-            
-    # Terminate any requests which took too long from time to time
-    def __cleanup_hanging_requests(self):
-        # Terminate requests if they waited too long
-        for request in self.__requests:
-            if request.lifetime and request.lifetime.exceeded:
-                request.terminate()
+        # Terminated requests which have not been cleaned up yet must not be reused
+        if request and request.finished:
+            return None
+        
+        return request
+
+    # Remembers the time a value has been received for the value cache (see request()), and records
+    # the round trip time if statistics are enabled
+    def __value_received(self, request):
+        mapping = request.mapping
+
+        if self.statistics and request.sent_time != None:
+            self.statistics.add_response(mapping, get_current_millis() - request.sent_time)
+
+            # Only the first response counts as round trip
+            request.sent_time = None
+
+        ttl = mapping.ttl if mapping.ttl != None else self.__default_ttl
+        if not ttl:
+            return
+        
+        self.__value_timestamps[mapping] = get_current_millis()
+
+    # Adds a request to the (lazily created) list of finished requests, if not yet contained
+    def __add_finished(self, finished, request):
+        if finished == None:
+            return [request]
+        
+        if not request in finished:
+            finished.append(request)
+
+        return finished
+
+    # Removes a request from the list, the index and the deadline queue
+    def __remove_request(self, request):
+        self.__requests.remove(request)
+        self.__remove_from_index(request)
+        self.__timeouts.remove(request)
+
+    # Starts the life time of a request when it has been sent. Internal use only.
+    def _start_lifetime(self, request):
+        self.__timeouts.add(request, request.lifetime, request.sent_time)
 
-        self.__cleanup_requests()
+    # Called by the deadline queue for requests which took too long (requests still waiting in the 
+    # scheduler queue have not been sent yet, so they cannot time out)
+    def __request_expired(self, request):
+        if self.statistics:
+            self.statistics.add_timeout(request.mapping)
+
+        request.terminate()
+        self.__remove_request(request)
 
     # Print info about the passed message
     def print_message(self, midi_message):  # pragma: no cover
@@ -426,6 +1040,316 @@ class Client: #(ClientRequestListener):
 #######################################################################################################################
 
 
+# Ordered pipeline of receive stages: Incoming messages are passed to the stages in order, until one of
+# them returns True (which means the message has been consumed). Stages can be restricted to a status 
+# byte and a SysEx manufacturer ID, so they are only called for matching messages. Messages are 
+# classified only once for all stages.
+class ClientReceivePipeline:
+
+    # Order of the built-in stages. Stages with the same order are called in order of adding.
+    ORDER_PROTOCOL = const(10)    # Protocol messages (like state sensing)
+    ORDER_REQUESTS = const(20)    # Dispatching to the waiting client requests
+    ORDER_UNPARSED = const(30)    # Messages not parsed by the requests
+    ORDER_DEBUG = const(100)      # Debug output for unparsed messages
+
+    def __init__(self):
+        self.__stages = []        # Stages, ordered: (order, status, manufacturer ID, handler)
+
+    # Adds a stage. The handler must take the message and return if it has been consumed. If status
+    # and/or manufacturer_id are passed, only messages with matching status byte (without channel) 
+    # and SysEx manufacturer ID are passed to the handler.
+    def add(self, handler, order, status = None, manufacturer_id = None):
+        stage = (order, status, manufacturer_id, handler)
+        stages = self.__stages
+
+        for i in range(len(stages)):
+            if stages[i][0] > order:
+                stages.insert(i, stage)
+                return
+            
+        stages.append(stage)
+
+    # Removes all stages with the passed handler
+    def remove(self, handler):
+        self.__stages = [s for s in self.__stages if s[3] != handler]
+
+    # Number of stages
+    def __len__(self):
+        return len(self.__stages)
+
+    # Passes the message through the stages. Returns if it has been consumed by one of them.
+    def receive(self, midi_message):
+        status = get_status(midi_message)
+        manufacturer_id = midi_message.manufacturer_id if status == 0xf0 else None
+
+        for stage in self.__stages:
+            if stage[1] != None and stage[1] != status:
+                continue
+
+            if stage[2] != None and stage[2] != manufacturer_id:
+                continue
+
+            if stage[3](midi_message):
+                return True
+            
+        return False
+
+
+#######################################################################################################################
+
+
+# Collects request statistics per mapping: Round trip times (min/avg/max and a histogram) and 
+# timeouts, plus the number of responses of known mappings which arrived while no request was waiting
+# for them (late or unsolicited answers, unrelated messages are not counted).
+class ClientStatistics:
+
+    # Upper bounds of the round trip time histogram buckets in milliseconds. An additional last 
+    # bucket holds all longer round trips.
+    HISTOGRAM_BOUNDS = (10, 20, 50, 100, 200, 500, 1000)
+
+    # Manufacturer ID for the SysEx dump (non-commercial / educational use)
+    SYSEX_MANUFACTURER_ID = b'\x7d'
+
+    # Statistics for one mapping
+    class Entry:
+        def __init__(self):
+            self.responses = 0
+            self.timeouts = 0
+            self.min = None
+            self.max = None
+            self.total = 0
+            self.histogram = [0] * (len(ClientStatistics.HISTOGRAM_BOUNDS) + 1)
+
+        # Average round trip time in milliseconds, or None if no responses have been received
+        @property
+        def average(self):
+            if not self.responses:
+                return None
+            
+            return self.total / self.responses
+        
+        def add(self, round_trip_millis):
+            self.responses += 1
+            self.total += round_trip_millis
+
+            if self.min == None or round_trip_millis < self.min:
+                self.min = round_trip_millis
+
+            if self.max == None or round_trip_millis > self.max:
+                self.max = round_trip_millis
+
+            bucket = 0
+            for bound in ClientStatistics.HISTOGRAM_BOUNDS:
+                if round_trip_millis <= bound:
+                    break
+                bucket += 1
+
+            self.histogram[bucket] += 1
+
+    ##########################################################################################################
+
+    def __init__(self):
+        self.__entries = {}     # Mapping -> Entry
+        self.unmatched_responses = 0
+
+    # Records the round trip time of a response for the mapping
+    def add_response(self, mapping, round_trip_millis):
+        self.__entry(mapping).add(round_trip_millis)
+
+    # Records a timeout for the mapping
+    def add_timeout(self, mapping):
+        self.__entry(mapping).timeouts += 1
+
+    # Returns the statistics entry for the mapping, or None if nothing has been recorded yet
+    def get(self, mapping):
+        return self.__entries.get(mapping, None)
+
+    # Returns all mappings with recorded statistics
+    @property
+    def mappings(self):
+        return list(self.__entries.keys())
+
+    # Clears all recorded statistics
+    def reset(self):
+        self.__entries = {}
+        self.unmatched_responses = 0
+
+    def __entry(self, mapping):
+        entry = self.__entries.get(mapping, None)
+        if not entry:
+            entry = ClientStatistics.Entry()
+            self.__entries[mapping] = entry
+
+        return entry
+    
+    # Returns the statistics as a list of compact SysEx messages. The first message contains the amount
+    # of unmatched responses, followed by one message per mapping:
+    #
+    # [name as ASCII] 0x00 [responses] [min] [avg] [max] [timeouts] [histogram buckets...]
+    #
+    # All values are 14 bit (MSB first, clamped to 16383). The header message has an empty name. 
+    # Times are in milliseconds, and 0 if no responses have been received.
+    def sysex_dump(self):
+        ret = [
+            SystemExclusive(
+                manufacturer_id = ClientStatistics.SYSEX_MANUFACTURER_ID,
+                data = bytes([0x00]) + self.__encode_values([self.unmatched_responses])
+            )
+        ]
+
+        for mapping, entry in self.__entries.items():
+            name = bytes([ord(c) & 0x7f for c in str(mapping.name) if c != chr(0)])
+
+            values = [
+                entry.responses,
+                entry.min if entry.min != None else 0,
+                int(entry.average) if entry.responses else 0,
+                entry.max if entry.max != None else 0,
+                entry.timeouts
+            ] + entry.histogram
+
+            ret.append(
+                SystemExclusive(
+                    manufacturer_id = ClientStatistics.SYSEX_MANUFACTURER_ID,
+                    data = name + bytes([0x00]) + self.__encode_values(values)
+                )
+            )
+
+        return ret
+    
+    def __encode_values(self, values):
+        ret = bytearray(len(values) * 2)
+        
+        for i in range(len(values)):
+            v = min(max(int(values[i]), 0), 16383)
+            ret[i * 2] = v // 128
+            ret[i * 2 + 1] = v % 128
+
+        return bytes(ret)
+    
+    # Prints the statistics to the console
+    def print(self):   # pragma: no cover
+        do_print(f"    Unmatched responses: { self.unmatched_responses }")
+
+        for mapping, entry in self.__entries.items():
+            avg = round(entry.average) if entry.responses else "-"
+            do_print(f"{ mapping.name }: { entry.responses } responses, rtt min/avg/max { entry.min }/{ avg }/{ entry.max } ms, { entry.timeouts } timeouts, histogram { repr(entry.histogram) }")
+
+
+##########################################################################################################
+
+
+# Schedules the sending of request messages: Limits the amount of requests waiting for an answer
+# and the amount of requests sent per tick, and applies the minimum request intervals and priorities
+# of the mappings. Requests which cannot be sent immediately are queued and sent in the next ticks.
+class ClientRequestScheduler:
+
+    def __init__(self, config):
+        # Max. number of sent requests waiting for an answer at the same time. 0 means no limit.
+        self.__max_in_flight = get_option(config, "maxRequestsInFlight", 0)
+
+        # Max. number of requests sent per tick. 0 means no limit.
+        self.__max_per_tick = get_option(config, "maxRequestsPerTick", 0)
+
+        # Queued requests, ordered by priority (highest first, FIFO for equal priorities)
+        self.__queue = []
+
+        # Sent requests waiting for their answer (only requests with limited life time)
+        self.__in_flight = []
+
+        # Timestamps of the last request sent, by mapping
+        self.__last_sent = {}
+
+        self.__sent_this_tick = 0
+
+    @property
+    def num_queued(self):
+        return len(self.__queue)
+    
+    @property
+    def num_in_flight(self):
+        return len(self.__in_flight)
+
+    # Sends the request immediately if possible, or queues it.
+    def enqueue(self, request):
+        if request in self.__queue:
+            return
+        
+        if not self.__queue and self.__can_send() and self.__interval_passed(request.mapping):
+            self.__send(request)
+            return
+        
+        # Insert according to priority
+        priority = request.mapping.priority
+        queue = self.__queue
+
+        for i in range(len(queue)):
+            if queue[i].mapping.priority < priority:
+                queue.insert(i, request)
+                return
+            
+        queue.append(request)
+
+    # Removes a request (called by the client when the request is finished)
+    def remove(self, request):
+        if request in self.__queue:
+            self.__queue.remove(request)
+
+        if request in self.__in_flight:
+            self.__in_flight.remove(request)
+
+    # Sends queued requests as far as the limits allow. Must be called once every tick.
+    def process(self):
+        self.__sent_this_tick = 0
+
+        queue = self.__queue
+        i = 0
+        while i < len(queue) and self.__can_send():
+            request = queue[i]
+
+            if not self.__interval_passed(request.mapping):
+                i += 1
+                continue
+
+            queue.pop(i)
+            self.__send(request)
+
+    def __send(self, request):
+        request.send()
+
+        self.__sent_this_tick += 1
+        
+        if request.mapping.min_interval:
+            self.__last_sent[request.mapping] = get_current_millis()
+
+        if request.lifetime:
+            self.__in_flight.append(request)
+
+    # Returns if the limits allow sending another request
+    def __can_send(self):
+        if self.__max_per_tick and self.__sent_this_tick >= self.__max_per_tick:
+            return False
+        
+        if self.__max_in_flight and len(self.__in_flight) >= self.__max_in_flight:
+            return False
+        
+        return True
+
+    # Returns if the minimum request interval of the mapping has passed
+    def __interval_passed(self, mapping):
+        if not mapping.min_interval:
+            return True
+        
+        last_sent = self.__last_sent.get(mapping, None)
+        if last_sent == None:
+            return True
+
+        return get_current_millis() - last_sent >= mapping.min_interval
+
+
+#######################################################################################################################
+
+
 # Model for a request for a value
 class ClientRequest(EventEmitter):
 
@@ -434,31 +1358,39 @@ class ClientRequest(EventEmitter):
         
         self.client = client
         self.mapping = mapping
+
+        # Keys for the response index of the client (see ClientParameterMapping.response_keys())
+        self.response_keys = mapping.response_keys()
         
-        self.lifetime = self.__init_lifetime(max_request_lifetime)
+        # Max. life time in milliseconds (only for mappings not belonging to a bidirectional protocol).
+        # The deadline is held by the client's deadline queue.
+        self.lifetime = max_request_lifetime if max_request_lifetime > 0 else 0
 
-    # Sets up the lifetime for mappings not belonging to a bidirectional protocol
-    def __init_lifetime(self, max_request_lifetime):
-        if not max_request_lifetime > 0:            
-            return None
-            
-        lifetime = PeriodCounter(max_request_lifetime)
-        lifetime.reset()
+        # Set when the request message has been sent
+        self.sent = False
 
-        return lifetime
+        # Time the request has been sent (milliseconds), until the first response has been received
+        self.sent_time = None
 
     # Sends the request
     def send(self):
         if not self.mapping.request:
             return
+        
+        self.sent = True
+        self.sent_time = get_current_millis()
+
+        # The life time starts when the request is actually sent
+        if self.lifetime:
+            self.client._start_lifetime(self)
 
         if isinstance(self.mapping.request, list):
             for m in self.mapping.request:
                 if not m:
                     continue
-                self.client.midi.send(m)    
+                self.client.send(m, MidiOutputQueue.PRIORITY_LOW)
         else:
-            self.client.midi.send(self.mapping.request)
+            self.client.send(self.mapping.request, MidiOutputQueue.PRIORITY_LOW)
 
     # Returns if the request is finished
     @property
@@ -529,6 +1461,14 @@ class BidirectionalClient(Client, Updateable):
         self.protocol.debug = get_option(config, "debugBidirectionalProtocol")
         self.protocol.init(midi, self)
 
+        # Protocols can register their own (pre-filtered) receive stages. If not, the protocol gets all 
+        # messages not parsed by the requests.
+        register = getattr(protocol, "register_receive_handlers", None)
+        if register:
+            register(self.receive_pipeline)
+        else:
+            self.receive_pipeline.add(protocol.receive, ClientReceivePipeline.ORDER_UNPARSED)
+
     # Register the mapping and listener in advance (only plays a role for bidirectional parameters)
     def register(self, mapping, listener = None):
         if self.protocol.is_bidirectional(mapping):
@@ -537,32 +1477,9 @@ class BidirectionalClient(Client, Updateable):
     
         Client.register(self, mapping, listener)
         
-    # Receive messages (also passes messages to the protocol)
-    #@RuntimeStatistics.measure
-    def receive(self, midi_message):
-        # Dirty hack to disable the debugging of unparsed messages in the Client implementation
-        tmp = self.debug_unparsed_messages
-        self.debug_unparsed_messages = False
-        parsed_by_client =  Client.receive(self, midi_message)
-        self.debug_unparsed_messages = tmp
-
-        if parsed_by_client:
-            return False
-
-        if not midi_message:
-            return False
-
-        parsed = self.protocol.receive(midi_message)
-
-        # Debug unparsed messages
-        if not parsed and self.debug_unparsed_messages:           # pragma: no cover
-            self.print_message(midi_message)
-
-        return parsed
-
     # In case of bidirectional parammeters, "simulate" a parameter change directly after the MIDI message
-    def set(self, mapping, value):
-        Client.set(self, mapping, value)
+    def set(self, mapping, value, coalesce = False):
+        Client.set(self, mapping, value, coalesce)
 
         # Notify listeners of the mapping with the set value (we do not use echoing, so the actions
         # will not reflect the state change if we just do nothing)
@@ -625,10 +1542,15 @@ class BidirectionalClient(Client, Updateable):
 #    def update(self):
 #        pass
 #   
-#    # Receive midi messages (for example for state sensing)
+#    # Receive midi messages (for example for state sensing). Only called for messages not parsed by the
+#    # client requests, and only if the protocol does not implement register_receive_handlers().
 #    def receive(self, midi_message):
 #        pass
 #
+#    # Optional: Register receive stages (see ClientReceivePipeline) to the passed pipeline.
+#    def register_receive_handlers(self, pipeline):
+#        pass
+#
 #    # Must return a color representation for the current state
 #    def get_color(self):
 #        return (0, 0, 0)
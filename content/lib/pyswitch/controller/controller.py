@@ -1,8 +1,8 @@
 from gc import collect, mem_free
 
 from .inputs import SwitchController, ContinuousController
-from .client import Client, BidirectionalClient
-from ..misc import Updater, PeriodCounter, get_option, do_print, format_size, fill_up_to
+from .client import Client, BidirectionalClient, ClientParameterMapping
+from ..misc import Updater, UpdateScheduler, AdaptiveDrainLimit, PeriodCounter, get_option, do_print, format_size, fill_up_to
 from ..stats import Memory #, RuntimeStatistics
 
 
@@ -40,6 +40,13 @@ class Controller(Updater): #ClientRequestListener
         # MIDI handler
         self.__midi = midi
 
+        # Batch receive function of the MIDI handler, if supported (wrappers like the MidiBridgeWrapper only 
+        # provide receive())
+        self.__receive_batch = getattr(midi, "receive_batch", None)
+
+        # Flush function of the MIDI handler for buffered outputs, if supported
+        self.__midi_flush = getattr(midi, "flush", None)
+
         # User interface
         self.ui = ui        
 
@@ -50,6 +57,24 @@ class Controller(Updater): #ClientRequestListener
         # Max. number of MIDI messages being parsed before the next switch state evaluation
         self.__max_consecutive_midi_msgs = get_option(config, "maxConsecutiveMidiMessages", 10)   
 
+        # Adaptive mode: The amount is adjusted to drain bursts quickly while keeping the time of one 
+        # receive pass below a bound (maxConsecutiveMidiMessages is the initial value then)
+        self.__drain_limit = None
+        if get_option(config, "adaptiveMidiDrain", False):
+            max_limit = get_option(config, "adaptiveMidiDrainMax", 100)
+
+            # Batches cannot be larger than the MIDI handler's buffer (one more message than the limit is requested)
+            batch_size = getattr(midi, "batch_size", None)
+            if self.__receive_batch and batch_size:
+                max_limit = min(max_limit, batch_size - 1)
+
+            self.__drain_limit = AdaptiveDrainLimit(
+                initial = self.__max_consecutive_midi_msgs,
+                max_pass_millis = get_option(config, "adaptiveMidiDrainMaxPassMillis", 10),
+                min_limit = get_option(config, "adaptiveMidiDrainMin", 1),
+                max_limit = max_limit
+            )
+
         # Print debug info        
         self.__debug_stats = get_option(config, "debugStats", False)        
 
@@ -69,6 +94,18 @@ class Controller(Updater): #ClientRequestListener
         # Clear MIDI buffers on startup
         self.__clear_buffer = get_option(config, "clearBuffers", True)
 
+        # MIDI clock tracker (see MidiClockTracker), if enabled
+        self.clock = None
+        if get_option(config, "midiClock", False) and hasattr(midi, "set_clock_tracker"):
+            from .midi import MidiClockTracker
+            
+            self.clock = MidiClockTracker()
+            midi.set_clock_tracker(self.clock)
+
+        # Input filter: Only messages needed by the mappings (plus the allowed ones) are parsed
+        self.__input_filter = get_option(config, "midiInputFilter", False)
+        self.__input_filter_allow = get_option(config, "midiInputAllow", [])
+
         # Global shared data (some actions/callbacks use this)
         self.shared = {}
 
@@ -93,6 +130,14 @@ class Controller(Updater): #ClientRequestListener
         if not self.period:
             self.period = PeriodCounter(update_interval)        
 
+        # Scheduler for the updates: If a time budget is set, the updates of one period are spread over multiple ticks.
+        # Updateables with individual update intervals are updated when due.
+        self.update_scheduler = UpdateScheduler(
+            self.updateables, 
+            get_option(config, "updateBudgetMillis", 0), 
+            self.timed_updateables
+        )
+
         # Client access. When no protocol is passed, every value will be requested periodically. If a protocol
         # is passed, bidirectional communication is used according to the protocol.
         if protocol:
@@ -132,6 +177,12 @@ class Controller(Updater): #ClientRequestListener
             do_print(f"LOW MEMORY: { format_size(mem_free()) }")
             self.low_memory_warning = True
 
+        # Set up the input filter. Mappings registered later with new response statuses update it 
+        # (see __response_status_added()).
+        if self.__input_filter and hasattr(self.__midi, "set_input_filter"):
+            self.__update_input_filter()
+            self.client.set_response_status_callback(self.__response_status_added)
+
         # Consume all MIDI messages which might be still in some buffers, 
         # and start when the queue is empty.
         if self.__clear_buffer:
@@ -139,22 +190,58 @@ class Controller(Updater): #ClientRequestListener
                 if not self.__midi.receive():
                     break
 
+    # Sets the input filter of the MIDI handler to the statuses of all mappings (plus the allowed ones)
+    def __update_input_filter(self):
+        self.__input_filter_statuses = ClientParameterMapping.response_statuses() + self.__input_filter_allow
+        self.__midi.set_input_filter(self.__input_filter_statuses)
+
+    # Called by the client with the response statuses of new requests
+    def __response_status_added(self, status):
+        if status == None or status in self.__input_filter_statuses:
+            return
+        
+        self.__update_input_filter()
+
     # Single tick in the processing loop. Must return True to keep the loop alive. Call this in an endless loop.
     def tick(self):
-        # Update all Updateables in periodic intervals, less frequently than every tick.        
+        # Update all Updateables
+        self._update()
+
+        # Send queued client requests
+        self.client.send_requests()
+
+        # Receive all available MIDI messages
+        self._receive()
+
+        # Send coalesced SET messages and buffered MIDI output
+        self._flush()
+
+        return True
+
+    # Updates all Updateables in periodic intervals, less frequently than every tick. The updates
+    # of one round can be spread over multiple ticks (see UpdateScheduler).
+    def _update(self):
         if self.period.exceeded:
-            for u in self.updateables:
-                # Receive MIDI messages in between updates, too
-                self.__receive_midi_messages()
+            self.update_scheduler.start()
 
-                u.update()
+        if self.update_scheduler.running:
+            # Receive MIDI messages in between updates, too
+            if self.update_scheduler.process(self.__receive_midi_messages):
+                Memory.watch("Controller: update", only_if_changed = True)
 
-            Memory.watch("Controller: update", only_if_changed = True)
+        # Updateables with individual update intervals
+        self.update_scheduler.process_due()
 
-        # Receive all available MIDI messages
+    # Receives the available MIDI messages and checks for switch state changes
+    def _receive(self):
         self.__receive_midi_messages()
 
-        return True
+    # Sends coalesced SET messages and buffered MIDI output
+    def _flush(self):
+        self.client.flush()
+
+        if self.__midi_flush:
+            self.__midi_flush()
 
     # Resets all actions (which refreshes their buffer memories, triggering re-rendering of LEDs and displays)
     def reset_actions(self):
@@ -164,7 +251,17 @@ class Controller(Updater): #ClientRequestListener
 
     # Receive MIDI messages, and in between check for switch state changes
     def __receive_midi_messages(self):
+        if self.__receive_batch:
+            self.__receive_midi_batch()
+            return
+        
         cnt = 0
+        drain_limit = self.__drain_limit
+        max_msgs = self.__max_consecutive_midi_msgs
+
+        if drain_limit:
+            drain_limit.start()
+            max_msgs = drain_limit.limit
         
         while True:            
             if self.__debug_stats:
@@ -183,13 +280,57 @@ class Controller(Updater): #ClientRequestListener
 
             # Break after a certain amount of messages to keep the device responsive
             cnt = cnt + 1
-            if not midimsg or cnt > self.__max_consecutive_midi_msgs:
+            if not midimsg or cnt > max_msgs:
                 break  
 
+        if drain_limit:
+            drain_limit.received(cnt if midimsg else cnt - 1, midimsg != None)
+
         #self._measurement_midi_jitter.start()
 
+    # Receive MIDI messages in batches (for MIDI handlers supporting this, see MidiController.receive_batch()):
+    # All available messages are drained from the sources in one pass, and switch states are only checked 
+    # once per batch.
+    def __receive_midi_batch(self):
+        if self.__debug_stats:
+            self.__measurement_process_jitter.finish()
+        
+        # Detect switch state changes
+        for input in self.inputs:
+            input.process()
+        
+        if self.__debug_stats:
+            self.__measurement_process_jitter.start()
+
+        drain_limit = self.__drain_limit
+        if drain_limit:
+            drain_limit.start()
+
+        # Same amount of messages as the non-batched loop processes at most
+        max_msgs = (drain_limit.limit if drain_limit else self.__max_consecutive_midi_msgs) + 1
+        buffer = self.__receive_batch(max_msgs)
+        num_msgs = len(buffer)
+
+        if not buffer:
+            self.client.receive(None)
+        
+        while buffer:
+            self.client.receive(buffer.pop())
+
+        if drain_limit:
+            drain_limit.received(num_msgs, num_msgs >= max_msgs)
+
     # Callback called when the measurement wants to show something
     def measurement_updated(self, measurement):
         collect()
         do_print(f"{ fill_up_to(str(measurement.name), 30, '.') }: Max { repr(measurement.value) }ms, Avg { repr(measurement.average) }ms, Calls: { repr(measurement.calls) }, Free: { format_size(mem_free()) }")
 
+        scheduler = self.update_scheduler
+        if scheduler.budget_millis:
+            do_print(f"{ fill_up_to('Update budget', 30, '.') }: Ticks per round: { repr(scheduler.ticks) }, Overruns: { repr(scheduler.overruns) }, Max overrun: { repr(scheduler.max_overrun_millis) }ms")
+
+        drain_limit = self.__drain_limit
+        if drain_limit:
+            do_print(f"{ fill_up_to('MIDI drain limit', 30, '.') }: Current { repr(drain_limit.limit) } (Min { repr(drain_limit.min_used) }, Max { repr(drain_limit.max_used) }), Max depth: { repr(drain_limit.max_depth) }, Backlogs: { repr(drain_limit.backlogs) }, Max pass time: { repr(drain_limit.max_pass) }ms")
+            drain_limit.reset_stats()
+
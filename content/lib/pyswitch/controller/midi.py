@@ -17,6 +17,13 @@ from adafruit_midi.system_exclusive import SystemExclusive
 #from adafruit_midi.start import Start
 #from adafruit_midi.stop import Stop
 
+from ..misc import get_current_millis
+
+# Max. time a raw thru source can hold back the others while passing a long SysEx message without sending
+# more data (see MidiController.__forward_raw()), so a source stopping in the middle of a SysEx does not 
+# block the others forever
+_RAW_THRU_LOCK_TIMEOUT_MILLIS = 500
+
 
 # MIDI Clock custom message type
 #class MidiClockMessage(MIDIMessage):
@@ -37,7 +44,7 @@ class MidiRouting:
     # Used as source/target for routings to/from the application itself
     APPLICATION = 1
 
-    def __init__(self, source, target):
+    def __init__(self, source, target, allow = None):
         # Source MIDI device (can be either a AdafruitXXXMidiDevice or 
         # MidiController.PYSWITCH for the application itself)
         self.source = source    
@@ -45,7 +52,549 @@ class MidiRouting:
         # Target MIDI device (can be either a AdafruitXXXMidiDevice or 
         # MidiController.PYSWITCH for the application itself)
         self.target = target    
+
+        # Optional list of status bytes needed by the routing if input filtering is active (see 
+        # MidiController.set_input_filter()). If None, all messages are routed. Has no effect for 
+        # routings targeting APPLICATION.
+        self.allow = allow
+        
+
+##################################################################################################
+
+
+# Fixed size ring buffer for MIDI messages (FIFO). Does not allocate memory after creation.
+class MidiRingBuffer:
+    def __init__(self, size):
+        self.__items = [None] * size
+        self.__size = size
+        self.__head = 0     # Index of the next message to pop
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    @property
+    def size(self):
+        return self.__size
+
+    @property
+    def full(self):
+        return self.__count >= self.__size
+
+    # Adds a message at the end. Returns False if the buffer is full.
+    def push(self, midi_message):
+        if self.__count >= self.__size:
+            return False
+        
+        self.__items[(self.__head + self.__count) % self.__size] = midi_message
+        self.__count += 1
+        return True
+
+    # Removes and returns the oldest message, or None if empty
+    def pop(self):
+        if not self.__count:
+            return None
+        
+        msg = self.__items[self.__head]
+        self.__items[self.__head] = None
+        self.__head = (self.__head + 1) % self.__size
+        self.__count -= 1
+        return msg
+    
+    def clear(self):
+        while self.__count:
+            self.pop()
+
+
+##################################################################################################
+
+
+# Splits a raw MIDI byte stream into complete messages without parsing them into objects, used for 
+# raw thru routings. Running status is resolved (every message gets its status byte), so complete messages
+# can be merged with other streams. Realtime messages (clock etc.) are passed immediately.
+#
+# SysEx messages longer than the buffer are passed in chunks as they come in. Until the end of such a
+# message (see in_sysex), other streams must not be merged in (MidiController holds back the other raw 
+# thru sources sharing a target meanwhile).
+class RawMidiFramer:
+
+    # max_message_length is the buffer size for incomplete messages. Longer SysEx messages are 
+    # passed in chunks.
+    def __init__(self, max_message_length = 256):
+        self.__buffer = bytearray(max_message_length)
+        self.__length = 0            # Length of the incomplete message in the buffer
+        self.__expected = 0          # Expected length of the current message (0 for SysEx)
+        self.__running_status = 0
+        self.__sysex = False
+        self.__sysex_open = False    # Parts of the current SysEx message have already been passed
+
+    # True if a SysEx message has been passed partially, and its end is still pending
+    @property
+    def in_sysex(self):
+        return self.__sysex_open
+
+    # Returns a bytearray containing all complete messages from the passed data, or None if there are none.
+    def frame(self, data):
+        out = None
+        buffer = self.__buffer
+
+        for b in data:
+            # Realtime messages can appear anywhere, even inside other messages
+            if b >= 0xf8:
+                if out == None:
+                    out = bytearray()
+                out.append(b)
+                continue
+
+            if b >= 0x80:
+                if b == 0xf7:
+                    # End of SysEx
+                    if self.__sysex:
+                        buffer[self.__length] = b
+                        self.__length += 1
+                        out = self.__flush(out)
+                        self.__sysex = False
+                        self.__sysex_open = False
+                    continue
+
+                # New status byte: Incomplete messages are dropped (this also ends a partially passed SysEx)
+                self.__sysex = (b == 0xf0)
+                self.__sysex_open = False
+                self.__running_status = b if b < 0xf0 else 0
+                self.__expected = _raw_message_length(b)
+
+                buffer[0] = b
+                self.__length = 1
+
+                if self.__expected == 1:
+                    out = self.__flush(out)
+                continue
+
+            # Data byte
+            if self.__sysex:
+                # Keep space for the end byte, pass longer SysEx in chunks
+                if self.__length >= len(buffer) - 1:
+                    out = self.__flush(out)
+                    self.__sysex_open = True
+
+                buffer[self.__length] = b
+                self.__length += 1
+                continue
+
+            if self.__length == 0:
+                # Running status (data bytes without status byte are dropped)
+                if not self.__running_status:
+                    continue
+
+                buffer[0] = self.__running_status
+                self.__expected = _raw_message_length(self.__running_status)
+                self.__length = 1
+
+            buffer[self.__length] = b
+            self.__length += 1
+
+            if self.__length >= self.__expected:
+                out = self.__flush(out)
+
+        return out
+
+    # Appends the buffered message to out (created if None), and returns out
+    def __flush(self, out):
+        if out == None:
+            out = bytearray()
+
+        out.extend(memoryview(self.__buffer)[:self.__length])
+        self.__length = 0
+        return out
+
+
+# Returns the length of MIDI messages (including the status byte) by status. SysEx returns 0.
+def _raw_message_length(status):
+    if status < 0xc0 or (status >= 0xe0 and status < 0xf0) or status == 0xf2:
+        return 3
+    
+    if status < 0xe0 or status == 0xf1 or status == 0xf3:
+        return 2
+    
+    if status == 0xf0:
+        return 0
+    
+    return 1
+
+
+##################################################################################################
+
+
+# Filters a raw MIDI byte stream by status bytes, so unneeded messages are dropped before they are 
+# parsed into objects. Data bytes are kept or dropped along with their status (running status is 
+# supported), realtime messages do not affect this.
+class MidiStatusFilter:
+
+    # statuses: List of allowed status bytes. For channel messages the channel is ignored, so 
+    # for example 0xb0 allows Control Change messages on all channels.
+    def __init__(self, statuses):
+        self.__allowed = bytearray(256)
+
+        for status in statuses:
+            if status < 0xf0:
+                for i in range(16):
+                    self.__allowed[(status & 0xf0) + i] = 1
+            else:
+                self.__allowed[status] = 1
+
+        self.__passing = True    # Status of the current message is allowed
+        self.dropped = 0         # Amount of dropped messages
+
+    # Returns if the status is allowed
+    def allows(self, status):
+        return self.__allowed[status] == 1
+
+    # Returns the passed data without the messages not allowed. If nothing has to be dropped, 
+    # the data is returned as it is.
+    def filter(self, data):
+        allowed = self.__allowed
+        passing = self.__passing
+        out = None
+
+        for i in range(len(data)):
+            b = data[i]
+
+            if b >= 0xf8:
+                # Realtime message
+                keep = allowed[b] == 1
+
+            elif b == 0xf7:
+                # End of SysEx belongs to the SysEx message
+                keep = passing
+
+            elif b >= 0x80:
+                passing = allowed[b] == 1
+                keep = passing
+
+            else:
+                keep = passing
+
+            if keep:
+                if out != None:
+                    out.append(b)
+            else:
+                if b >= 0x80 and b != 0xf7:
+                    self.dropped += 1
+
+                if out == None:
+                    out = bytearray(data[:i])
+
+        self.__passing = passing
+
+        return data if out == None else out
+
+
+##################################################################################################
+
+
+# Output queue for slow MIDI ports (like DIN MIDI at 31250 baud): Collects the outgoing messages of a tick,
+# which are written to the port in one go by flush(). If enabled, consecutive channel messages with the same 
+# status use running status (only for serial ports: USB MIDI packets always need the status byte). 
+# Optionally, the bytes written per flush can be limited, so large bursts are spread over multiple ticks 
+# instead of blocking the main loop.
+#
+# If the bytes per flush are limited, messages are held per priority class until flushed, and higher 
+# priorities are sent first. Lower priority messages are deferred to later ticks when the budget is
+# exhausted, so for example protocol keep-alive messages are never delayed by a burst of requests.
+class MidiOutputQueue:
+
+    # Priority classes
+    PRIORITY_HIGH = 0      # Protocol keep-alive messages and user triggered SET messages
+    PRIORITY_NORMAL = 1    # All other messages (thru, custom messages etc.)
+    PRIORITY_LOW = 2       # Background traffic (parameter requests etc.)
+
+    # port:               Output port (must have a write(buffer, length) method)
+    # max_bytes_per_tick: Maximum bytes written per flush (0 for no limit)
+    # baudrate:           Baud rate of the port (only used for the time statistics)
+    # running_status:     Omit repeated status bytes of channel messages
+    def __init__(self, port, max_bytes_per_tick = 0, baudrate = 31250, running_status = False):
+        self.__port = port
+        self.__queue = bytearray()
+        self.__use_running_status = running_status
+        self.__running_status = 0
+
+        self.max_bytes_per_tick = max_bytes_per_tick
+
+        # Messages waiting to be queued, per priority class: Lists of (data, raw) tuples (only used with limited bytes per tick)
+        self.__pending = [[], [], []]
+
+        # Wire time per byte (10 bits including start and stop bit) in microseconds
+        self.__micros_per_byte = int(10 * 1000000 / baudrate)
+
+        # Statistics
+        self.bytes_sent = 0           # Bytes written by the last flush
+        self.time_used_micros = 0     # Estimated wire time of the bytes written by the last flush
+        self.total_bytes_sent = 0     # Bytes written overall
+        self.deferred = 0             # Messages deferred to later ticks by the last flush
+
+    # Amount of bytes waiting to be sent (without running status for messages not queued yet)
+    def __len__(self):
+        ret = len(self.__queue)
+        for pending in self.__pending:
+            for entry in pending:
+                ret += len(entry[0])
+        return ret
+
+    # Adds a serialized message. If running status is enabled, channel messages omit the status byte if it 
+    # equals the last one sent.
+    # Pending messages are copied, as the passed buffer may be reused by the sender (see PreallocatedSystemExclusive).
+    def add(self, data, priority = PRIORITY_NORMAL):
+        if self.max_bytes_per_tick:
+            self.__pending[priority].append((bytes(data), False))
+        else:
+            self.__add(data)
+
+    # Adds raw data (must only contain complete messages). Running status is reset.
+    def add_raw(self, data, priority = PRIORITY_NORMAL):
+        if self.max_bytes_per_tick:
+            self.__pending[priority].append((bytes(data), True))
+        else:
+            self.__add_raw(data)
+
+    def __add(self, data):
+        if not self.__use_running_status:
+            self.__queue.extend(data)
+            return
+        
+        status = data[0]
+
+        if status >= 0xf8:
+            # Realtime messages do not affect running status
+            self.__queue.extend(data)
+
+        elif status >= 0xf0:
+            # System common messages cancel running status
+            self.__running_status = 0
+            self.__queue.extend(data)
+
+        elif status == self.__running_status:
+            self.__queue.extend(memoryview(data)[1:])
+
+        else:
+            self.__running_status = status
+            self.__queue.extend(data)
+
+    def __add_raw(self, data):
+        self.__running_status = 0
+        self.__queue.extend(data)
+
+    # Moves pending messages to the queue in order of priority, as long as the budget is not exhausted. 
+    # Messages are never split here, so a message exceeding the budget is completed on the next flush
+    # before anything else is sent.
+    def __queue_pending(self, budget):
+        queue = self.__queue
+        deferred = 0
+
+        for pending in self.__pending:
+            i = 0
+            num = len(pending)
+            
+            while i < num and len(queue) < budget:
+                data, raw = pending[i]
+                if raw:
+                    self.__add_raw(data)
+                else:
+                    self.__add(data)
+                i += 1
+
+            if i:
+                del pending[:i]
+
+            deferred += num - i
+
+        self.deferred = deferred
+
+    # Writes the queued data (up to max_bytes_per_tick) to the port. Returns the amount of bytes written.
+    def flush(self):
+        if self.max_bytes_per_tick:
+            self.__queue_pending(self.max_bytes_per_tick)
+
+        num = len(self.__queue)
+        if self.max_bytes_per_tick and num > self.max_bytes_per_tick:
+            num = self.max_bytes_per_tick
+
+        if num == len(self.__queue):
+            data = self.__queue
+            self.__queue = bytearray()
+        else:
+            data = self.__queue[:num]
+            self.__queue = self.__queue[num:]
+
+        if num:
+            self.__port.write(data, num)
+
+        self.bytes_sent = num
+        self.time_used_micros = num * self.__micros_per_byte
+        self.total_bytes_sent += num
+
+        return num
+
+
+##################################################################################################
+
+
+# Tracks MIDI clock on the raw input stream (see MidiController.set_clock_tracker()): Counts clock, start, 
+# continue and stop messages without parsing them, and estimates the tempo. Beat intervals differing
+# from the current tempo by more than max_deviation are treated as jitter and ignored, unless they
+# occur repeatedly (tempo change).
+class MidiClockTracker:
+
+    CLOCKS_PER_BEAT = 24
+
+    # timeout_millis: Clock is regarded as inactive when no clock message came in for this time
+    # smoothing:      Weight of new beat intervals for the tempo average, in range ]0..1]
+    # max_deviation:  Relative deviation of a beat interval from the current tempo still accepted as valid
+    def __init__(self, timeout_millis = 2000, smoothing = 0.3, max_deviation = 0.2):
+        self.__timeout_millis = timeout_millis
+        self.__smoothing = smoothing
+        self.__max_deviation = max_deviation
+
+        self.running = False          # Set by start/continue, reset by stop messages
+        self.clocks = 0               # Amount of clock messages received overall
+        self.beats = 0                # Amount of beats started
+
+        self.__position = -1          # Clock position in the current beat (0 is the beat start)
+        self.__beat_time = None       # Start time of the current beat (milliseconds)
+        self.__last_clock_time = None
+        self.__interval = None        # Averaged beat interval in milliseconds
+        self.__outliers = 0           # Number of consecutive outliers
+
+    # Scans the passed raw MIDI data for realtime messages. now is the current time in 
+    # milliseconds (optional, determined on the first clock message if not passed).
+    def feed(self, data, now = None):
+        for b in data:
+            if b < 0xf8:
+                continue
+
+            if b == 0xf8:
+                if now == None:
+                    now = get_current_millis()
+
+                self.__clock(now)
+
+            elif b == 0xfa:
+                # Start: The next clock is the first beat
+                self.running = True
+                self.__position = -1
+                self.__beat_time = None
+
+            elif b == 0xfb:
+                self.running = True
+
+            elif b == 0xfc:
+                self.running = False
+
+    # Returns the passed raw MIDI data without the messages handled by the tracker (clock, start, continue
+    # and stop), so no message objects are created for them by the parser. If none are contained, the 
+    # data is returned as it is.
+    def strip(self, data):
+        out = None
+
+        for i in range(len(data)):
+            b = data[i]
+
+            if b == 0xf8 or (b >= 0xfa and b <= 0xfc):
+                if out == None:
+                    out = bytearray(data[:i])
+
+            elif out != None:
+                out.append(b)
+
+        return data if out == None else out
+
+    # Estimated tempo in beats per minute, or None if not known (yet)
+    @property
+    def bpm(self):
+        if not self.__interval:
+            return None
+        
+        return 60000 / self.__interval
+    
+    # Position in the current beat in range [0..1[
+    @property
+    def beat_phase(self):
+        if self.__position < 0:
+            return 0
+        
+        return self.__position / self.CLOCKS_PER_BEAT
+    
+    # True in the first half of every beat (for blinking LEDs)
+    @property
+    def beat_on(self):
+        return self.__position >= 0 and self.__position < self.CLOCKS_PER_BEAT / 2
+
+    # Returns if clock messages are coming in
+    @property
+    def active(self):
+        if self.__last_clock_time == None:
+            return False
+        
+        return get_current_millis() - self.__last_clock_time <= self.__timeout_millis
+
+    def __clock(self, now):
+        self.clocks += 1
+        self.__last_clock_time = now
+
+        self.__position += 1
+        if self.__position >= self.CLOCKS_PER_BEAT:
+            self.__position = 0
+
+        if self.__position != 0:
+            return
+        
+        # Beat start
+        self.beats += 1
+
+        if self.__beat_time != None:
+            self.__add_interval(now - self.__beat_time)
+
+        self.__beat_time = now
+
+    def __add_interval(self, interval):
+        if interval <= 0:
+            return
         
+        if not self.__interval:
+            self.__interval = interval
+            return
+
+        if abs(interval - self.__interval) > self.__interval * self.__max_deviation:
+            # Ignore single outliers, but follow tempo changes
+            self.__outliers += 1
+            if self.__outliers < 3:
+                return
+            
+            self.__outliers = 0
+            self.__interval = interval
+            return
+
+        self.__outliers = 0
+        self.__interval += (interval - self.__interval) * self.__smoothing
+
+
+##################################################################################################
+
+
+# Input source of the application, holding the scheduling state and statistics of the source 
+# (see MidiController.sources)
+class MidiSource:
+    def __init__(self, source):
+        self.source = source
+
+        self.received = 0         # Total amount of messages received from the source
+        self.last_batch = 0       # Amount of messages received in the last batch (lower bound of the queue depth)
+        self.max_batch = 0        # Maximum of last_batch
+        self.backlogged = 0       # Amount of batches after which the source still had messages waiting
+
+        self.drained = False      # Source has no more messages in the current batch
+
+        self.thru_targets = None  # Targets of parsed routings to other devices (see MidiController.receive_batch())
+
 
 ##################################################################################################
 
@@ -55,63 +604,333 @@ class MidiRouting:
 # the application manually!
 class MidiController:
 
-    # routings must be a list of MidiRouting instances
-    def __init__(self, routings):
+    # routings must be a list of MidiRouting instances. buffer_size is the maximum amount of 
+    # messages which can be received in one batch (see receive_batch()).
+    def __init__(self, routings, buffer_size = 32):
         self.__routings_from_appl = [x for x in routings if x.source == MidiRouting.APPLICATION]
+
+        # Targets of the application messages: List of (target, send_prioritized) tuples. The second entry is the 
+        # prioritized send function of the target, or None if the target does not support priorities.
+        self.__targets_from_appl = [(r.target, getattr(r.target, "send_prioritized", None)) for r in self.__routings_from_appl]
         self.__routings_to_appl = [x for x in routings if x.target == MidiRouting.APPLICATION]
-        self.__routings_external = [x for x in routings if x.source != MidiRouting.APPLICATION and x.target != MidiRouting.APPLICATION]
+
+        # Input sources of the application, which are read in a round robin fashion so no source
+        # can block the others
+        self.__sources = []
+        for r in self.__routings_to_appl:
+            if not [s for s in self.__sources if s.source == r.source]:
+                self.__sources.append(MidiSource(r.source))
+
+        self.__next_source = 0
+
+        # Routing table for all routings without APPLICATION involved: List of (source, [targets], framer) tuples, 
+        # one per source, in order of the routings. framer is a RawMidiFramer if the source uses raw thru 
+        # (see __init_raw_thru()), or None.
+        self.__routings_external = []
+        
+        for r in routings:
+            if r.source == MidiRouting.APPLICATION or r.target == MidiRouting.APPLICATION:
+                continue
+
+            entry = None
+            for e in self.__routings_external:
+                if e[0] == r.source:
+                    entry = e
+                    break
+            
+            if not entry:
+                entry = (r.source, [], None)
+                self.__routings_external.append(entry)
+
+            entry[1].append(r.target)
+
+        self.__init_raw_thru()
+
+        # Batches: Messages of application sources are forwarded to the targets of their parsed routings while 
+        # being drained. All other parsed routings are drained separately (see receive_batch()).
+        self.__external_only = []
+        for source, targets, framer in self.__routings_external:
+            if framer:
+                continue
+
+            app_source = None
+            for s in self.__sources:
+                if s.source == source:
+                    app_source = s
+                    break
+
+            if app_source:
+                app_source.thru_targets = targets
+            else:
+                self.__external_only.append((source, targets))
+
+        # Messages received for the application in batches (see receive_batch())
+        self.__buffer = MidiRingBuffer(buffer_size)
+
+        # Routings between external devices (for input filtering)
+        self.__external_routings = [x for x in routings if x.source != MidiRouting.APPLICATION and x.target != MidiRouting.APPLICATION]
+
+        # Targets with buffered output (see flush())
+        self.__flush_targets = []
+        for r in routings:
+            if r.target != MidiRouting.APPLICATION and hasattr(r.target, "flush") and not r.target in self.__flush_targets:
+                self.__flush_targets.append(r.target)
+
+    # Raw thru: Sources which support it (raw_thru attribute set) forward raw bytes to their targets
+    # without parsing, if all targets support raw sending. The source is informed if the application 
+    # also listens to it, so the raw data is parsed for the application, too.
+    def __init_raw_thru(self):
+        appl_sources = [r.source for r in self.__routings_to_appl]
+        self.__raw_locks = {}
+        self.__raw_lock_times = {}
+
+        for i in range(len(self.__routings_external)):
+            source, targets, _ = self.__routings_external[i]
+
+            if not getattr(source, "raw_thru", False):
+                continue
+
+            if [t for t in targets if not hasattr(t, "send_raw")]:
+                continue
+
+            source.enable_raw_thru(parse = source in appl_sources)
+
+            self.__routings_external[i] = (source, targets, RawMidiFramer())
+
+            # Merge locks: Framer currently passing a long SysEx to the target, and the time of its last data (see __forward_raw())
+            for t in targets:
+                self.__raw_locks[t] = None
+                self.__raw_lock_times[t] = 0
+
+    # Sets up input filters for all sources supporting it (set_input_filter() method): The application 
+    # receives only messages with the passed status bytes, routings to other devices the messages in their 
+    # allow lists. Sources with routings to other devices without allow list are not filtered. Raw thru is
+    # not affected by filters.
+    def set_input_filter(self, statuses):
+        sources = [s.source for s in self.__sources]
+        for source, _, _ in self.__routings_external:
+            if not source in sources:
+                sources.append(source)
+
+        for source in sources:
+            if not hasattr(source, "set_input_filter"):
+                continue
+
+            allowed = self.__get_allowed_statuses(source, statuses)
+            
+            source.set_input_filter(MidiStatusFilter(allowed) if allowed != None else None)
+
+    # Returns the list of status bytes needed from a source, or None if all are needed
+    def __get_allowed_statuses(self, source, statuses):
+        ret = list(statuses) if [s for s in self.__sources if s.source == source] else []
+
+        for source_e, _, framer in self.__routings_external:
+            if source_e != source or framer:
+                continue
+                
+            for r in self.__external_routings:
+                if r.source != source:
+                    continue
+
+                if r.allow == None:
+                    return None
+                
+                ret = ret + r.allow
+
+        return ret
+
+    # Attaches a MidiClockTracker to all input sources of the application supporting it 
+    # (set_clock_tracker() method). The tracker is fed with the raw data of the sources.
+    def set_clock_tracker(self, tracker):
+        for s in self.__sources:
+            if hasattr(s.source, "set_clock_tracker"):
+                s.source.set_clock_tracker(tracker)
+
+    # Sends all messages buffered by the targets (see MidiOutputQueue). Must be called once per tick.
+    def flush(self):
+        for target in self.__flush_targets:
+            target.flush()
+
+    # Input sources of the application (MidiSource instances holding statistics per source)
+    @property
+    def sources(self):
+        return self.__sources
 
     def send(self, midi_message):
         # Send to all routings which have APPLICATION as source
         for r in self.__routings_from_appl:    
             r.target.send(midi_message)
 
+    # Sends a message with a priority class (see MidiOutputQueue). Targets which do not support 
+    # priorities just get the message.
+    def send_prioritized(self, midi_message, priority):
+        for target, send_prioritized in self.__targets_from_appl:
+            if send_prioritized:
+                send_prioritized(midi_message, priority)
+            else:
+                target.send(midi_message)
+
+    # Max. amount of messages returned by receive_batch()
+    @property
+    def batch_size(self):
+        return self.__buffer.size
+
+    # Drains the available messages for the application from all sources in one pass, up to max_msgs 
+    # (or the buffer size). Returns the ring buffer holding the messages, which have to be fetched
+    # with pop(). Messages not fetched remain in the buffer and are returned first by receive().
+    #
+    # The sources are read round robin (one message per source in turn), starting with the source
+    # following the one read last, so every source makes progress even if another one is flooding.
+    #
+    # Routings to other devices are served in the same pass: Messages drained for the application are 
+    # forwarded to the other targets of their source, too. Sources only routed to other devices are drained 
+    # up to the same limit. Raw thru data is forwarded once per batch.
+    def receive_batch(self, max_msgs = None):
+        buffer = self.__buffer
+        limit = buffer.size if max_msgs == None else min(max_msgs, buffer.size)
+
+        self.__process_raw_thru()
+
+        for source, targets in self.__external_only:
+            cnt = 0
+            while cnt < limit:
+                msg = source.receive()
+                if not msg:
+                    break
+
+                self.__forward(msg, targets)
+                cnt += 1
+
+        sources = self.__sources
+        num_sources = len(sources)
+        if not num_sources:
+            return buffer
+
+        for s in sources:
+            s.last_batch = 0
+            s.drained = False
+
+        remaining = num_sources
+        i = self.__next_source
+
+        while remaining and len(buffer) < limit:
+            s = sources[i]
+            i = (i + 1) % num_sources
+
+            if s.drained:
+                continue
+
+            msg = s.source.receive()
+            if not msg:
+                s.drained = True
+                remaining -= 1
+                continue
+            
+            buffer.push(msg)
+            s.last_batch += 1
+
+            if s.thru_targets:
+                self.__forward(msg, s.thru_targets)
+
+        self.__next_source = i
+
+        # Statistics
+        for s in sources:
+            s.received += s.last_batch
+
+            if s.last_batch > s.max_batch:
+                s.max_batch = s.last_batch
+
+            if not s.drained:
+                s.backlogged += 1
+
+        return buffer
+
     def receive(self):
+        # Messages left over from a batch come first
+        if self.__buffer:
+            return self.__buffer.pop()
+
         # Process routings without APPLICATION involved 
         self.__process_external_routings()
 
-        # Process routings targeting APPLICATION
-        for r in self.__routings_to_appl:
-            msg = r.source.receive()
+        # Process routings targeting APPLICATION, round robin starting with the source following the one 
+        # which delivered the last message
+        sources = self.__sources
+        num_sources = len(sources)
+        
+        for c in range(num_sources):
+            i = (self.__next_source + c) % num_sources
+            s = sources[i]
+            
+            msg = s.source.receive()
 
             if msg:
+                s.received += 1
+                self.__next_source = (i + 1) % num_sources
+
                 # Return first message for APPLICATION in the queue (next ticks will deliver the next messages)
                 return msg                
     
     # Process all routings where APPLICATION is not involved (this processes one message of each source every time)
     def __process_external_routings(self):
-        routings = self.__routings_external
-        if not routings:
-            return
-        
-        # Get all sources messages
-        sources = []
-        results = []
-
-        for r in routings:
-            if r.source in sources:
+        for source, targets, framer in self.__routings_external:
+            if framer:
+                self.__forward_raw(source, targets, framer)
                 continue
 
-            sources.append(r.source)
-            results.append(r.source.receive())
+            msg = source.receive()
+    
+            if not msg:
+                continue
             
-        # Distribute messages
-        for r in routings:
-            for i in range(len(sources)):
-                if sources[i] != r.source:
-                    continue
+            self.__forward(msg, targets)
 
-                msg = results[i]
-        
-                if not msg:
-                    continue
-                
-                if isinstance(msg, MIDIUnknownEvent):
-                    continue
-                
-                if getattr(msg, "_STATUS", None) is None:
-                    continue
-                
-                r.target.send(msg)
+    # Forwards the raw data of all sources using raw thru
+    def __process_raw_thru(self):
+        for source, targets, framer in self.__routings_external:
+            if framer:
+                self.__forward_raw(source, targets, framer)
+
+    # Forwards the raw data of a source. While another source is passing a long SysEx message in chunks to 
+    # one of the targets, the source is not read, so its data is not merged into the SysEx (it stays in the 
+    # input buffer of the source). Messages sent by the application or parsed routings are not held back.
+    def __forward_raw(self, source, targets, framer):
+        locks = self.__raw_locks
+        for target in targets:
+            owner = locks[target]
+            if owner and owner != framer and get_current_millis() - self.__raw_lock_times[target] < _RAW_THRU_LOCK_TIMEOUT_MILLIS:
+                return
+
+        data = source.receive_raw()
+        if not data:
+            return
+
+        data = framer.frame(data)
+
+        # Lock the targets until the end of a partially passed SysEx
+        if framer.in_sysex:
+            now = get_current_millis()
+            for target in targets:
+                locks[target] = framer
+                self.__raw_lock_times[target] = now
+        else:
+            for target in targets:
+                locks[target] = None
 
-                break
+        if not data:
+            return
+
+        for target in targets:
+            target.send_raw(data)
+
+    # Sends a parsed message to other devices (unknown messages are not forwarded)
+    def __forward(self, msg, targets):
+        if isinstance(msg, MIDIUnknownEvent):
+            return
+        
+        if getattr(msg, "_STATUS", None) is None:
+            return
+        
+        for target in targets:
+            target.send(msg)
@@ -4,6 +4,9 @@ from ..misc import PeriodCounter
 # as value preview or similar things. It handles the blinking and timeouts etc.
 class ValuePreview:
 
+    # Update interval (milliseconds) for owners of a preview, short enough for blinking and timeouts
+    UPDATE_INTERVAL_MILLIS = 50
+
     # There is only one ValuePreview handler for each label
     @staticmethod
     def get(label):
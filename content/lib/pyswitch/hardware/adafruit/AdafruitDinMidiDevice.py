@@ -1,5 +1,7 @@
 from adafruit_midi import MIDI as _MIDI
 from adafruit_midi.midi_message import MIDIUnknownEvent as _MIDIUnknownEvent
+from .AdafruitRawMidiInput import AdafruitRawMidiInput as _AdafruitRawMidiInput
+from ...controller.midi import MidiOutputQueue as _MidiOutputQueue
 from busio import UART as _UART
 
 # DIN MIDI Device
@@ -12,6 +14,9 @@ class AdafruitDinMidiDevice:
                  timeout,
                  in_channel = None,   # All
                  out_channel = 0, 
+                 raw_thru = False,    # If enabled, routings to other devices forward raw data without parsing (see MidiController)
+                 buffered_output = False,  # If enabled, outgoing messages are collected and sent once per tick, using running status
+                 max_bytes_per_tick = 0    # For buffered output: Max. bytes written per tick (0: No limit)
         ):
 
         midi_uart = _UART(
@@ -21,10 +26,17 @@ class AdafruitDinMidiDevice:
             timeout = timeout
         ) 
 
+        self.raw_thru = raw_thru
+        self.__port_out = midi_uart
+
+        # Output queue (see MidiOutputQueue), if buffered output is enabled
+        self.output = _MidiOutputQueue(midi_uart, max_bytes_per_tick, baudrate, running_status = True) if buffered_output else None
+        self.__input = _AdafruitRawMidiInput(midi_uart, in_buf_size)
+
         self.__midi = _MIDI(
             midi_out = midi_uart, 
             out_channel = out_channel,
-            midi_in = midi_uart, 
+            midi_in = self.__input, 
             in_channel = in_channel,
             in_buf_size = in_buf_size
         )
@@ -33,10 +45,51 @@ class AdafruitDinMidiDevice:
     #     return "DIN"
 
     def send(self, midi_message):
+        self.send_prioritized(midi_message, _MidiOutputQueue.PRIORITY_NORMAL)
+
+    # Sends a message with a priority class (see MidiOutputQueue). Priorities only take effect with 
+    # buffered output and a limited amount of bytes per tick.
+    def send_prioritized(self, midi_message, priority):
         if isinstance(midi_message, _MIDIUnknownEvent):
             return
         
+        if self.output is not None:
+            midi_message.channel = self.__midi.out_channel
+            self.output.add(midi_message.__bytes__(), priority)
+            return
+        
         self.__midi.send(midi_message)
 
     def receive(self):
-        return self.__midi.receive()
\ No newline at end of file
+        return self.__midi.receive()
+
+    # Raw thru: Called by the MidiController for routings to other devices if raw_thru is enabled. 
+    # If parse is set, the raw data is also parsed for the application.
+    def enable_raw_thru(self, parse):
+        self.__input.enable(parse)
+
+    # Raw thru: Returns the raw bytes available (or None)
+    def receive_raw(self):
+        return self.__input.read_raw()
+
+    # Raw thru: Sends raw bytes (must only contain complete messages)
+    def send_raw(self, data):
+        if self.output is not None:
+            self.output.add_raw(data)
+            return
+
+        self.__port_out.write(data, len(data))
+
+    # Buffered output: Sends the queued messages (called once per tick by the MidiController)
+    def flush(self):
+        if self.output is not None:
+            self.output.flush()
+
+    # Sets an input filter (MidiStatusFilter or None), which drops unneeded messages before parsing 
+    # (see MidiController.set_input_filter())
+    def set_input_filter(self, filter):
+        self.__input.filter = filter
+
+    # Sets a MidiClockTracker which is fed with all raw input (see MidiController.set_clock_tracker())
+    def set_clock_tracker(self, tracker):
+        self.__input.clock = tracker
\ No newline at end of file
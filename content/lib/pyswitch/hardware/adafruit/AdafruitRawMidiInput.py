@@ -0,0 +1,75 @@
+# Input port wrapper for raw MIDI thru and input filtering (see AdafruitUsbMidiDevice/AdafruitDinMidiDevice). 
+# The adafruit MIDI parser reads from this wrapper instead of the port. For raw thru, raw data is read 
+# from the port for forwarding without parsing. If the application listens to the port, too, the raw 
+# data is kept and handed to the parser. 
+class AdafruitRawMidiInput:
+    def __init__(self, port, in_buf_size):
+        self.__port = port
+        self.__read_size = in_buf_size
+
+        # Max. amount of raw bytes kept for the parser. If the application does not keep up,
+        # further data is not parsed anymore until there is space again (thru is not affected).
+        self.__max_pending = in_buf_size * 4
+        self.__pending = bytearray()
+
+        self.__active = False
+        self.__parse = False
+
+        # Optional input filter (MidiStatusFilter) applied to the data passed to the parser
+        self.filter = None
+
+        # Optional MidiClockTracker, fed with all data read from the port. The messages handled by 
+        # the tracker are not passed to the parser.
+        self.clock = None
+
+    # Activates raw reading. If parse is set, the raw data is also passed to the parser.
+    def enable(self, parse):
+        self.__active = True
+        self.__parse = parse
+
+    # Reads raw bytes from the port. Returns None if nothing is available.
+    def read_raw(self):
+        data = self.__port.read(self.__read_size)
+        if not data:
+            return None
+
+        if self.clock:
+            self.clock.feed(data)
+
+        if self.__parse and len(self.__pending) + len(data) <= self.__max_pending:
+            self.__pending.extend(data)
+
+        return data
+
+    # Called by the adafruit MIDI parser. As long as raw reading is not active, this reads the port directly.
+    def read(self, num_bytes):
+        data = self.__read(num_bytes)
+
+        if self.clock and data:
+            data = self.clock.strip(data)
+
+        if self.filter and data:
+            return self.filter.filter(data)
+        
+        return data
+
+    def __read(self, num_bytes):
+        if not self.__active:
+            data = self.__port.read(num_bytes)
+
+            if self.clock and data:
+                self.clock.feed(data)
+
+            return data
+
+        if not self.__pending:
+            return None
+
+        if len(self.__pending) <= num_bytes:
+            ret = self.__pending
+            self.__pending = bytearray()
+            return ret
+
+        ret = self.__pending[:num_bytes]
+        self.__pending = self.__pending[num_bytes:]
+        return ret
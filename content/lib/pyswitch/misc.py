@@ -48,6 +48,11 @@ def fill_up_to(str, num_spaces_at_right, fill_char = " "):
 
 # Base class for everything that needs to be updated regularily
 class Updateable:
+
+    # Individual update interval in milliseconds. If 0, the updateable is updated in every 
+    # update round of the Updater (see the "updateInterval" option).
+    update_interval = 0
+
     def update(self):
         pass   # pragma: no cover
 
@@ -63,26 +68,214 @@ class Updater:
     def __init__(self):
         self.updateables = []
 
+        # Updateables with an individual update interval (see Updateable.update_interval)
+        self.timed_updateables = []
+
     # Add a new Updateable
     def add_updateable(self, u):
         if not isinstance(u, Updateable):
             return
         
-        if u in self.updateables:
+        if u in self.updateables or u in self.timed_updateables:
             return
         
-        self.updateables.append(u)
+        if u.update_interval:
+            self.timed_updateables.append(u)
+        else:
+            self.updateables.append(u)
 
     # Update all updateables. 
     def update(self):
         for u in self.updateables:            
             u.update()
 
+        for u in self.timed_updateables:
+            u.update()
+
     # Reset all updateables
     def reset(self):
         for u in self.updateables:
             u.reset()
 
+        for u in self.timed_updateables:
+            u.reset()
+
+
+#####################################################################################################################################
+
+
+# Cooperative scheduler for the updateables of an Updater: An update round is spread over multiple ticks,
+# each tick only updating as many updateables as fit into the time budget (at least one, so the round always 
+# makes progress). With a budget of 0, every round is done in one tick.
+#
+# Updateables with an individual update interval are not part of the rounds. Their next due times are held
+# in a DeadlineQueue, so process_due() only touches the ones which are due.
+class UpdateScheduler:
+
+    # updateables:       List of Updateables (the list is referenced, so updateables added later are respected)
+    # budget_millis:     Max. time used for updates per tick (0 for no limit)
+    # timed_updateables: List of Updateables with individual update intervals (referenced, too)
+    def __init__(self, updateables, budget_millis = 0, timed_updateables = None):
+        self.__updateables = updateables
+        self.budget_millis = budget_millis
+
+        self.__timed_updateables = timed_updateables if timed_updateables != None else []
+        self.__num_timed = 0                       # Amount of timed updateables already scheduled
+        self.__deadlines = DeadlineQueue()
+        self.__update_timed_callback = self.__update_timed
+        self.__now = 0
+
+        # Index of the next updateable to update, or None if no round is running
+        self.__next = None
+
+        # Statistics
+        self.rounds = 0                  # Finished update rounds
+        self.ticks = 0                   # Ticks used by the last finished round
+        self.overruns = 0                # Ticks in which the budget has been exceeded
+        self.max_overrun_millis = 0      # Max. time the budget has been exceeded by
+        self.__round_ticks = 0
+
+    # Returns if an update round is in progress
+    @property
+    def running(self):
+        return self.__next != None
+
+    # Starts a new update round. Has no effect if the last round is still running.
+    def start(self):
+        if self.__next == None:
+            self.__next = 0
+            self.__round_ticks = 0
+
+    # Updates the next updateables of the current round, until the budget is exhausted. If passed, 
+    # the between callback is called before each update (for tasks which must not be delayed by 
+    # the updates). Returns True if the round has been finished.
+    def process(self, between = None):
+        if self.__next == None:
+            return False
+        
+        updateables = self.__updateables
+        budget = self.budget_millis
+        start = get_current_millis() if budget else 0
+        i = self.__next
+
+        while i < len(updateables):
+            if between:
+                between()
+
+            updateables[i].update()
+            i += 1
+
+            if budget and get_current_millis() - start >= budget:
+                break
+
+        if budget:
+            overrun = get_current_millis() - start - budget
+            if overrun > 0:
+                self.overruns += 1
+
+                if overrun > self.max_overrun_millis:
+                    self.max_overrun_millis = overrun
+
+        self.__round_ticks += 1
+
+        if i < len(updateables):
+            self.__next = i
+            return False
+        
+        self.__next = None
+        self.rounds += 1
+        self.ticks = self.__round_ticks
+        
+        return True
+
+    # Updates all timed updateables which are due. Returns the amount of updates done. 
+    # Updateables added since the last call are due immediately.
+    def process_due(self, now = None):
+        if now == None:
+            now = get_current_millis()
+
+        timed = self.__timed_updateables
+        while self.__num_timed < len(timed):
+            self.__deadlines.add(timed[self.__num_timed], -1, now)
+            self.__num_timed += 1
+
+        self.__now = now
+        return self.__deadlines.process(self.__update_timed_callback, now)
+
+    def __update_timed(self, u):
+        u.update()
+        self.__deadlines.add(u, u.update_interval, self.__now)
+
+
+#####################################################################################################################################
+
+
+# Adaptive limit for the amount of MIDI messages received in one pass before the switches are scanned again
+# (see Controller). The queue depth is estimated by the amount of messages received per pass: If a pass ends
+# at the limit with messages remaining, the limit is increased to drain bursts faster. If the pass itself 
+# (receiving and parsing) took longer than the bound, the limit is decreased again. Only the receive pass is
+# measured, so other work done in between (updates, display) does not affect the limit.
+class AdaptiveDrainLimit:
+
+    # initial:              Initial limit
+    # max_pass_millis:      Max. time for one receive pass
+    # min_limit:            Lower bound for the limit
+    # max_limit:            Upper bound for the limit
+    def __init__(self, initial, max_pass_millis, min_limit = 1, max_limit = 100):
+        self.max_pass_millis = max_pass_millis
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+
+        self.limit = min(max(initial, min_limit), self.max_limit)
+
+        self.__start = 0
+
+        # Statistics (since the last reset_stats() call)
+        self.reset_stats()
+
+    # Must be called before each receive pass
+    def start(self):
+        self.__start = get_current_millis()
+
+    # Must be called after each receive pass with the amount of messages received. remaining must be
+    # True if the pass has been stopped by the limit (more messages may be pending).
+    def received(self, num_messages, remaining):
+        duration = get_current_millis() - self.__start
+
+        if duration > self.max_pass:
+            self.max_pass = duration
+
+        if num_messages > self.max_depth:
+            self.max_depth = num_messages
+
+        if remaining:
+            self.backlogs += 1
+
+        if duration > self.max_pass_millis:
+            # Pass took too long: Decrease
+            self.__set_limit(self.limit // 2)
+
+        elif remaining:
+            # Burst: Increase
+            self.__set_limit(self.limit * 2)
+
+    # Resets the statistics
+    def reset_stats(self):
+        self.min_used = self.limit       # Min. limit used
+        self.max_used = self.limit       # Max. limit used
+        self.max_pass = 0                # Max. time of one receive pass
+        self.max_depth = 0               # Max. amount of messages received in one pass
+        self.backlogs = 0                # Passes stopped by the limit
+
+    def __set_limit(self, limit):
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+
+        if self.limit < self.min_used:
+            self.min_used = self.limit
+
+        if self.limit > self.max_used:
+            self.max_used = self.limit
+
 
 #####################################################################################################################################
 
@@ -130,3 +323,127 @@ class PeriodCounter:
             return True
         return False
             
+
+
+###############################################################################################################
+
+
+# Shared deadline queue for timeouts: Holds arbitrary (hashable) targets with a deadline, ordered in
+# a binary min-heap. Processing costs O(expired) instead of checking every target, and no timer objects
+# have to be allocated per target. Rescheduling or removing a target only invalidates its heap entry, 
+# which is dropped when it reaches the top of the heap.
+class DeadlineQueue:
+    def __init__(self):
+        self.__heap = []          # Heap entries: (deadline, sequence number, target)
+        self.__entries = {}       # Valid heap entry by target
+        self.__sequence = 0       # Keeps the order of equal deadlines stable (and prevents comparing targets)
+
+    # Number of targets waiting for their deadline
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, target):
+        return target in self.__entries
+
+    # Returns the deadline of a target (milliseconds), or None if not contained
+    def deadline(self, target):
+        entry = self.__entries.get(target, None)
+        return entry[0] if entry else None
+
+    # Adds a target which expires after the passed amount of milliseconds. If the target is already
+    # contained, its deadline is replaced.
+    def add(self, target, timeout_millis, now = None):
+        if now == None:
+            now = get_current_millis()
+
+        self.__sequence += 1
+        entry = (now + timeout_millis, self.__sequence, target)
+        
+        self.__entries[target] = entry
+        self.__push(entry)
+
+        # Drop invalid entries if there are too many of them
+        if len(self.__heap) > 2 * len(self.__entries) + 16:
+            self.__compact()
+
+    # Removes a target (no error if not contained)
+    def remove(self, target):
+        if target in self.__entries:
+            del self.__entries[target]
+
+    # Calls the callback for all targets whose deadline has passed (and removes them from the queue).
+    # Returns the number of expired targets.
+    def process(self, callback, now = None):
+        heap = self.__heap
+        if not heap:
+            return 0
+        
+        if now == None:
+            now = get_current_millis()
+
+        entries = self.__entries
+        num_expired = 0
+
+        while heap and heap[0][0] < now:
+            entry = self.__pop()
+            target = entry[2]
+
+            # Rescheduled or removed target
+            if entries.get(target, None) is not entry:
+                continue
+
+            del entries[target]
+            num_expired += 1
+
+            callback(target)
+
+        return num_expired
+
+    # Removes all invalid entries from the heap
+    def __compact(self):
+        heap = [entry for entry in self.__heap if self.__entries.get(entry[2], None) is entry]
+        heap.sort()
+        self.__heap = heap
+
+    def __push(self, entry):
+        heap = self.__heap
+        heap.append(entry)
+
+        # Sift up
+        pos = len(heap) - 1
+        while pos > 0:
+            parent_pos = (pos - 1) >> 1
+            parent = heap[parent_pos]
+            if not entry < parent:
+                break
+            heap[pos] = parent
+            pos = parent_pos
+
+        heap[pos] = entry
+
+    def __pop(self):
+        heap = self.__heap
+        last = heap.pop()
+        if not heap:
+            return last
+        
+        ret = heap[0]
+        
+        # Sift down
+        size = len(heap)
+        pos = 0
+        child_pos = 1
+        while child_pos < size:
+            right_pos = child_pos + 1
+            if right_pos < size and heap[right_pos] < heap[child_pos]:
+                child_pos = right_pos
+
+            if not heap[child_pos] < last:
+                break
+            
+            heap[pos] = heap[child_pos]
+            pos = child_pos
+            child_pos = 2 * pos + 1
+
+        heap[pos] = last
+        return ret
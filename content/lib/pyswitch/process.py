@@ -24,7 +24,10 @@ from config import Config as _Config
 
 if not _get_option(_Config, "exploreMode"):
     # Normal operation
-    from pyswitch.controller.controller import Controller as _Controller
+    if _get_option(_Config, "asyncController"):
+        from pyswitch.controller.async_controller import AsyncController as _Controller
+    else:
+        from pyswitch.controller.controller import Controller as _Controller
     from pyswitch.controller.midi import MidiController as _MidiController
     from pyswitch.ui.UiController import UiController as _UiController
 
@@ -69,9 +72,13 @@ if not _get_option(_Config, "exploreMode"):
         # Prepare to run the processing loop
         _controller.init()
 
-        # Start processing loop (done here to keep the call stack short)
-        while _controller.tick():
-            pass
+        if _get_option(_Config, "asyncController"):
+            # Run the asyncio tasks
+            _controller.start()
+        else:
+            # Start processing loop (done here to keep the call stack short)
+            while _controller.tick():
+                pass
 
     except Exception as e:
         if _get_option(_Config, "enableMidiBridge"):
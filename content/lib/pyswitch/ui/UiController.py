@@ -51,8 +51,17 @@ class UiController(Updater, Updateable):
         if not splash_element.initialized():
             splash_element.init(splash_element, self.__appl)
 
-        # Add elements which are Updateables to the update queue
-        self.updateables = [i for i in splash_element.contents_flat() if isinstance(i, Updateable)]
+        # Add elements which are Updateables to the update queue. Elements with an individual update interval
+        # are scheduled by the application instead.
+        self.updateables = []
+        for i in splash_element.contents_flat():
+            if not isinstance(i, Updateable):
+                continue
+
+            if i.update_interval:
+                self.__appl.add_updateable(i)
+            else:
+                self.updateables.append(i)
         
         # Show splash
         self.__current_splash_element = splash_element
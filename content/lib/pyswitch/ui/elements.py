@@ -459,6 +459,10 @@ _PERFORMANCE_INDICATOR_MARGIN = const(2)
 # communication is disabled)
 class BidirectionalProtocolState(DisplayElement, Updateable):
 
+    # The state is cheap to check, so it is updated more often than the global update interval 
+    # (scheduled by the application, see UiController.show())
+    update_interval = 100
+
     def __init__(self, bounds = DisplayBounds(), name = "", id = 0):
         DisplayElement.__init__(
             self, 
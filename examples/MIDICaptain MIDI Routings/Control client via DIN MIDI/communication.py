@@ -12,7 +12,10 @@ from pyswitch.hardware.devices.pa_midicaptain import PA_MIDICAPTAIN_DIN_MIDI
 # MIDI Devices in use (optionally you can specify the in/out channels here, too)
 _DIN_MIDI = PA_MIDICAPTAIN_DIN_MIDI(
     in_channel = None,  # All
-    out_channel = 0
+    out_channel = 0,
+    #buffered_output = True,    # Send all messages of a tick in one go, using running status
+    #max_bytes_per_tick = 64    # Limit the bytes sent per tick (for buffered output), so large bursts do not block. Messages are sent
+                                # by priority then: Keep-alive and SET messages first, parameter requests last.
 )
 
 # Communication configuration
@@ -12,7 +12,8 @@ from pyswitch.hardware.devices.pa_midicaptain import PA_MIDICAPTAIN_DIN_MIDI, PA
 # MIDI Devices in use (optionally you can specify the in/out channels here, too)
 _DIN_MIDI = PA_MIDICAPTAIN_DIN_MIDI(
     in_channel = None,  # All
-    out_channel = 0
+    out_channel = 0,
+    raw_thru = True     # Forward the DIN messages to USB without parsing them (faster, and passes all message types)
 )
 _USB_MIDI = PA_MIDICAPTAIN_USB_MIDI(
     in_channel = None,  # All
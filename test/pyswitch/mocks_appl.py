@@ -120,9 +120,8 @@ def _check_unique_mapping_names(function):
         else:
             name = kwargs["name"]
 
-        for m in ClientParameterMapping._mappings:
-            if m.name == name:
-                raise Exception("Mapping already defined: " + repr(name))
+        if name in ClientParameterMapping._mappings:
+            raise Exception("Mapping already defined: " + repr(name))
 
         return function(*args, **kwargs)
     return wrapper
@@ -173,6 +172,10 @@ class MockParameterMapping(ClientParameterMapping):
     def set_value(self, value):
         self.set_value_calls.append(value)
 
+    # The mock parses messages regardless of its response templates, so it must not be indexed
+    def response_keys(self):
+        return None
+
     def result_finished(self):
         if self.output_result_finished != None:
             return self.output_result_finished
@@ -314,7 +317,7 @@ class MockClient:
     def last_sent_message(self):
         return self.set_calls[len(self.set_calls)-1] if self.set_calls else None
 
-    def set(self, mapping, value):
+    def set(self, mapping, value, coalesce = False):
         self.set_calls.append({
             "mapping": mapping,
             "value": value
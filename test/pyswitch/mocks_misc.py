@@ -29,8 +29,11 @@ class MockMisc:
     get_current_millis = misc.get_current_millis
 
     Updater = misc.Updater
+    UpdateScheduler = misc.UpdateScheduler
+    AdaptiveDrainLimit = misc.AdaptiveDrainLimit
     Updateable = misc.Updateable
     EventEmitter = misc.EventEmitter
     PeriodCounter = misc.PeriodCounter
+    DeadlineQueue = misc.DeadlineQueue
 
     PYSWITCH_VERSION = misc.PYSWITCH_VERSION
@@ -123,6 +123,29 @@ class TestAction(unittest.TestCase):
         action_1.update_displays()
 
         self.assertEqual(cb.update_displays_calls, 1)
+
+
+    def test_callback_update_interval(self):
+        cb_1 = MockActionCallback()
+        cb_1.update_interval = 20
+
+        MockAction(config = {
+            "callback": cb_1
+        })
+
+        # The callback keeps its own interval if the action has none
+        self.assertEqual(cb_1.update_interval, 20)
+
+        cb_2 = MockActionCallback()
+        cb_2.update_interval = 20
+
+        action_2 = MockAction(config = {
+            "callback": cb_2,
+            "updateInterval": 500
+        })
+
+        self.assertEqual(action_2.update_interval, 500)
+        self.assertEqual(cb_2.update_interval, 500)
         
 
     def test_callback_mappings(self):
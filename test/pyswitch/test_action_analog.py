@@ -540,6 +540,9 @@ class TestAnalogAction(unittest.TestCase):
             change_timeout_millis = 123
         )
 
+        # Updated more often than the global interval, for the preview timeout
+        self.assertEqual(action.update_interval, 50)
+
         appl = MockController()
         action.init(appl)
 
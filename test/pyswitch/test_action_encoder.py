@@ -326,6 +326,49 @@ class TestEncoderAction(unittest.TestCase):
 
         action.update()
         self.assertEqual(appl.client.request_calls, [{ "mapping": mapping, "listener": None }, { "mapping": mapping, "listener": None }]) 
+
+        self.assertEqual(action.update_interval, 0)
+        
+    def test_update_with_display(self):
+        mapping = MockParameterMapping(
+            request = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x05, 0x17, 0x09]
+            )
+        )
+
+        action = EncoderAction(
+            mapping = mapping,
+            preview_display = DisplayLabel(
+                layout = {
+                    "font": "foo"
+                }
+            )
+        )
+
+        # Updated more often than the global interval, for blinking and the preview timeout
+        self.assertEqual(action.update_interval, 50)
+
+        appl = MockController(config = {
+            "updateInterval": 300
+        })
+        action.init(appl)
+
+        self.assertEqual(action._EncoderAction__request_period.interval, 300)
+
+        # The mapping is still requested in the global interval only
+        action._EncoderAction__request_period = MockPeriodCounter()
+        period = action._EncoderAction__request_period
+
+        action.update()
+        self.assertEqual(appl.client.request_calls, []) 
+
+        period.exceed_next_time = True
+        action.update()
+        self.assertEqual(appl.client.request_calls, [{ "mapping": mapping, "listener": None }]) 
+
+        action.update()
+        self.assertEqual(appl.client.request_calls, [{ "mapping": mapping, "listener": None }]) 
         
 
     #################################################################################
@@ -0,0 +1,255 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+
+class MockHardwareBoard:
+    GP7 = "MockPort_7"
+    GP12 = "MockPort_12"
+    GP13 = "MockPort_13"
+    GP14 = "MockPort_14"
+    GP15 = "MockPort_15"
+
+
+# Fake output port (busio.UART or usb_midi.PortOut): Records all writes
+class MockOutPort:
+    def __init__(self):
+        self.writes = []
+        self.next_read = []
+
+    def write(self, data, length = None):
+        if length == None:
+            length = len(data)
+
+        self.writes.append(bytes(data[:length]))
+
+    def read(self, num_bytes):
+        if self.next_read:
+            return self.next_read.pop(0)
+
+        return None
+
+
+class MockBusIO:
+    uarts = []
+
+    class UART(MockOutPort):
+        def __init__(self, rx, tx, baudrate, timeout):
+            super().__init__()
+            MockBusIO.uarts.append(self)
+
+    class SPI:
+        pass
+
+
+class MockHardwareMIDI:
+    class MIDI:
+        def __init__(self, midi_out = None, out_channel = 0, midi_in = None, in_channel = None, in_buf_size = None):
+            self.midi_out = midi_out
+            self.midi_in = midi_in
+            self.out_channel = out_channel
+            self.in_buf_size = in_buf_size
+
+        # Writes the message immediately (like adafruit_midi)
+        def send(self, midi_message):
+            midi_message.channel = self.out_channel
+            data = midi_message.__bytes__()
+            self.midi_out.write(data, len(data))
+
+        # Returns one message with all data read from the input (the parsing itself is not of interest here)
+        def receive(self):
+            data = self.midi_in.read(self.in_buf_size)
+            if not data:
+                return None
+            
+            return MockParsedMessage(bytes(data))
+
+
+class MockParsedMessage:
+    def __init__(self, data):
+        self.data = data
+
+
+# Display related modules imported by the hardware package (not used here)
+class MockModule:
+    release_displays = None
+    ST7789 = None
+    NeoPixel = None
+    FourWire = None
+    bitmap_font = None
+
+
+# Channel message with serialization
+class MockControlChange:
+    def __init__(self, control, value):
+        self.control = control
+        self.value = value
+        self.channel = 0
+
+    def __bytes__(self):
+        return bytes([0xb0 | self.channel, self.control, self.value])
+
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "board": MockHardwareBoard,
+    "busio": MockBusIO,
+    "displayio": MockModule,
+    "adafruit_misc": MockModule,
+    "adafruit_misc.adafruit_st7789": MockModule,
+    "adafruit_misc.neopixel": MockModule,
+    "fourwire": MockModule,
+    "adafruit_bitmap_font": MockModule,
+    "adafruit_midi": MockHardwareMIDI,
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC()
+}):
+    from lib.pyswitch.hardware.adafruit.AdafruitDinMidiDevice import AdafruitDinMidiDevice
+    from lib.pyswitch.hardware.adafruit.AdafruitUsbMidiDevice import AdafruitUsbMidiDevice
+    from lib.pyswitch.controller.midi import MidiOutputQueue, MidiClockTracker
+
+
+class TestAdafruitDinMidiDevice(unittest.TestCase):
+
+    def _create(self, buffered_output, max_bytes_per_tick = 0):
+        MockBusIO.uarts = []
+
+        device = AdafruitDinMidiDevice(
+            gpio_in = "rx",
+            gpio_out = "tx",
+            in_buf_size = 100,
+            baudrate = 31250,
+            timeout = 0.001,
+            out_channel = 2,
+            buffered_output = buffered_output,
+            max_bytes_per_tick = max_bytes_per_tick
+        )
+
+        return (device, MockBusIO.uarts[0])
+
+    def test_unbuffered(self):
+        device, uart = self._create(False)
+
+        device.send(MockControlChange(1, 10))
+        self.assertEqual(uart.writes, [bytes([0xb2, 0x01, 0x0a])])
+
+        device.send_raw(bytes([0x90, 0x40, 0x7f]))
+        self.assertEqual(uart.writes[1], bytes([0x90, 0x40, 0x7f]))
+
+        device.flush()
+        self.assertEqual(len(uart.writes), 2)
+
+    def test_buffered(self):
+        device, uart = self._create(True)
+
+        device.send(MockControlChange(1, 10))
+        device.send(MockControlChange(2, 20))
+        device.send_raw(bytes([0x90, 0x40, 0x7f]))
+
+        # Nothing is written before flushing
+        self.assertEqual(uart.writes, [])
+
+        # One coalesced write, using running status
+        device.flush()
+        self.assertEqual(uart.writes, [bytes([0xb2, 0x01, 0x0a, 0x02, 0x14, 0x90, 0x40, 0x7f])])
+
+        device.flush()
+        self.assertEqual(len(uart.writes), 1)
+
+    def test_clock_tracker(self):
+        device, uart = self._create(False)
+
+        clock = MidiClockTracker()
+        device.set_clock_tracker(clock)
+
+        # Clock messages are counted, but not passed to the parser
+        uart.next_read = [bytes([0xfa] + [0xf8] * 24)]
+
+        self.assertEqual(device.receive(), None)
+        self.assertEqual(clock.clocks, 24)
+        self.assertEqual(clock.running, True)
+
+        # Other messages are passed
+        uart.next_read = [bytes([0xf8, 0xb0, 0x07, 0xf8, 0x7f, 0xfc])]
+
+        self.assertEqual(device.receive().data, bytes([0xb0, 0x07, 0x7f]))
+        self.assertEqual(clock.clocks, 26)
+        self.assertEqual(clock.running, False)
+
+    def test_buffered_budget(self):
+        device, uart = self._create(True, max_bytes_per_tick = 5)
+
+        device.send(MockControlChange(1, 10))
+        device.send(MockControlChange(2, 20))
+        device.send(MockControlChange(3, 30))
+
+        self.assertEqual(uart.writes, [])
+
+        device.flush()
+        device.flush()
+
+        self.assertEqual(uart.writes, [
+            bytes([0xb2, 0x01, 0x0a, 0x02, 0x14]),
+            bytes([0x03, 0x1e])
+        ])
+
+
+class TestAdafruitUsbMidiDevice(unittest.TestCase):
+
+    def _create(self, buffered_output, max_bytes_per_tick = 0):
+        port_out = MockOutPort()
+
+        device = AdafruitUsbMidiDevice(
+            port_in = MockOutPort(),
+            port_out = port_out,
+            in_buf_size = 100,
+            out_channel = 2,
+            buffered_output = buffered_output,
+            max_bytes_per_tick = max_bytes_per_tick
+        )
+
+        return (device, port_out)
+
+    def test_unbuffered(self):
+        device, port_out = self._create(False)
+
+        device.send(MockControlChange(1, 10))
+        self.assertEqual(port_out.writes, [bytes([0xb2, 0x01, 0x0a])])
+
+    def test_buffered(self):
+        device, port_out = self._create(True)
+
+        device.send(MockControlChange(1, 10))
+        device.send(MockControlChange(2, 20))
+        device.send_raw(bytes([0x90, 0x40, 0x7f]))
+
+        # Nothing is written before flushing
+        self.assertEqual(port_out.writes, [])
+
+        # One coalesced write. USB MIDI does not support running status, so all status bytes are included.
+        device.flush()
+        self.assertEqual(port_out.writes, [bytes([0xb2, 0x01, 0x0a, 0xb2, 0x02, 0x14, 0x90, 0x40, 0x7f])])
+
+    def test_buffered_priorities(self):
+        device, port_out = self._create(True, max_bytes_per_tick = 6)
+
+        device.send_prioritized(MockControlChange(1, 10), MidiOutputQueue.PRIORITY_LOW)
+        device.send_prioritized(MockControlChange(2, 20), MidiOutputQueue.PRIORITY_LOW)
+        device.send_prioritized(MockControlChange(3, 30), MidiOutputQueue.PRIORITY_HIGH)
+
+        self.assertEqual(port_out.writes, [])
+
+        # High priority first, the budget defers the rest
+        device.flush()
+        device.flush()
+
+        self.assertEqual(port_out.writes, [
+            bytes([0xb2, 0x03, 0x1e, 0xb2, 0x01, 0x0a]),
+            bytes([0xb2, 0x02, 0x14])
+        ])
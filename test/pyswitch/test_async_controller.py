@@ -0,0 +1,190 @@
+import sys
+import unittest
+import asyncio
+from heapq import heappush, heappop
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "usb_midi": MockUsbMidi(),
+    "adafruit_midi": MockAdafruitMIDI(),
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC()
+}):
+    from lib.pyswitch.controller.async_controller import AsyncController
+    from lib.pyswitch.misc import Updateable
+    import lib.pyswitch.misc as misc_module
+
+    from .mocks_appl import *
+
+
+# Virtual clock for running the controller tasks in CPython: Sleeping tasks are woken up in order
+# of their wake up times, without actually waiting.
+class VirtualClock:
+    def __init__(self):
+        self.now = 0                # Virtual time in milliseconds
+        self.__waiting = []         # Heap of (wake up time, sequence, future)
+        self.__sequence = 0
+
+    # Replacement for asyncio.sleep
+    async def sleep(self, seconds):
+        future = asyncio.get_running_loop().create_future()
+
+        self.__sequence += 1
+        heappush(self.__waiting, (self.now + seconds * 1000, self.__sequence, future))
+
+        await future
+
+    # Lets the tasks run until the virtual time has reached the passed value
+    async def advance_to(self, millis):
+        while True:
+            await self.__settle()
+
+            if not self.__waiting or self.__waiting[0][0] > millis:
+                break
+
+            wake_time, _, future = heappop(self.__waiting)
+            self.now = max(self.now, wake_time)
+            future.set_result(None)
+
+        self.now = millis
+
+    # Lets all tasks which are ready run until they sleep again
+    async def __settle(self):
+        for i in range(5):
+            await asyncio.sleep(0)
+
+
+class MockCountingMidiController(MockMidiController):
+    def __init__(self):
+        super().__init__()
+        self.num_receive_calls = 0
+        self.num_flush_calls = 0
+
+    def receive(self):
+        self.num_receive_calls += 1
+        return super().receive()
+
+    def flush(self):
+        self.num_flush_calls += 1
+
+
+class MockUi(Updateable):
+    def __init__(self):
+        self.num_update_calls = 0
+
+    def init(self, appl):
+        pass
+
+    def show(self):
+        pass
+
+    def update(self):
+        self.num_update_calls += 1
+
+
+class TestAsyncController(unittest.TestCase):
+
+    def test_tasks(self):
+        clock = VirtualClock()
+        midi = MockCountingMidiController()
+        switch_1 = MockSwitch()
+        action_1 = MockAction()
+        ui = MockUi()
+
+        appl = AsyncController(
+            led_driver = MockNeoPixelDriver(),
+            midi = midi,
+            inputs = [
+                {
+                    "assignment": {
+                        "model": switch_1
+                    },
+                    "actions": [
+                        action_1
+                    ]
+                }
+            ],
+            ui = ui,
+            config = {
+                "updateInterval": 200,
+                "clearBuffers": False
+            },
+            sleep = clock.sleep
+        )
+
+        # The UI is updated by its own task
+        self.assertNotIn(ui, appl.updateables)
+        self.assertIn(action_1, appl.updateables)
+
+        appl.init()
+
+        async def main():
+            task = asyncio.create_task(appl.run())
+
+            await clock.advance_to(1000)
+
+            # Updates are checked every 10ms, the period is exceeded after more than 200ms
+            self.assertEqual(action_1.num_update_calls_overall, 4)
+
+            # Inputs every 2ms (plus once before each update), client every 5ms, display every 200ms (each starting at 0)
+            self.assertEqual(midi.num_receive_calls, 501 + 4)
+            self.assertEqual(midi.num_flush_calls, 201)
+            self.assertEqual(ui.num_update_calls, 6)
+
+            # Switches are scanned by the input task
+            switch_1.shall_be_pushed = True
+            await clock.advance_to(1003)
+
+            self.assertEqual(action_1.num_push_calls, 1)
+
+            # Stop
+            appl.stop()
+            self.assertEqual(appl.running, False)
+
+            await clock.advance_to(1300)
+            self.assertEqual(task.done(), True)
+
+            num_receive_calls = midi.num_receive_calls
+            await clock.advance_to(2000)
+
+            self.assertEqual(midi.num_receive_calls, num_receive_calls)
+
+        with patch.object(misc_module, "get_current_millis", side_effect = lambda: int(clock.now)):
+            asyncio.run(main())
+
+
+    def test_no_ui(self):
+        clock = VirtualClock()
+        midi = MockCountingMidiController()
+
+        appl = AsyncController(
+            led_driver = MockNeoPixelDriver(),
+            midi = midi,
+            config = {
+                "asyncInputIntervalMillis": 10,
+                "clearBuffers": False
+            },
+            sleep = clock.sleep
+        )
+
+        appl.init()
+
+        async def main():
+            task = asyncio.create_task(appl.run())
+
+            await clock.advance_to(100)
+            self.assertEqual(midi.num_receive_calls, 11)
+
+            appl.stop()
+            await clock.advance_to(200)
+            self.assertEqual(task.done(), True)
+
+        with patch.object(misc_module, "get_current_millis", side_effect = lambda: int(clock.now)):
+            asyncio.run(main())
@@ -21,6 +21,7 @@ with patch.dict(sys.modules, {
     from .mocks_appl import *
     from .mocks_callback import *
     from lib.pyswitch.misc import Updater
+    import lib.pyswitch.misc as misc_module
 
 
 class TestCallback(unittest.TestCase):
@@ -68,6 +69,55 @@ class TestCallback(unittest.TestCase):
         self.assertIn(mapping_2, [x["mapping"] for x in appl.client.request_calls])
 
 
+    def test_update_interval(self):
+        mapping_1 = MockParameterMapping()
+
+        cb = MockCallback(mappings = [
+            mapping_1
+        ])
+        cb.update_interval = 50
+
+        appl = MockController(config = {
+            "updateInterval": 200
+        })
+        cb.init(appl)
+
+        self.assertEqual(appl.timed_updateables, [cb])
+
+        # Shorter than the global update interval: The mappings are still requested in the global interval only
+        with patch.object(misc_module, "get_current_millis", return_value = 1000):
+            cb.update()
+            self.assertEqual(len(appl.client.request_calls), 1)
+
+        with patch.object(misc_module, "get_current_millis", return_value = 1050):
+            cb.update()
+            self.assertEqual(len(appl.client.request_calls), 1)
+
+        with patch.object(misc_module, "get_current_millis", return_value = 1201):
+            cb.update()
+            self.assertEqual(len(appl.client.request_calls), 2)
+
+
+    def test_update_interval_long(self):
+        mapping_1 = MockParameterMapping()
+
+        cb = MockCallback(mappings = [
+            mapping_1
+        ])
+        cb.update_interval = 1000
+
+        appl = MockController(config = {
+            "updateInterval": 200
+        })
+        cb.init(appl)
+
+        # Longer intervals: Requested on every update
+        cb.update()
+        cb.update()
+
+        self.assertEqual(len(appl.client.request_calls), 2)
+
+
     def test(self):
         mapping_1 = MockParameterMapping(
             response = SystemExclusive(
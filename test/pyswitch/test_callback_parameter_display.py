@@ -18,6 +18,7 @@ with patch.dict(sys.modules, {
     "gc": MockGC()
 }):
     from lib.pyswitch.controller.callbacks.parameter_display import ParameterDisplayCallback
+    from lib.pyswitch.controller.client import ClientParameterMapping
     
     from lib.pyswitch.ui.elements import DisplayLabel
 
@@ -28,6 +29,35 @@ with patch.dict(sys.modules, {
 
 class TestParameterDisplayCallback(unittest.TestCase):
 
+    def test_update_interval(self):
+        # Numeric parameters: Global interval
+        cb = ParameterDisplayCallback(
+            mapping = MockParameterMapping()
+        )
+
+        self.assertEqual(cb.update_interval, 0)
+
+        # String parameters (names etc.) are updated less often
+        cb = ParameterDisplayCallback(
+            mapping = MockParameterMapping(
+                type = ClientParameterMapping.PARAMETER_TYPE_STRING
+            )
+        )
+
+        self.assertEqual(cb.update_interval, ParameterDisplayCallback.STRING_UPDATE_INTERVAL_MILLIS)
+        self.assertGreater(cb.update_interval, 200)
+
+        # Explicit interval
+        cb = ParameterDisplayCallback(
+            mapping = MockParameterMapping(
+                type = ClientParameterMapping.PARAMETER_TYPE_STRING
+            ),
+            update_interval = 0
+        )
+
+        self.assertEqual(cb.update_interval, 0)
+
+
     def test(self):
         mapping = MockParameterMapping()
          
@@ -1,6 +1,7 @@
 import sys
 import unittest
 from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+from uuid import uuid4
 
 from .mocks_lib import *
 
@@ -17,7 +18,11 @@ with patch.dict(sys.modules, {
 }):
     from adafruit_midi.system_exclusive import SystemExclusive
     from adafruit_midi.control_change import ControlChange
-    from lib.pyswitch.controller.client import Client
+    from adafruit_midi.program_change import ProgramChange
+    from lib.pyswitch.controller.client import Client, ClientParameterMapping, ClientReceivePipeline
+    import lib.pyswitch.controller.client as client_module
+    import lib.pyswitch.misc as misc_module
+    from lib.pyswitch.controller.midi import MidiOutputQueue
 
     from.mocks_appl import *
 
@@ -26,6 +31,16 @@ class MockParameterMapping2(MockParameterMapping):
     pass
 
 
+class MockPrioritizedMidi(MockMidiController):
+    def __init__(self):
+        super().__init__()
+        self.priorities = []
+
+    def send_prioritized(self, midi_message, priority):
+        self.messages_sent.append(midi_message)
+        self.priorities.append(priority)
+
+
 class TestClient(unittest.TestCase):
 
     def test_set(self):
@@ -117,6 +132,90 @@ class TestClient(unittest.TestCase):
         client.set(mapping_1, 33)
 
         
+##############################################################################################
+
+
+    def test_set_coalesce(self):
+        midi = MockAdafruitMIDI.MIDI()
+        
+        client = Client(
+            midi = midi,
+            config = {}
+        )
+
+        mapping_1 = ClientParameterMapping.get(
+            name = uuid4(),
+            set = ControlChange(control = 11, value = 0)
+        )
+
+        mapping_2 = ClientParameterMapping.get(
+            name = uuid4(),
+            set = ControlChange(control = 12, value = 0)
+        )
+
+        client.set(mapping_1, 10, coalesce = True)
+        client.set(mapping_2, 20, coalesce = True)
+        client.set(mapping_1, 11, coalesce = True)
+        client.set(mapping_1, 12, coalesce = True)
+
+        self.assertEqual(midi.messages_sent, [])
+
+        client.flush()
+
+        self.assertEqual(midi.messages_sent, [mapping_1.set, mapping_2.set])
+        self.assertEqual(mapping_1.set.value, 12)
+        self.assertEqual(mapping_2.set.value, 20)
+
+        # Nothing pending anymore
+        client.flush()
+        self.assertEqual(len(midi.messages_sent), 2)
+
+
+    def test_set_coalesce_order(self):
+        midi = MockAdafruitMIDI.MIDI()
+        
+        client = Client(
+            midi = midi,
+            config = {}
+        )
+
+        mapping_1 = ClientParameterMapping.get(
+            name = uuid4(),
+            set = ControlChange(control = 11, value = 0)
+        )
+
+        mapping_2 = ClientParameterMapping.get(
+            name = uuid4(),
+            set = ControlChange(control = 12, value = 0)
+        )
+
+        mapping_pc = ClientParameterMapping.get(
+            name = uuid4(),
+            set = ProgramChange(patch = 0)
+        )
+
+        # Not coalesced messages are sent after the pending ones
+        client.set(mapping_1, 10, coalesce = True)
+        client.set(mapping_pc, 3)
+
+        self.assertEqual(midi.messages_sent, [mapping_1.set, mapping_pc.set])
+
+        client.set(mapping_1, 11, coalesce = True)
+        client.flush()
+
+        self.assertEqual(midi.messages_sent, [mapping_1.set, mapping_pc.set, mapping_1.set])
+
+        # Pending mapping set again without coalescing: Sent only once
+        client.set(mapping_2, 4, coalesce = True)
+        client.set(mapping_1, 12, coalesce = True)
+        client.set(mapping_2, 5)
+
+        self.assertEqual(midi.messages_sent, [mapping_1.set, mapping_pc.set, mapping_1.set, mapping_1.set, mapping_2.set])
+
+        client.flush()
+        self.assertEqual(len(midi.messages_sent), 5)
+
+
 ##############################################################################################
 
 
@@ -583,24 +682,28 @@ class TestClient(unittest.TestCase):
 
         listener = MockClientRequestListener()
 
-        client.request(mapping_1, listener)
+        with patch.object(client_module, "get_current_millis", return_value = 1000):
+            client.request(mapping_1, listener)
 
         self.assertEqual(len(midi.messages_sent), 1)
         self.assertEqual(midi.messages_sent[0], mapping_1.request)
         
         req = client.requests[0]        
-        req.lifetime = MockPeriodCounter()
-        client._Client__cleanup_terminated_period = MockPeriodCounter()
+        self.assertEqual(req.lifetime, 2000)
         
-        client.receive(None)
+        with patch.object(client_module, "get_current_millis", return_value = 3000):
+            client.receive(None)
         
         self.assertEqual(req.finished, False)
+        self.assertEqual(listener.request_terminated_calls, [])
 
-        req.lifetime.exceed_next_time = True
-        client._Client__cleanup_terminated_period.exceed_next_time = True
-        client.receive(None)
+        with patch.object(client_module, "get_current_millis", return_value = 3001):
+            client.receive(None)
 
         self.assertEqual(req.finished, True)
+        self.assertEqual(listener.request_terminated_calls, [mapping_1])
+        self.assertEqual(client.requests, [])
+        self.assertEqual(client.scheduler.num_in_flight, 0)
         
 
 ##############################################################################################
@@ -694,3 +797,786 @@ class TestClient(unittest.TestCase):
         self.assertEqual(mapping_1.value, 12)
         self.assertEqual(client.requests, [])
 
+
+##############################################################################################
+
+
+    def test_request_dependency_chain(self):        
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {},
+        )
+
+        mapping_root = self._create_sysex_mapping(0x01)
+        mapping_mid = self._create_sysex_mapping(0x02, depends = mapping_root)
+        mapping_leaf_1 = self._create_sysex_mapping(0x03, depends = mapping_mid)
+        mapping_leaf_2 = self._create_sysex_mapping(0x04, depends = mapping_mid)
+
+        listener_1 = MockClientRequestListener()
+        listener_2 = MockClientRequestListener()
+        listener_3 = MockClientRequestListener()
+
+        client.request(mapping_leaf_1, listener_1)
+        client.request(mapping_leaf_1, listener_2)
+        client.request(mapping_leaf_2, listener_3)
+
+        # Only the root is requested
+        self.assertEqual(midi.messages_sent, [mapping_root.request])
+        self.assertEqual(len(client.requests), 1)
+
+        # Root answers: Middle mapping is requested
+        client.receive(self._create_sysex_answer(0x01, 5))
+        self.assertEqual(midi.messages_sent, [mapping_root.request, mapping_mid.request])
+
+        # Middle answers: Both leaves are requested
+        client.receive(self._create_sysex_answer(0x02, 7))
+        self.assertEqual(midi.messages_sent, [mapping_root.request, mapping_mid.request, mapping_leaf_1.request, mapping_leaf_2.request])
+
+        client.receive(self._create_sysex_answer(0x03, 9))
+        client.receive(self._create_sysex_answer(0x04, 11))
+
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping_leaf_1])
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping_leaf_1])
+        self.assertEqual(listener_3.parameter_changed_calls, [mapping_leaf_2])
+        self.assertEqual(client.requests, [])
+
+        # Requesting again with unchanged root value does not request the dependents
+        client.request(mapping_leaf_1, listener_1)
+        client.receive(self._create_sysex_answer(0x01, 5))
+        self.assertEqual(len(midi.messages_sent), 5)
+        self.assertEqual(client.requests, [])
+
+        # Root changes, middle does not: Leaves are not requested again
+        client.request(mapping_leaf_1, listener_1)
+        client.receive(self._create_sysex_answer(0x01, 6))
+        client.receive(self._create_sysex_answer(0x02, 7))
+        self.assertEqual(len(midi.messages_sent), 7)
+        self.assertEqual(client.requests, [])
+
+
+    def test_request_dependency_terminate(self):        
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {},
+        )
+
+        mapping_root = self._create_sysex_mapping(0x01)
+        mapping_mid = self._create_sysex_mapping(0x02, depends = mapping_root)
+        mapping_leaf = self._create_sysex_mapping(0x03, depends = mapping_mid)
+
+        listener = MockClientRequestListener()
+
+        client.request(mapping_leaf, listener)
+        client.receive(self._create_sysex_answer(0x01, 5))
+        client.receive(self._create_sysex_answer(0x02, 7))
+        client.receive(self._create_sysex_answer(0x03, 9))
+        self.assertEqual(len(midi.messages_sent), 3)
+
+        # Root request terminates: Propagated to the listener of the leaf
+        client.request(mapping_leaf, listener)
+        self.assertEqual(len(client.requests), 1)
+
+        client.requests[0].terminate()
+        self.assertEqual(listener.request_terminated_calls, [mapping_leaf])
+
+        # After termination, the whole chain is requested again, even if the root value did not change
+        client.request(mapping_leaf, listener)
+        client.receive(self._create_sysex_answer(0x01, 5))
+        client.receive(self._create_sysex_answer(0x02, 7))
+        self.assertEqual(midi.messages_sent[-2:], [mapping_mid.request, mapping_leaf.request])
+
+
+    def test_request_dependency_child_terminate(self):        
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {},
+        )
+
+        mapping_root = self._create_sysex_mapping(0x01)
+        mapping_leaf = self._create_sysex_mapping(0x03, depends = mapping_root)
+
+        listener = MockClientRequestListener()
+
+        client.request(mapping_leaf, listener)
+        client.receive(self._create_sysex_answer(0x01, 5))
+        self.assertEqual(midi.messages_sent, [mapping_root.request, mapping_leaf.request])
+
+        # Dependent request terminates
+        self.assertEqual(len(client.requests), 1)
+        client.requests[0].terminate()
+        self.assertEqual(listener.request_terminated_calls, [mapping_leaf])
+
+        # The dependent mapping is requested again, even if the root value did not change
+        client.request(mapping_leaf, listener)
+        client.receive(self._create_sysex_answer(0x01, 5))
+        self.assertEqual(midi.messages_sent[-2:], [mapping_root.request, mapping_leaf.request])
+
+        client.receive(self._create_sysex_answer(0x03, 9))
+        self.assertEqual(listener.parameter_changed_calls, [mapping_leaf])
+        self.assertEqual(client.requests, [])
+
+
+    def test_request_dependency_late_child(self):        
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {},
+        )
+
+        mapping_root = self._create_sysex_mapping(0x01)
+        mapping_leaf_1 = self._create_sysex_mapping(0x03, depends = mapping_root)
+        mapping_leaf_2 = self._create_sysex_mapping(0x04, depends = mapping_root)
+
+        listener_1 = MockClientRequestListener()
+        listener_2 = MockClientRequestListener()
+        listener_3 = MockClientRequestListener()
+
+        client.request(mapping_leaf_1, listener_1)
+        client.receive(self._create_sysex_answer(0x01, 5))
+        client.receive(self._create_sysex_answer(0x03, 9))
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping_leaf_1])
+        self.assertEqual(client.requests, [])
+
+        # Child added after the root value has settled: Requested immediately
+        client.request(mapping_leaf_2, listener_2)
+        self.assertIn(mapping_leaf_2.request, midi.messages_sent)
+
+        client.receive(self._create_sysex_answer(0x01, 5))
+        client.receive(self._create_sysex_answer(0x04, 11))
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping_leaf_2])
+
+        # New listener for an existing child: Requested immediately, too
+        num_sent = len(midi.messages_sent)
+
+        client.request(mapping_leaf_1, listener_3)
+        self.assertIn(mapping_leaf_1.request, midi.messages_sent[num_sent:])
+
+        client.receive(self._create_sysex_answer(0x01, 5))
+        client.receive(self._create_sysex_answer(0x03, 9))
+        self.assertEqual(listener_3.parameter_changed_calls, [mapping_leaf_1])
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping_leaf_1])
+        self.assertEqual(client.requests, [])
+
+
+##############################################################################################
+
+
+    def test_request_cache(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {
+                "requestCacheTtlMillis": 100
+            }
+        )
+
+        mapping_1 = self._create_sysex_mapping(0x01)
+        mapping_2 = self._create_sysex_mapping(0x02, ttl = 0)
+        mapping_1.set = SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x02, 0x07, 0x01, 0x00, 0x04, 0x01]
+        )
+
+        listener_1 = MockClientRequestListener()
+        listener_2 = MockClientRequestListener()
+
+        with patch.object(client_module, "get_current_millis", return_value = 1000):
+            client.request(mapping_1, listener_1)
+            client.request(mapping_2, listener_1)
+            client.receive(self._create_sysex_answer(0x01, 5))
+            client.receive(self._create_sysex_answer(0x02, 6))
+
+        self.assertEqual(len(midi.messages_sent), 2)
+        self.assertEqual(listener_1.parameter_changed_calls, [mapping_1, mapping_2])
+        self.assertEqual(client.cache_misses, 1)
+        self.assertEqual(client.cache_hits, 0)
+
+        # Fresh value: Answered from the cache
+        with patch.object(client_module, "get_current_millis", return_value = 1100):
+            client.request(mapping_1, listener_2)
+            client.request(mapping_2, listener_2)
+
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request, mapping_2.request])
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping_1])
+        self.assertEqual(mapping_1.value, 5)
+        self.assertEqual(client.cache_hits, 1)
+        self.assertEqual(client.cache_misses, 1)
+
+        # Outdated value
+        with patch.object(client_module, "get_current_millis", return_value = 1101):
+            client.request(mapping_1, listener_2)
+
+        self.assertEqual(len(midi.messages_sent), 4)
+        self.assertEqual(client.cache_misses, 2)
+
+        with patch.object(client_module, "get_current_millis", return_value = 1200):
+            client.receive(self._create_sysex_answer(0x01, 7))
+            client.request(mapping_1, listener_2)
+
+        self.assertEqual(len(midi.messages_sent), 4)
+        self.assertEqual(listener_2.parameter_changed_calls, [mapping_1, mapping_1, mapping_1])
+        self.assertEqual(client.cache_hits, 2)
+
+        # Setting the value invalidates the cache
+        with patch.object(client_module, "get_current_millis", return_value = 1210):
+            client.set(mapping_1, 8)
+            client.request(mapping_1, listener_2)
+
+        self.assertEqual(midi.messages_sent[-2:], [mapping_1.set, mapping_1.request])
+        self.assertEqual(client.cache_misses, 3)
+
+
+    def test_request_cache_disabled(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {}
+        )
+
+        mapping_1 = self._create_sysex_mapping(0x01)
+        mapping_2 = self._create_sysex_mapping(0x02, ttl = 100)
+
+        listener = MockClientRequestListener()
+
+        with patch.object(client_module, "get_current_millis", return_value = 1000):
+            client.request(mapping_1, listener)
+            client.request(mapping_2, listener)
+            client.receive(self._create_sysex_answer(0x01, 5))
+            client.receive(self._create_sysex_answer(0x02, 6))
+
+            client.request(mapping_1, listener)
+            client.request(mapping_2, listener)
+
+        # Only the mapping with TTL is cached
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request, mapping_1.request])
+        self.assertEqual(client.cache_hits, 1)
+        self.assertEqual(client.cache_misses, 1)
+
+
+##############################################################################################
+
+
+    def test_statistics(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {
+                "clientStatistics": True
+            }
+        )
+
+        mapping_1 = self._create_sysex_mapping(0x01)
+        mapping_2 = self._create_sysex_mapping(0x02)
+
+        listener = MockClientRequestListener()
+
+        with patch.object(client_module, "get_current_millis", return_value = 1000):
+            client.request(mapping_1, listener)
+            client.request(mapping_2, listener)
+
+        with patch.object(client_module, "get_current_millis", return_value = 1015):
+            client.receive(self._create_sysex_answer(0x01, 5))
+
+        with patch.object(client_module, "get_current_millis", return_value = 1100):
+            client.request(mapping_1, listener)
+
+        with patch.object(client_module, "get_current_millis", return_value = 1105):
+            client.receive(self._create_sysex_answer(0x01, 6))
+
+            # Unrelated messages are not counted as unmatched responses
+            client.receive(self._create_sysex_answer(0x03, 6))
+            client.receive(ControlChange(control = 1, value = 2))
+
+            # Response of a known mapping without a waiting request
+            client.receive(self._create_sysex_answer(0x01, 7))
+
+        # Mapping 2 times out
+        with patch.object(client_module, "get_current_millis", return_value = 3001):
+            client.receive(None)
+
+        stats = client.statistics
+        self.assertEqual(set(stats.mappings), set([mapping_1, mapping_2]))
+        self.assertEqual(stats.unmatched_responses, 1)
+
+        entry_1 = stats.get(mapping_1)
+        self.assertEqual(entry_1.responses, 2)
+        self.assertEqual(entry_1.min, 5)
+        self.assertEqual(entry_1.max, 15)
+        self.assertEqual(entry_1.average, 10)
+        self.assertEqual(entry_1.timeouts, 0)
+        self.assertEqual(entry_1.histogram, [1, 1, 0, 0, 0, 0, 0, 0])
+
+        entry_2 = stats.get(mapping_2)
+        self.assertEqual(entry_2.responses, 0)
+        self.assertEqual(entry_2.average, None)
+        self.assertEqual(entry_2.timeouts, 1)
+
+        stats.reset()
+        self.assertEqual(stats.mappings, [])
+        self.assertEqual(stats.get(mapping_1), None)
+        self.assertEqual(stats.unmatched_responses, 0)
+
+    def test_statistics_disabled(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {}
+        )
+
+        mapping = self._create_sysex_mapping(0x01)
+        
+        client.request(mapping, MockClientRequestListener())
+        client.receive(self._create_sysex_answer(0x01, 5))
+        client.send_statistics()
+
+        self.assertEqual(client.statistics, None)
+        self.assertEqual(midi.messages_sent, [mapping.request])
+
+    def test_statistics_sysex_dump(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {
+                "clientStatistics": True,
+                "clientStatisticsDumpInterval": 1000
+            }
+        )
+
+        mapping = ClientParameterMapping.get(
+            name = "Stats",
+            request = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x05, 0x07, 0x41, 0x00, 0x04, 0x09]
+            ),
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0x01, 0x00, 0x04, 0x09]
+            )
+        )
+
+        with patch.object(client_module, "get_current_millis", return_value = 1000):
+            client.request(mapping, MockClientRequestListener())
+
+        with patch.object(client_module, "get_current_millis", return_value = 1300):
+            client.receive(self._create_sysex_answer(0x09, 5))
+            client.receive(self._create_sysex_answer(0x09, 6))
+
+        with patch.object(misc_module, "get_current_millis", return_value = 900):
+            client.send_requests()
+
+        self.assertEqual(len(midi.messages_sent), 1)
+
+        with patch.object(misc_module, "get_current_millis", return_value = 2000):
+            client.send_requests()
+
+        self.assertEqual(len(midi.messages_sent), 3)
+
+        header = midi.messages_sent[1]
+        self.assertEqual(header.manufacturer_id, b'\x7d')
+        self.assertEqual(header.data, bytes([0x00, 0x00, 0x01]))
+
+        entry = midi.messages_sent[2]
+        self.assertEqual(entry.manufacturer_id, b'\x7d')
+        self.assertEqual(entry.data, b"Stats" + bytes([
+            0x00,
+            0x00, 0x01,         # Responses
+            0x02, 0x2c,         # Min (300)
+            0x02, 0x2c,         # Avg
+            0x02, 0x2c,         # Max
+            0x00, 0x00,         # Timeouts
+            0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x01, 0x00, 0x00, 0x00, 0x00
+        ]))
+
+
+##############################################################################################
+
+
+    def test_receive_pipeline(self):
+        pipeline = ClientReceivePipeline()
+        calls = []
+
+        def handler(name, result):
+            def h(midi_message):
+                calls.append(name)
+                return result
+            return h
+        
+        pipeline.add(handler("requests", False), ClientReceivePipeline.ORDER_REQUESTS)
+        pipeline.add(handler("debug", True), ClientReceivePipeline.ORDER_DEBUG)
+        pipeline.add(handler("cc", False), ClientReceivePipeline.ORDER_PROTOCOL, status = 0xb0)
+        pipeline.add(handler("sysex", True), ClientReceivePipeline.ORDER_PROTOCOL, status = 0xf0, manufacturer_id = [0x00, 0x20, 0x33])
+        
+        sensing = handler("sysex_2", False)
+        pipeline.add(sensing, ClientReceivePipeline.ORDER_PROTOCOL, status = 0xf0)
+
+        self.assertEqual(len(pipeline), 5)
+
+        self.assertEqual(pipeline.receive(ControlChange(control = 1, value = 2)), True)
+        self.assertEqual(calls, ["cc", "requests", "debug"])
+
+        # Consumed by the SysEx stage
+        calls.clear()
+        self.assertEqual(pipeline.receive(SystemExclusive(manufacturer_id = [0x00, 0x20, 0x33], data = [0x00])), True)
+        self.assertEqual(calls, ["sysex"])
+
+        calls.clear()
+        self.assertEqual(pipeline.receive(SystemExclusive(manufacturer_id = [0x00, 0x20, 0x34], data = [0x00])), True)
+        self.assertEqual(calls, ["sysex_2", "requests", "debug"])
+
+        # Remove stage
+        pipeline.remove(sensing)
+        self.assertEqual(len(pipeline), 4)
+
+        calls.clear()
+        pipeline.receive(SystemExclusive(manufacturer_id = [0x00, 0x20, 0x34], data = [0x00]))
+        self.assertEqual(calls, ["requests", "debug"])
+
+
+    def test_receive_pipeline_client(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {}
+        )
+
+        mapping_1 = self._create_sysex_mapping(0x01)
+        listener = MockClientRequestListener()
+        client.request(mapping_1, listener)
+
+        # Custom stage before the requests
+        consumed = []
+        def consume(midi_message):
+            consumed.append(midi_message)
+            return True
+
+        client.receive_pipeline.add(consume, ClientReceivePipeline.ORDER_PROTOCOL, status = 0xb0)
+
+        cc = ControlChange(control = 1, value = 2)
+        self.assertEqual(client.receive(cc), True)
+        self.assertEqual(consumed, [cc])
+
+        self.assertEqual(client.receive(self._create_sysex_answer(0x01, 5)), True)
+        self.assertEqual(listener.parameter_changed_calls, [mapping_1])
+        self.assertEqual(len(consumed), 1)
+
+        self.assertEqual(client.receive(self._create_sysex_answer(0x02, 5)), False)
+
+
+    def test_receive_pipeline_debug_unparsed(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {
+                "debugUnparsedMessages": True
+            }
+        )
+
+        mapping_1 = self._create_sysex_mapping(0x01)
+        listener = MockClientRequestListener()
+        client.request(mapping_1, listener)
+
+        printed = []
+
+        with patch.object(client, "print_message", side_effect = lambda msg: printed.append(msg)):
+            # Parsed messages do not reach the debug stage
+            self.assertEqual(client.receive(self._create_sysex_answer(0x01, 5)), True)
+            self.assertEqual(printed, [])
+
+            # Unparsed messages are printed, but not consumed
+            answer = self._create_sysex_answer(0x02, 5)
+            self.assertEqual(client.receive(answer), False)
+            self.assertEqual(printed, [answer])
+
+
+##############################################################################################
+
+
+    def test_response_index(self):        
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {},
+        )
+
+        mapping_1 = ClientParameterMapping.get(
+            name = "test_response_index_1",
+            request = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x05, 0x07, 0x41, 0x00, 0x04, 0x01]
+            ),
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0x01, 0x00, 0x04, 0x01]
+            )
+        )
+
+        mapping_2 = ClientParameterMapping.get(
+            name = "test_response_index_2",
+            request = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x05, 0x07, 0x41, 0x00, 0x04, 0x02]
+            ),
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0x01, 0x00, 0x04, 0x02]
+            )
+        )
+
+        mapping_3 = ClientParameterMapping.get(
+            name = "test_response_index_3",
+            request = ControlChange(7, 0),
+            response = ControlChange(7, 0)
+        )
+
+        listener = MockClientRequestListener()
+
+        client.request(mapping_1, listener)
+        client.request(mapping_2, listener)
+        client.request(mapping_3, listener)
+
+        self.assertEqual(len(client.requests), 3)
+        self.assertEqual(len(client._Client__response_index), 3)
+        self.assertEqual(client.get_matching_request(mapping_2), client.requests[1])
+
+        # Message for mapping 2
+        client.receive(SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x00, 0x00, 0x01, 0x00, 0x04, 0x02, 0x00, 0x05]
+        ))
+
+        self.assertEqual(listener.parameter_changed_calls, [mapping_2])
+        self.assertEqual(mapping_1.value, None)
+        self.assertEqual(mapping_2.value, 5)
+        self.assertEqual(mapping_3.value, None)
+
+        self.assertEqual(len(client.requests), 2)
+        self.assertEqual(len(client._Client__response_index), 2)
+        self.assertEqual(client.get_matching_request(mapping_2), None)
+
+        # Message for nobody
+        self.assertEqual(client.receive(ControlChange(8, 3)), False)
+        self.assertEqual(len(client.requests), 2)
+
+        # Message for mapping 3
+        self.assertEqual(client.receive(ControlChange(7, 3)), True)
+
+        self.assertEqual(listener.parameter_changed_calls, [mapping_2, mapping_3])
+        self.assertEqual(mapping_3.value, 3)
+
+        self.assertEqual(client.requests[0].mapping, mapping_1)
+        self.assertEqual(len(client._Client__response_index), 1)
+
+        # Request mapping 2 again
+        client.request(mapping_2, listener)
+        self.assertEqual(len(client.requests), 2)
+        self.assertEqual(len(client._Client__response_index), 2)
+
+
+##############################################################################################
+
+
+    def _create_sysex_mapping(self, address, priority = 0, min_interval = 0, depends = None, ttl = None):
+        return ClientParameterMapping.get(
+            name = uuid4(),
+            depends = depends,
+            ttl = ttl,
+            request = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x05, 0x07, 0x41, 0x00, 0x04, address]
+            ),
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0x01, 0x00, 0x04, address]
+            ),
+            priority = priority,
+            min_interval = min_interval
+        )
+    
+    def _create_sysex_answer(self, address, value):
+        return SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x00, 0x00, 0x01, 0x00, 0x04, address, 0x00, value]
+        )
+
+
+    def test_scheduler_max_in_flight(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {
+                "maxRequestsInFlight": 2
+            }
+        )
+
+        mapping_1 = self._create_sysex_mapping(0x01)
+        mapping_2 = self._create_sysex_mapping(0x02)
+        mapping_3 = self._create_sysex_mapping(0x03)
+
+        listener = MockClientRequestListener()
+
+        client.request(mapping_1, listener)
+        client.request(mapping_2, listener)
+        client.request(mapping_3, listener)
+
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request])
+        self.assertEqual(client.scheduler.num_in_flight, 2)
+        self.assertEqual(client.scheduler.num_queued, 1)
+
+        # No capacity yet
+        client.send_requests()
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request])
+
+        # Requesting again does not queue twice
+        client.request(mapping_3, listener)
+        self.assertEqual(client.scheduler.num_queued, 1)
+        
+        # Answer for mapping 1 frees a slot
+        client.receive(self._create_sysex_answer(0x01, 5))
+        self.assertEqual(listener.parameter_changed_calls, [mapping_1])
+        self.assertEqual(client.scheduler.num_in_flight, 1)
+        
+        client.send_requests()
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request, mapping_3.request])
+        self.assertEqual(client.scheduler.num_in_flight, 2)
+        self.assertEqual(client.scheduler.num_queued, 0)
+
+
+    def test_scheduler_max_per_tick_and_priorities(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {
+                "maxRequestsPerTick": 1
+            }
+        )
+
+        mapping_1 = self._create_sysex_mapping(0x01)
+        mapping_2 = self._create_sysex_mapping(0x02)
+        mapping_3 = self._create_sysex_mapping(0x03, priority = 10)
+        mapping_4 = self._create_sysex_mapping(0x04, priority = 5)
+
+        client.request(mapping_1)
+        client.request(mapping_2)
+        client.request(mapping_3)
+        client.request(mapping_4)
+
+        self.assertEqual(midi.messages_sent, [mapping_1.request])
+
+        client.send_requests()
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_3.request])
+
+        client.send_requests()
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_3.request, mapping_4.request])
+
+        client.send_requests()
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_3.request, mapping_4.request, mapping_2.request])
+
+        client.send_requests()
+        self.assertEqual(len(midi.messages_sent), 4)
+
+
+    def test_scheduler_min_interval(self):
+        midi = MockAdafruitMIDI.MIDI()
+
+        client = Client(
+            midi = midi,
+            config = {}
+        )
+
+        mapping_1 = self._create_sysex_mapping(0x01, min_interval = 100)
+        mapping_2 = self._create_sysex_mapping(0x02)
+
+        with patch.object(client_module, "get_current_millis", return_value = 1000):
+            client.request(mapping_1)
+            client.receive(self._create_sysex_answer(0x01, 5))
+
+        self.assertEqual(len(midi.messages_sent), 1)
+        self.assertEqual(client.requests, [])
+
+        with patch.object(client_module, "get_current_millis", return_value = 1050):
+            client.request(mapping_1)
+            
+            # Requests for other mappings are not affected
+            client.request(mapping_2)
+            
+            client.send_requests()
+
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request])
+        self.assertEqual(client.scheduler.num_queued, 1)
+
+        # The queued request must not time out
+        self.assertEqual(client.requests[0].sent, False)
+
+        with patch.object(client_module, "get_current_millis", return_value = 1100):
+            client.send_requests()
+
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_2.request, mapping_1.request])
+        self.assertEqual(client.scheduler.num_queued, 0)
+
+
+##############################################################################################
+
+
+    def test_send_priorities(self):
+        midi = MockPrioritizedMidi()
+
+        client = Client(
+            midi = midi,
+            config = {}
+        )
+
+        mapping_1 = MockParameterMapping(
+            set = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02, 0x03, 0x04]
+            ),
+            request = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x05, 0x07, 0x09]
+            ),
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0x09]
+            )
+        )
+
+        client.request(mapping_1)
+        client.set(mapping_1, 33)
+        client.send(ControlChange(3, 4))
+
+        self.assertEqual(midi.messages_sent[:2], [mapping_1.request, mapping_1.set])
+        self.assertEqual(midi.priorities, [
+            MidiOutputQueue.PRIORITY_LOW,
+            MidiOutputQueue.PRIORITY_HIGH,
+            MidiOutputQueue.PRIORITY_NORMAL
+        ])
+
+        # MIDI handlers without priorities
+        midi = MockMidiController()
+
+        client = Client(
+            midi = midi,
+            config = {}
+        )
+
+        client.request(mapping_1)
+        client.set(mapping_1, 33)
+
+        self.assertEqual(midi.messages_sent, [mapping_1.request, mapping_1.set])
@@ -40,6 +40,67 @@ class TestClientParameterMapping(unittest.TestCase):
         with self.assertRaises(Exception):
             ClientParameterMapping.get(name = None)
 
+        with self.assertRaises(Exception):
+            ClientTwoPartParameterMapping.get(name = None)
+
+    def test_registry(self):
+        mapping_1 = ClientParameterMapping.get(name = "registrytest")
+        self.assertIs(ClientParameterMapping.get(name = "registrytest"), mapping_1)
+        
+        # Two-part mappings share the same namespace
+        self.assertIs(ClientTwoPartParameterMapping.get(name = "registrytest"), mapping_1)
+
+        mapping_2 = ClientTwoPartParameterMapping.get(name = "registrytest2")
+        self.assertIs(ClientParameterMapping.get(name = "registrytest2"), mapping_2)
+        self.assertIsInstance(mapping_2, ClientTwoPartParameterMapping)
+
+    def test_registered_mappings(self):
+        mapping_dep = ClientParameterMapping.get(name = "registeredtest_dep")
+
+        ClientParameterMapping.get(
+            name = "registeredtest",
+            set = ControlChange(
+                control = 12,
+                value = 0
+            ),
+            request = SystemExclusive(
+                manufacturer_id = [0x00, 0x20, 0x33],
+                data = [0x02, 0x7f, 0x41, 0x00, 0x32, 0x03]
+            ),
+            response = [
+                SystemExclusive(
+                    manufacturer_id = [0x00, 0x20, 0x33],
+                    data = [0x02, 0x7f, 0x01, 0x00, 0x32, 0x03]
+                ),
+                ProgramChange(
+                    patch = 0
+                )
+            ],
+            type = ClientParameterMapping.PARAMETER_TYPE_STRING,
+            depends = mapping_dep
+        )
+
+        info = [i for i in ClientParameterMapping.registered_mappings() if i["name"] == "registeredtest"]
+        self.assertEqual(info, [
+            {
+                "name": "registeredtest",
+                "class": "ClientParameterMapping",
+                "type": "string",
+                "set": "ControlChange 12",
+                "request": "SystemExclusive [0, 20, 33] [2, 7f, 41, 0, 32, 3]",
+                "response": [
+                    "SystemExclusive [0, 20, 33] [2, 7f, 1, 0, 32, 3]",
+                    "ProgramChange"
+                ],
+                "depends": "registeredtest_dep"
+            }
+        ])
+
+        info_dep = [i for i in ClientParameterMapping.registered_mappings() if i["name"] == "registeredtest_dep"]
+        self.assertEqual(info_dep[0]["type"], "numeric")
+        self.assertEqual(info_dep[0]["set"], None)
+        self.assertEqual(info_dep[0]["depends"], None)
+
 
     #####################################################################################
 
@@ -344,6 +405,77 @@ class TestClientParameterMapping(unittest.TestCase):
         self.assertEqual(list(mapping.set.data[0:6]), [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa])
 
 
+    def test_set_value_sysex_preallocated(self):
+        template = SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa]
+        )
+
+        mapping = ClientParameterMapping.get(
+            name = uuid4(),
+            set = [
+                template,
+                ControlChange(
+                    control = 19,
+                    value = 0
+                )
+            ]
+        )
+
+        mapping.set_value([258, 4])
+        
+        msg = mapping.set[0]
+        self.assertIsInstance(msg, PreallocatedSystemExclusive)
+        self.assertIsInstance(msg, SystemExclusive)
+        self.assertEqual(msg.manufacturer_id, [0x00, 0x10, 0x20])
+        self.assertEqual(list(msg.data), [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa, 0x02, 0x02])
+        self.assertEqual(list(msg.__bytes__()), [0xf0, 0x00, 0x10, 0x20, 0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa, 0x02, 0x02, 0xf7])
+
+        buffer = msg.buffer
+
+        # Values are patched in place
+        mapping.set_value([3, 5])
+        self.assertIs(mapping.set[0], msg)
+        self.assertIs(msg.__bytes__(), buffer)
+        self.assertEqual(list(buffer), [0xf0, 0x00, 0x10, 0x20, 0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa, 0x00, 0x03, 0xf7])
+        self.assertEqual(mapping.set[1].value, 5)
+
+        # Template is not touched
+        self.assertEqual(template.data, [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa])
+
+    def test_sysex_preallocated_bytes_contract(self):
+        msg = PreallocatedSystemExclusive(
+            SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02]
+            )
+        )
+
+        # __bytes__() returns the buffer itself (no copy, so sending does not allocate)
+        data = msg.__bytes__()
+        self.assertIs(data, msg.buffer)
+        self.assertIsInstance(data, bytearray)
+        self.assertEqual(bytes(data), bytes([0xf0, 0x00, 0x10, 0x20, 0x01, 0x02, 0xf7]))
+
+        # Changes to the data are visible in the returned buffer, so it has to be copied when kept
+        msg.data[1] = 0x05
+        self.assertEqual(bytes(data), bytes([0xf0, 0x00, 0x10, 0x20, 0x01, 0x05, 0xf7]))
+
+        # bytes(msg) is not supported: Callers must use __bytes__() like adafruit_midi does
+        with self.assertRaises(TypeError):
+            bytes(msg)
+
+        # Longer messages are not cut
+        msg = PreallocatedSystemExclusive(
+            SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa, 0x01, 0x02, 0x03]
+            ),
+            8
+        )
+        self.assertEqual(list(msg.data), [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa, 0x01, 0x02, 0x03])
+
+
     def test_set_value_sysex_string(self):
         mapping = ClientParameterMapping.get(
             name = uuid4(),
@@ -505,3 +637,138 @@ class TestClientParameterMapping(unittest.TestCase):
         self.assertEqual(mapping.result_finished(), True)
         self.assertEqual(mapping.value, 11 * 128 + 34)
 
+
+
+####################################################################################################
+
+
+    def test_response_keys(self):
+        mapping_sysex = ClientParameterMapping.get(
+            name = uuid4(),
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa, 0x00, 0x00]
+            )            
+        )
+
+        mapping_cc = ClientParameterMapping.get(
+            name = uuid4(),
+            response = ControlChange(
+                control = 112,
+                value = 0
+            )
+        )
+
+        mapping_2part = ClientTwoPartParameterMapping.get(
+            name = uuid4(),
+            response = [
+                ControlChange(
+                    control = 112,
+                    value = 0
+                ),
+                ProgramChange(
+                    patch = 0
+                )
+            ]         
+        )
+
+        mapping_no_response = ClientParameterMapping.get(
+            name = uuid4()
+        )
+
+        key_sysex = mapping_sysex.response_keys()[0]
+        key_cc = mapping_cc.response_keys()[0]
+
+        self.assertIsInstance(key_sysex, int)
+        self.assertEqual(mapping_sysex.response_keys(), [key_sysex])
+        self.assertEqual(mapping_cc.response_keys(), [key_cc])
+        self.assertEqual(mapping_2part.response_keys(), [key_cc, get_message_key(ProgramChange(patch = 0))])
+        self.assertEqual(mapping_no_response.response_keys(), None)
+
+        # Keys of matching messages must be equal (the first two data bytes and the values are ignored)
+        self.assertEqual(
+            get_message_key(SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02, 0xd9, 0x01, 0x04, 0xaa, 0x45, 0x03]
+            )), 
+            mapping_sysex.response_keys()[0]
+        )
+
+        self.assertEqual(get_message_key(ControlChange(control = 112, value = 45)), key_cc)
+        self.assertEqual(get_message_key(ProgramChange(patch = 4)), get_message_key(ProgramChange(patch = 7)))
+        self.assertEqual(get_message_key(None), None)
+
+        # Different addresses, manufacturer IDs and controls lead to different keys
+        self.assertNotEqual(
+            get_message_key(SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02, 0xd9, 0x01, 0x04, 0xab, 0x45, 0x03]
+            )), 
+            key_sysex
+        )
+
+        self.assertNotEqual(
+            get_message_key(SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x21],
+                data = [0x01, 0x02, 0xd9, 0x01, 0x04, 0xaa, 0x45, 0x03]
+            )), 
+            key_sysex
+        )
+
+        self.assertNotEqual(get_message_key(ControlChange(control = 113, value = 45)), key_cc)
+
+
+##############################################################################################
+
+
+    def test_response_statuses(self):
+        ClientParameterMapping.get(
+            name = uuid4(),
+            set = ProgramChange(0)
+        )
+
+        ClientParameterMapping.get(
+            name = uuid4(),
+            response = ControlChange(10, 0)
+        )
+
+        ClientTwoPartParameterMapping.get(
+            name = uuid4(),
+            response = [
+                ControlChange(11, 0),
+                SystemExclusive(
+                    manufacturer_id = [0x00, 0x10, 0x20],
+                    data = [0x00, 0x00, 0x09]
+                )
+            ]
+        )
+
+        statuses = ClientParameterMapping.response_statuses()
+
+        self.assertIn(0xb0, statuses)
+        self.assertIn(0xf0, statuses)
+        self.assertEqual(len(statuses), len(set(statuses)))
+
+
+    def test_set_group_parent(self):
+        parent = ClientParameterMapping.get(name = uuid4())
+        child_1 = ClientParameterMapping.get(name = uuid4())
+        child_2 = ClientParameterMapping.get(name = uuid4())
+        grandchild = ClientParameterMapping.get(name = uuid4())
+
+        ClientParameterMapping.set_group_parent(parent, [child_1, child_2])
+        ClientParameterMapping.set_group_parent(child_1, [grandchild])
+
+        self.assertEqual(child_1.depends, parent)
+        self.assertEqual(child_2.depends, parent)
+        self.assertEqual(grandchild.depends, child_1)
+        self.assertEqual(parent.depends, None)
+
+        # Circular dependencies
+        with self.assertRaises(Exception):
+            ClientParameterMapping.set_group_parent(grandchild, [parent])
+
+        with self.assertRaises(Exception):
+            ClientParameterMapping.set_group_parent(parent, [parent])
+
+        self.assertEqual(parent.depends, None)
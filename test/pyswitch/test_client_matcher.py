@@ -0,0 +1,248 @@
+import sys
+import unittest
+from unittest.mock import patch   # Necessary workaround! Needs to be separated.
+
+from .mocks_lib import *
+
+# Import subject under test
+with patch.dict(sys.modules, {
+    "micropython": MockMicropython,
+    "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+    "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+    "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+    "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+    "gc": MockGC()
+}):
+    from adafruit_midi.system_exclusive import SystemExclusive
+    from adafruit_midi.control_change import ControlChange
+    from adafruit_midi.program_change import ProgramChange
+    from adafruit_midi.midi_message import MIDIUnknownEvent
+
+    from lib.pyswitch.controller.client import ResponseMatcher, StringInterner, ClientParameterMapping, get_message_key
+
+
+# Message data which fails on slicing or iteration (both allocate on CircuitPython)
+class MockInPlaceData(list):
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            raise Exception("Data must not be sliced")
+        
+        return super().__getitem__(index)
+    
+    def __iter__(self):
+        raise Exception("Data must not be iterated")
+
+
+# Reference implementation of the former (uncompiled) template matching, for comparison
+def _match_reference(midi_message, response, type):
+    if isinstance(midi_message, SystemExclusive):
+        if not isinstance(response, SystemExclusive):
+            return None
+        
+        if midi_message.manufacturer_id != response.manufacturer_id:
+            return None
+        
+        if midi_message.data[2:6] != response.data[2:6]:
+            return None
+        
+        if type == ClientParameterMapping.PARAMETER_TYPE_STRING:
+            return ''.join(chr(int(c)) for c in list(midi_message.data[6:-1]))
+        else:
+            return midi_message.data[-2] * 128 + midi_message.data[-1]
+
+    elif isinstance(midi_message, ControlChange):
+        if not isinstance(response, ControlChange):
+            return None
+        
+        if midi_message.control == response.control:
+            return midi_message.value
+
+    elif isinstance(midi_message, ProgramChange):
+        if not isinstance(response, ProgramChange):
+            return None
+        
+        return midi_message.patch
+    
+    return None
+
+
+class TestResponseMatcher(unittest.TestCase):
+
+    def _templates(self):
+        return [
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00, 0x00, 0x01, 0x00, 0x32, 0x03])
+            ),
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00, 0x00, 0x03, 0x00, 0x00, 0x01])
+            ),
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00, 0x00, 0x03])
+            ),
+            ControlChange(control = 12),
+            ControlChange(control = 13),
+            ProgramChange(patch = 0),
+            MIDIUnknownEvent(status = 0xf8)
+        ]
+    
+    def _messages(self):
+        return [
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00, 0x00, 0x01, 0x00, 0x32, 0x03, 0x01, 0x23])
+            ),
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x34]),
+                data = bytes([0x00, 0x00, 0x01, 0x00, 0x32, 0x03, 0x01, 0x23])
+            ),
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00, 0x00, 0x01, 0x00, 0x32, 0x04, 0x01, 0x23])
+            ),
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00, 0x00, 0x03, 0x00, 0x00, 0x01, 0x41, 0x62, 0x63, 0x00])
+            ),
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00, 0x00, 0x03])
+            ),
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00, 0x00, 0x03, 0x00])
+            ),
+            SystemExclusive(
+                manufacturer_id = bytes([0x00, 0x20, 0x33]),
+                data = bytes([0x00])
+            ),
+            ControlChange(control = 12, value = 45),
+            ControlChange(control = 14, value = 45),
+            ProgramChange(patch = 7),
+            MIDIUnknownEvent(status = 0xf8)
+        ]
+
+    def test_match(self):
+        matcher = ResponseMatcher(
+            SystemExclusive(
+                manufacturer_id = [0x00, 0x20, 0x33],
+                data = [0x00, 0x00, 0x01, 0x00, 0x32, 0x03]
+            )
+        )
+
+        self.assertEqual(matcher.status, 0xf0)
+
+        self.assertEqual(matcher.match(SystemExclusive(
+            manufacturer_id = [0x00, 0x20, 0x33],
+            data = [0x02, 0x7f, 0x01, 0x00, 0x32, 0x03, 0x01, 0x02]
+        )), 130)
+
+        self.assertEqual(matcher.match(SystemExclusive(
+            manufacturer_id = [0x00, 0x20, 0x33],
+            data = [0x02, 0x7f, 0x01, 0x00, 0x32, 0x04, 0x01, 0x02]
+        )), None)
+
+        self.assertEqual(matcher.match(ControlChange(control = 12, value = 3)), None)
+        self.assertEqual(matcher.match(MIDIUnknownEvent(status = 0xf8)), None)
+
+        matcher = ResponseMatcher(MIDIUnknownEvent(status = 0xf8))
+        self.assertEqual(matcher.status, None)
+        self.assertEqual(matcher.match(MIDIUnknownEvent(status = 0xf8)), None)
+
+    def test_equivalence(self):
+        for type in [ClientParameterMapping.PARAMETER_TYPE_NUMERIC, ClientParameterMapping.PARAMETER_TYPE_STRING]:
+            for template in self._templates():
+                matcher = ResponseMatcher(template, type)
+
+                for msg in self._messages():
+                    self.assertEqual(matcher.match(msg), _match_reference(msg, template, type))
+
+    # The message bytes are only read in place when computing the key and matching
+    def test_in_place(self):
+        for type in [ClientParameterMapping.PARAMETER_TYPE_NUMERIC, ClientParameterMapping.PARAMETER_TYPE_STRING]:
+            for template in self._templates():
+                matcher = ResponseMatcher(template, type)
+
+                for msg in self._messages():
+                    if not isinstance(msg, SystemExclusive):
+                        continue
+
+                    in_place = SystemExclusive(
+                        manufacturer_id = MockInPlaceData(msg.manufacturer_id),
+                        data = MockInPlaceData(msg.data)
+                    )
+
+                    self.assertEqual(get_message_key(in_place), get_message_key(msg))
+
+                    # Strings are decoded by the interner, which only slices when a string is not cached yet, so
+                    # the original message is matched first
+                    expected = matcher.match(msg)
+                    self.assertEqual(matcher.match(in_place), expected)
+
+    # Messages matching a template have the same key as the template
+    def test_key(self):
+        for template in self._templates():
+            matcher = ResponseMatcher(template)
+
+            for msg in self._messages():
+                if matcher.match(msg) != None:
+                    self.assertEqual(get_message_key(msg), matcher.key)
+
+
+##############################################################################
+
+
+class TestStringInterner(unittest.TestCase):
+
+    def test_decode(self):
+        interner = StringInterner()
+
+        data = [0x00, 0x00, 0x03, 0x00, 0x00, 0x01, 0x46, 0x6f, 0x6f, 0x00]
+        data_2 = bytes(data)
+
+        s_1 = interner.decode(data, 6, len(data) - 1)
+        self.assertEqual(s_1, "Foo")
+        self.assertEqual(len(interner), 1)
+
+        # Same content: Same object
+        s_2 = interner.decode(data_2, 6, len(data_2) - 1)
+        self.assertIs(s_2, s_1)
+        self.assertEqual(len(interner), 1)
+
+        # Different content
+        self.assertEqual(interner.decode(data, 6, len(data) - 2), "Fo")
+        self.assertEqual(interner.decode(data, 6, 6), "")
+        self.assertEqual(interner.decode(data, 6, 2), "")
+        self.assertEqual(len(interner), 2)
+
+    def test_bounded(self):
+        interner = StringInterner(size = 3)
+
+        strings = [interner.decode(bytes([0x41 + i]), 0, 1) for i in range(5)]
+        self.assertEqual(strings, ["A", "B", "C", "D", "E"])
+        self.assertEqual(len(interner), 3)
+
+        # The most recent ones are still cached
+        self.assertIs(interner.decode(bytes([0x45]), 0, 1), strings[4])
+        self.assertIs(interner.decode(bytes([0x43]), 0, 1), strings[2])
+        self.assertEqual(len(interner), 3)
+
+    def test_matcher_string(self):
+        matcher = ResponseMatcher(
+            SystemExclusive(
+                manufacturer_id = [0x00, 0x20, 0x33],
+                data = [0x00, 0x00, 0x03, 0x00, 0x00, 0x01]
+            ),
+            ClientParameterMapping.PARAMETER_TYPE_STRING
+        )
+
+        msg = SystemExclusive(
+            manufacturer_id = [0x00, 0x20, 0x33],
+            data = bytes([0x00, 0x00, 0x03, 0x00, 0x00, 0x01, 0x52, 0x69, 0x67, 0x20, 0x31, 0x00])
+        )
+
+        value = matcher.match(msg)
+        self.assertEqual(value, "Rig 1")
+        self.assertIs(matcher.match(msg), value)
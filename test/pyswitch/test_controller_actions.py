@@ -17,6 +17,8 @@ with patch.dict(sys.modules, {
 }):
     from lib.pyswitch.controller.controller import Controller
     from lib.pyswitch.controller.inputs import SwitchController, ContinuousController
+    import lib.pyswitch.misc as misc_module
+    from adafruit_midi.program_change import ProgramChange
     from .mocks_appl import *
 
 
@@ -186,6 +188,136 @@ class TestControllerActions(unittest.TestCase):
         self.assertEqual(action_2.num_update_calls_overall, 2)
         self.assertEqual(action_3.num_update_calls_overall, 2)
         
+    def test_update_budget(self):
+        switch_1 = MockSwitch()
+        switch_2 = MockSwitch()
+
+        # Each update takes 6ms
+        time = [0]
+        
+        class MockTimedAction(MockAction):
+            def update(self):
+                super().update()
+                time[0] += 6
+
+        action_1 = MockTimedAction()
+        action_2 = MockTimedAction()
+        action_3 = MockTimedAction()
+
+        period = MockPeriodCounter()
+        midi = MockMidiController()
+
+        appl = Controller(
+            led_driver = MockNeoPixelDriver(),
+            midi = midi,
+            inputs = [
+                {
+                    "assignment": {
+                        "model": switch_1
+                    },
+                    "actions": [
+                        action_1                        
+                    ]
+                },
+                {
+                    "assignment": {
+                        "model": switch_2
+                    },
+                    "actions": [
+                        action_2,
+                        action_3
+                    ]
+                }
+            ],
+            period_counter = period,
+            config = {
+                "updateBudgetMillis": 10
+            }
+        )
+
+        appl.init()
+
+        with patch.object(misc_module, "get_current_millis", side_effect = lambda: time[0]):
+            period.exceed_next_time = True
+            appl.tick()
+
+            self.assertEqual(action_1.num_update_calls_overall, 1)
+            self.assertEqual(action_2.num_update_calls_overall, 1)
+            self.assertEqual(action_3.num_update_calls_overall, 0)
+
+            self.assertEqual(appl.update_scheduler.overruns, 1)
+
+            # MIDI is received in the next tick before the round is continued
+            midi_message = ProgramChange(1)
+            midi.next_receive_messages = [midi_message]
+
+            appl.tick()
+
+            self.assertEqual(action_1.num_update_calls_overall, 1)
+            self.assertEqual(action_2.num_update_calls_overall, 1)
+            self.assertEqual(action_3.num_update_calls_overall, 1)
+            self.assertEqual(midi.next_receive_messages, [])
+
+            self.assertEqual(appl.update_scheduler.overruns, 1)
+            self.assertEqual(appl.update_scheduler.ticks, 2)
+
+            appl.tick()
+
+            self.assertEqual(action_1.num_update_calls_overall, 1)
+            self.assertEqual(action_2.num_update_calls_overall, 1)
+            self.assertEqual(action_3.num_update_calls_overall, 1)
+
+    def test_update_interval(self):
+        switch_1 = MockSwitch()
+        
+        action_1 = MockAction()
+        action_2 = MockAction({
+            "updateInterval": 50
+        })
+
+        period = MockPeriodCounter()
+
+        appl = Controller(
+            led_driver = MockNeoPixelDriver(),
+            midi = MockMidiController(),
+            inputs = [
+                {
+                    "assignment": {
+                        "model": switch_1
+                    },
+                    "actions": [
+                        action_1,
+                        action_2
+                    ]
+                }
+            ],
+            period_counter = period
+        )
+
+        appl.init()
+
+        self.assertIn(action_1, appl.updateables)
+        self.assertIn(action_2, appl.timed_updateables)
+
+        with patch.object(misc_module, "get_current_millis", return_value = 1000):
+            appl.tick()
+
+        self.assertEqual(action_1.num_update_calls_overall, 0)
+        self.assertEqual(action_2.num_update_calls_overall, 1)
+
+        with patch.object(misc_module, "get_current_millis", return_value = 1030):
+            period.exceed_next_time = True
+            appl.tick()
+
+        self.assertEqual(action_1.num_update_calls_overall, 1)
+        self.assertEqual(action_2.num_update_calls_overall, 1)
+
+        with patch.object(misc_module, "get_current_millis", return_value = 1051):
+            appl.tick()
+
+        self.assertEqual(action_1.num_update_calls_overall, 1)
+        self.assertEqual(action_2.num_update_calls_overall, 2)
+
     def test_reset_actions(self):
         switch_1 = MockSwitch()
         switch_2 = MockSwitch()
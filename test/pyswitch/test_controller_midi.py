@@ -18,6 +18,72 @@ with patch.dict(sys.modules, {
     from adafruit_midi.system_exclusive import SystemExclusive
     from .mocks_appl import *
     from lib.pyswitch.controller.controller import Controller
+    from lib.pyswitch.controller.client import ClientParameterMapping
+    from lib.pyswitch.controller.midi import MidiController, MidiRouting
+    import lib.pyswitch.misc as misc_module
+
+
+class MockReceivingClient:
+    def __init__(self):
+        self.receive_calls = []
+
+    def receive(self, midi_message):
+        self.receive_calls.append(midi_message)
+
+    def send_requests(self):
+        pass
+
+    def flush(self):
+        pass
+
+
+# Client taking some time to parse each message (time is advanced on the passed list)
+class MockSlowClient(MockReceivingClient):
+    def __init__(self, now, millis_per_message):
+        super().__init__()
+        self.now = now
+        self.millis_per_message = millis_per_message
+
+    def receive(self, midi_message):
+        super().receive(midi_message)
+        self.now[0] += self.millis_per_message
+
+
+class MockCountingSwitch(MockSwitch):
+    def __init__(self):
+        super().__init__()
+        self.num_pushed_calls = 0
+
+    @property
+    def pushed(self):
+        self.num_pushed_calls += 1
+        return False
+
+
+class MockFilteredMidiController(MockMidiController):
+    def __init__(self):
+        super().__init__()
+        self.set_input_filter_calls = []
+
+    def set_input_filter(self, statuses):
+        self.set_input_filter_calls.append(statuses)
+
+    def set_clock_tracker(self, tracker):
+        self.clock = tracker
+
+
+# Message with a status not used by the other tests (pitch bend)
+class MockPitchBend:
+    _STATUS = 0xe0
+
+
+class MockFlushingMidiController(MockMidiController):
+    def __init__(self):
+        super().__init__()
+        self.num_flush_calls = 0
+
+    def flush(self):
+        self.num_flush_calls += 1
 
 
 class TestControllerMidi(unittest.TestCase):
@@ -64,3 +130,326 @@ class TestControllerMidi(unittest.TestCase):
 
 
 
+
+
+    def test_receive_batch(self):
+        source = MockMidiController()
+        switch = MockCountingSwitch()
+
+        appl = Controller(
+            led_driver = MockNeoPixelDriver(),
+            midi = MidiController(
+                routings = [
+                    MidiRouting(
+                        source = source,
+                        target = MidiRouting.APPLICATION
+                    )
+                ]
+            ),
+            config = {
+                "maxConsecutiveMidiMessages": 2
+            },
+            inputs = [
+                {
+                    "assignment": {
+                        "model":  switch
+                    }
+                }
+            ]
+        )
+
+        appl.init()
+
+        client = MockReceivingClient()
+        appl.client = client
+
+        msgs = [
+            SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02, 0x03, i]
+            )
+            for i in range(5)
+        ]
+        source.next_receive_messages = list(msgs)
+
+        # Switches are only scanned once per batch
+        num_pushed_calls = switch.num_pushed_calls
+
+        appl.tick()
+
+        self.assertEqual(client.receive_calls, msgs[:3])
+        self.assertEqual(switch.num_pushed_calls, num_pushed_calls + 1)
+
+        appl.tick()
+
+        self.assertEqual(client.receive_calls, msgs)
+
+        # Empty batch
+        appl.tick()
+
+        self.assertEqual(client.receive_calls, msgs + [None])
+
+
+    def test_adaptive_drain(self):
+        self._test_adaptive_drain(False)
+        self._test_adaptive_drain(True)
+
+    def _test_adaptive_drain(self, batch):
+        source = MockMidiController()
+        switch = MockCountingSwitch()
+
+        appl = Controller(
+            led_driver = MockNeoPixelDriver(),
+            midi = MidiController(
+                routings = [
+                    MidiRouting(
+                        source = source,
+                        target = MidiRouting.APPLICATION
+                    )
+                ]
+            ) if batch else source,
+            config = {
+                "maxConsecutiveMidiMessages": 2,
+                "adaptiveMidiDrain": True,
+                "adaptiveMidiDrainMaxPassMillis": 10,
+                "adaptiveMidiDrainMax": 8
+            },
+            inputs = [
+                {
+                    "assignment": {
+                        "model":  switch
+                    }
+                }
+            ]
+        )
+
+        appl.init()
+
+        client = MockReceivingClient()
+        appl.client = client
+
+        msgs = [
+            SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02, 0x03, i]
+            )
+            for i in range(20)
+        ]
+        source.next_receive_messages = list(msgs)
+
+        # The amount of messages per pass grows while the burst lasts: 3, 5, 9, 9 (limit plus one)
+        with patch.object(misc_module, "get_current_millis", return_value = 0):
+            appl.tick()
+            self.assertEqual(client.receive_calls, msgs[:3])
+
+            appl.tick()
+            self.assertEqual(client.receive_calls, msgs[:8])
+
+            appl.tick()
+            self.assertEqual(client.receive_calls, msgs[:17])
+
+        # Time spent between the passes (updates, display) does not decrease the limit
+        source.next_receive_messages = list(msgs)
+        client.receive_calls = []
+
+        with patch.object(misc_module, "get_current_millis", return_value = 20):
+            appl.tick()
+            self.assertEqual(client.receive_calls, msgs[:9])
+
+        # Receive pass too slow: Decreased
+        now = [100]
+        client = MockSlowClient(now, 5)
+        appl.client = client
+
+        with patch.object(misc_module, "get_current_millis", side_effect = lambda: now[0]):
+            appl.tick()
+            self.assertEqual(client.receive_calls, msgs[9:18])
+
+            client.receive_calls = []
+            source.next_receive_messages = list(msgs)
+
+            appl.tick()
+            self.assertEqual(client.receive_calls, msgs[:5])
+
+    def test_adaptive_drain_batch_size(self):
+        source = MockMidiController()
+
+        appl = Controller(
+            led_driver = MockNeoPixelDriver(),
+            midi = MidiController(
+                routings = [
+                    MidiRouting(
+                        source = source,
+                        target = MidiRouting.APPLICATION
+                    )
+                ],
+                buffer_size = 6
+            ),
+            config = {
+                "maxConsecutiveMidiMessages": 2,
+                "adaptiveMidiDrain": True,
+                "adaptiveMidiDrainMax": 100
+            },
+            inputs = []
+        )
+
+        appl.init()
+
+        client = MockReceivingClient()
+        appl.client = client
+
+        msgs = [
+            SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02, 0x03, i]
+            )
+            for i in range(20)
+        ]
+        source.next_receive_messages = list(msgs)
+
+        # The limit is clamped to the buffer size (minus one, as one more message is requested): 3, 5, 6, 6
+        with patch.object(misc_module, "get_current_millis", return_value = 0):
+            for expected in [3, 8, 14, 20]:
+                appl.tick()
+                self.assertEqual(client.receive_calls, msgs[:expected])
+
+        # The reported limit is the one actually used
+        self.assertEqual(appl._Controller__drain_limit.limit, 5)
+        self.assertEqual(appl._Controller__drain_limit.max_used, 5)
+
+    def test_input_filter(self):
+        self._test_input_filter(False)
+        self._test_input_filter(True)
+
+    def _test_input_filter(self, enabled):
+        midi = MockFilteredMidiController()
+
+        ClientParameterMapping.get(
+            name = "Filter Test",
+            response = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x01, 0x02, 0x03, 0x04]
+            )
+        )
+
+        appl = Controller(
+            led_driver = MockNeoPixelDriver(),
+            midi = midi,
+            config = {
+                "midiInputFilter": enabled,
+                "midiInputAllow": [0xf8]
+            },
+            inputs = []
+        )
+
+        appl.init()
+
+        if not enabled:
+            self.assertEqual(midi.set_input_filter_calls, [])
+            return
+        
+        self.assertEqual(len(midi.set_input_filter_calls), 1)
+        self.assertIn(0xf0, midi.set_input_filter_calls[0])
+        self.assertIn(0xf8, midi.set_input_filter_calls[0])
+        self.assertNotIn(0xe0, midi.set_input_filter_calls[0])
+
+        # Mappings with known statuses do not change the filter
+        appl.client.register(
+            ClientParameterMapping.get(
+                name = "Filter Test 2",
+                response = SystemExclusive(
+                    manufacturer_id = [0x00, 0x10, 0x20],
+                    data = [0x01, 0x02, 0x03, 0x05]
+                )
+            )
+        )
+
+        self.assertEqual(len(midi.set_input_filter_calls), 1)
+
+        # Mappings created later with new statuses: The filter is updated when they are registered
+        mapping = ClientParameterMapping.get(
+            name = "Filter Test Pitch Bend",
+            response = MockPitchBend()
+        )
+
+        appl.client.register(mapping)
+
+        self.assertEqual(len(midi.set_input_filter_calls), 2)
+        self.assertIn(0xe0, midi.set_input_filter_calls[1])
+        self.assertIn(0xf0, midi.set_input_filter_calls[1])
+        self.assertIn(0xf8, midi.set_input_filter_calls[1])
+
+        # Only once per status
+        appl.client.register(
+            ClientParameterMapping.get(
+                name = "Filter Test Pitch Bend 2",
+                response = MockPitchBend()
+            )
+        )
+
+        self.assertEqual(len(midi.set_input_filter_calls), 2)
+
+
+    def test_midi_clock(self):
+        with patch.dict(sys.modules, {
+            "micropython": MockMicropython,
+            "usb_midi": MockUsbMidi(),
+            "adafruit_midi": MockAdafruitMIDI(),
+            "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+            "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+            "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+            "adafruit_midi.midi_message": MockAdafruitMIDIMessage(),
+            "gc": MockGC()
+        }):
+            midi = MockFilteredMidiController()
+
+            appl = Controller(
+                led_driver = MockNeoPixelDriver(),
+                midi = midi,
+                config = {},
+                inputs = []
+            )
+
+            self.assertEqual(appl.clock, None)
+
+            appl = Controller(
+                led_driver = MockNeoPixelDriver(),
+                midi = midi,
+                config = {
+                    "midiClock": True
+                },
+                inputs = []
+            )
+
+            self.assertEqual(appl.clock.__class__.__name__, "MidiClockTracker")
+            self.assertEqual(midi.clock, appl.clock)
+
+            # MIDI handlers without clock support
+            appl = Controller(
+                led_driver = MockNeoPixelDriver(),
+                midi = MockMidiController(),
+                config = {
+                    "midiClock": True
+                },
+                inputs = []
+            )
+
+            self.assertEqual(appl.clock, None)
+
+
+    def test_flush(self):
+        midi = MockFlushingMidiController()
+
+        appl = Controller(
+            led_driver = MockNeoPixelDriver(),
+            midi = midi,
+            config = {},
+            inputs = []
+        )
+
+        appl.init()
+        self.assertEqual(midi.num_flush_calls, 0)
+
+        appl.tick()
+        appl.tick()
+        self.assertEqual(midi.num_flush_calls, 2)
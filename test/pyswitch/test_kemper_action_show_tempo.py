@@ -26,6 +26,13 @@ with patch.dict(sys.modules, {
     from lib.pyswitch.clients.kemper.mappings.tempo_bpm import *
     
 
+class MockClockTracker:
+    def __init__(self):
+        self.active = False
+        self.beat_on = False
+        self.bpm = None
+
+
 class TestKemperActionDefinitions(unittest.TestCase):
 
     def test_led_blink(self):
@@ -262,3 +269,82 @@ class TestKemperActionDefinitions(unittest.TestCase):
             cb.update()
 
             self.assertEqual(display.text, "foo")
+
+
+    def test_midi_clock(self):
+        display = DisplayLabel(layout = {
+            "font": "foo",
+            "backColor": (0, 0, 0)
+        })
+
+        with patch.dict(sys.modules, {
+            "micropython": MockMicropython,
+            "displayio": MockDisplayIO(),
+            "adafruit_display_text": MockAdafruitDisplayText(),
+            "adafruit_midi.control_change": MockAdafruitMIDIControlChange(),
+            "adafruit_midi.system_exclusive": MockAdafruitMIDISystemExclusive(),
+            "adafruit_midi.program_change": MockAdafruitMIDIProgramChange(),
+            "adafruit_display_shapes.rect": MockDisplayShapes().rect(),
+            "gc": MockGC()
+        }):
+            action = SHOW_TEMPO(
+                display = display, 
+                color = (4, 6, 8), 
+                text = "{bpm} bpm",
+                led_brightness = 0.5,
+                use_leds = True,
+                use_midi_clock = True
+            )
+
+            mapping_tuner = KemperMappings.TUNER_MODE_STATE()
+
+            cb = action.callback
+            self.assertEqual(cb.update_interval, 20)
+            self.assertEqual(cb._KemperShowTempoCallback__tempo_mapping, None)
+            self.assertEqual(cb._KemperShowTempoCallback__bpm_mapping, None)
+
+            appl = MockController()
+            appl.clock = MockClockTracker()
+            switch = MockFootswitch(actions = [action])
+            action.init(appl, switch)
+
+            self.assertEqual(appl.client.register_calls, [{
+                "mapping": mapping_tuner,
+                "listener": cb
+            }])
+
+            mapping_tuner.value = 3 # Off
+
+            # No clock yet
+            cb.update()
+
+            self.assertEqual(switch.brightness, 0)
+            self.assertEqual(display.text, "")
+
+            appl.clock.active = True
+            appl.clock.beat_on = True
+            appl.clock.bpm = 119.7
+            cb.update()
+
+            self.assertEqual(switch.color, (4, 6, 8))
+            self.assertEqual(switch.brightness, 0.5)
+            self.assertEqual(display.text, "120 bpm")
+
+            appl.clock.beat_on = False
+            cb.update()
+
+            self.assertEqual(switch.brightness, 0)
+            self.assertEqual(display.text, "120 bpm")
+
+            appl.clock.bpm = 90.2
+            cb.update()
+
+            self.assertEqual(display.text, "90 bpm")
+
+            # Clock stopped
+            appl.clock.beat_on = True
+            appl.clock.active = False
+            cb.update()
+
+            self.assertEqual(switch.brightness, 0)
+            self.assertEqual(display.text, "90 bpm")
@@ -132,6 +132,45 @@ class TestKemperBidirectionalProtocol(unittest.TestCase):
         self.assertEqual(client.num_notify_connection_lost_calls, 1)
 
 
+    def test_receive_pipeline(self):
+        protocol = KemperBidirectionalProtocol(20)
+        protocol.init_period = MockPeriodCounter()
+
+        client = MockClient()
+        midi = MockMidiController()
+        protocol.init(midi, client)
+
+        pipeline = ClientReceivePipeline()
+        protocol.register_receive_handlers(pipeline)
+        self.assertEqual(len(pipeline), 1)
+
+        sense_msg = KemperMappings.BIDIRECTIONAL_SENSING().response
+
+        # Not initialized yet
+        self.assertEqual(pipeline.receive(sense_msg), False)
+        self.assertEqual(protocol.state, protocol._STATE_OFFLINE)
+
+        protocol.init_period.exceed_next_time = True
+        protocol.update()
+
+        # Filtered messages
+        self.assertEqual(pipeline.receive(ControlChange(control = 9, value = 0)), False)
+        self.assertEqual(pipeline.receive(SystemExclusive(
+            manufacturer_id = [0x00, 0x11],
+            data = sense_msg.data
+        )), False)
+        self.assertEqual(pipeline.receive(SystemExclusive(
+            manufacturer_id = NRPN_MANUFACTURER_ID,
+            data = [0x01, 0x02]
+        )), False)
+        self.assertEqual(pipeline.receive(KemperMappings.RIG_NAME().response), False)
+        self.assertEqual(protocol.state, protocol._STATE_OFFLINE)
+
+        # Sensing message is consumed
+        self.assertEqual(pipeline.receive(sense_msg), True)
+        self.assertEqual(protocol.state, protocol._STATE_RUNNING)
+
+
     def test_no_init(self):
         protocol = KemperBidirectionalProtocol(50)
 
@@ -216,3 +255,31 @@ class TestKemperBidirectionalProtocol(unittest.TestCase):
 
         # Not in
         self.assertEqual(protocol.feedback_value(MAPPING_CABINET_STATE()), False)
+
+
+    def test_parameter_sets(self):
+        # Additional parameters
+        protocol = KemperBidirectionalProtocol(20, additional_parameters = [MAPPING_CABINET_STATE()])
+
+        self.assertEqual(protocol.is_bidirectional(KemperMappings.RIG_NAME()), True)
+        self.assertEqual(protocol.is_bidirectional(MAPPING_CABINET_STATE()), True)
+        self.assertEqual(protocol.feedback_value(MAPPING_CABINET_STATE()), True)
+
+        # Unknown set without parameters
+        with self.assertRaises(Exception):
+            KemperBidirectionalProtocol(20, parameter_set = 0x05)
+
+        # Custom set
+        protocol = KemperBidirectionalProtocol(20, parameter_set = 0x05, parameters = [MAPPING_CABINET_STATE()])
+
+        self.assertEqual(protocol.is_bidirectional(MAPPING_CABINET_STATE()), True)
+        self.assertEqual(protocol.is_bidirectional(KemperMappings.RIG_NAME()), False)
+
+        protocol.init_period = MockPeriodCounter()
+        midi = MockMidiController()
+        protocol.init(midi, MockClient())
+
+        protocol.init_period.exceed_next_time = True
+        protocol.update()
+
+        self.assertEqual(midi.messages_sent[0].data[5], 0x05)    # Parameter set
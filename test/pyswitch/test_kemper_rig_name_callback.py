@@ -57,6 +57,9 @@ class TestKemperRigNameCallback(unittest.TestCase):
             show_rig_id = show_rig_id
         )
 
+        # The rig name rarely changes, so it is updated less often than the global interval
+        self.assertEqual(cb.update_interval, 500)
+
         if show_name:
             self.assertIn(KemperMappings.RIG_NAME(), cb._Callback__mappings)
 
@@ -17,12 +17,71 @@ with patch.dict(sys.modules, {
 }):
     from adafruit_midi.system_exclusive import SystemExclusive
     from adafruit_midi.midi_message import MIDIUnknownEvent
-    from lib.pyswitch.controller.midi import MidiController, MidiRouting
+    from lib.pyswitch.controller.midi import MidiController, MidiRouting, MidiRingBuffer, RawMidiFramer, MidiStatusFilter, MidiOutputQueue, MidiClockTracker
+    import lib.pyswitch.controller.midi as midi_module
+    from lib.pyswitch.controller.client import ClientParameterMapping
+    import lib.pyswitch.controller.midi as midi_module
 
     from.mocks_appl import *
 
 
 
+class MockRawMidiDevice(MockMidiController):
+    def __init__(self, raw_thru = True):
+        super().__init__()
+        self.raw_thru = raw_thru
+        self.raw_sent = []
+        self.next_receive_raw = []
+        self.enable_raw_thru_calls = []
+
+    def enable_raw_thru(self, parse):
+        self.enable_raw_thru_calls.append(parse)
+
+    def receive_raw(self):
+        if self.next_receive_raw:
+            return self.next_receive_raw.pop(0)
+        
+        return None
+    
+    def send_raw(self, data):
+        self.raw_sent.append(bytes(data))
+
+
+class MockOutputPort:
+    def __init__(self):
+        self.written = []
+
+    def write(self, data, length):
+        self.written.append(bytes(data[:length]))
+
+
+class MockBufferedMidiDevice(MockMidiController):
+    def __init__(self):
+        super().__init__()
+        self.num_flush_calls = 0
+        self.priorities = []
+
+    def send_prioritized(self, midi_message, priority):
+        self.messages_sent.append(midi_message)
+        self.priorities.append(priority)
+
+    def flush(self):
+        self.num_flush_calls += 1
+
+
+class MockFilteredMidiDevice(MockMidiController):
+    def __init__(self):
+        super().__init__()
+        self.filter = "not set"
+        self.clock = "not set"
+
+    def set_input_filter(self, filter):
+        self.filter = filter
+
+    def set_clock_tracker(self, tracker):
+        self.clock = tracker
+
+
 class TestMidiController(unittest.TestCase):
 
     def test_appl_routing(self):
@@ -157,9 +216,10 @@ class TestMidiController(unittest.TestCase):
             midi_message_3
         ]
         
+        # Sources are read round robin
         self.assertEqual(midi.receive(), midi_message_1)
-        self.assertEqual(midi.receive(), midi_message_2)
         self.assertEqual(midi.receive(), midi_message_3)        
+        self.assertEqual(midi.receive(), midi_message_2)
         self.assertEqual(midi.receive(), None)
 
         self.assertEqual(sub_midi_1.messages_sent, [])
@@ -293,3 +353,782 @@ class TestMidiController(unittest.TestCase):
         # Must not throw
         MidiController([])
 
+
+
+    def test_receive_batch(self):
+        sub_midi_1 = MockMidiController()
+        sub_midi_2 = MockMidiController()
+        sub_midi_3 = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = MidiRouting.APPLICATION
+                ),
+                MidiRouting(
+                    source = sub_midi_2,
+                    target = MidiRouting.APPLICATION
+                ),
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = sub_midi_3
+                )
+            ],
+            buffer_size = 4
+        )
+
+        msgs_1 = [SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x01, i]) for i in range(3)]
+        msgs_2 = [SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x02, i]) for i in range(3)]
+
+        sub_midi_1.next_receive_messages = list(msgs_1)
+        sub_midi_2.next_receive_messages = list(msgs_2)
+
+        # Messages of sub_midi_1 are forwarded to sub_midi_3 while being drained for the application
+        buffer = midi.receive_batch()
+
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(sub_midi_3.messages_sent, [msgs_1[0], msgs_1[1]])
+        self.assertEqual([buffer.pop() for _ in range(4)], [msgs_1[0], msgs_2[0], msgs_1[1], msgs_2[1]])
+        self.assertEqual(len(buffer), 0)
+
+        # Limit
+        buffer = midi.receive_batch(max_msgs = 0)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(len(sub_midi_3.messages_sent), 2)
+
+        # Messages left in the buffer are returned by receive() first
+        sub_midi_2.next_receive_messages.append(msgs_1[0])
+        buffer = midi.receive_batch()
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(sub_midi_3.messages_sent, [msgs_1[0], msgs_1[1], msgs_1[2]])
+
+        self.assertEqual(midi.receive(), msgs_1[2])
+        self.assertEqual(midi.receive(), msgs_2[2])
+        self.assertEqual(midi.receive(), msgs_1[0])
+        self.assertEqual(midi.receive(), None)
+
+    def test_receive_batch_external(self):
+        sub_midi_1 = MockMidiController()
+        sub_midi_2 = MockMidiController()
+        sub_midi_3 = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = MidiRouting.APPLICATION
+                ),
+                MidiRouting(
+                    source = sub_midi_2,
+                    target = sub_midi_3
+                )
+            ],
+            buffer_size = 4
+        )
+
+        msgs_1 = [SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x01, i]) for i in range(2)]
+        msgs_2 = [SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x02, i]) for i in range(6)]
+
+        sub_midi_1.next_receive_messages = list(msgs_1)
+        sub_midi_2.next_receive_messages = list(msgs_2) + [MIDIUnknownEvent(status = 248)]
+
+        # Sources only routed to other devices are drained up to the same limit as the application sources
+        buffer = midi.receive_batch(max_msgs = 3)
+
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(sub_midi_3.messages_sent, msgs_2[:3])
+        self.assertEqual(sub_midi_1.messages_sent, [])
+
+        buffer.pop()
+        buffer.pop()
+
+        # Unknown messages are not forwarded
+        buffer = midi.receive_batch()
+
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(sub_midi_3.messages_sent, msgs_2)
+        self.assertEqual(sub_midi_2.next_receive_messages, [])
+
+
+    def test_receive_fair(self):
+        sub_midi_1 = MockMidiController()
+        sub_midi_2 = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = sub_midi_1,
+                    target = MidiRouting.APPLICATION
+                ),
+                MidiRouting(
+                    source = sub_midi_2,
+                    target = MidiRouting.APPLICATION
+                ),
+                MidiRouting(
+                    source = sub_midi_2,
+                    target = MidiRouting.APPLICATION
+                )
+            ]
+        )
+
+        self.assertEqual([s.source for s in midi.sources], [sub_midi_1, sub_midi_2])
+
+        # Source 1 is flooding, source 2 must not be starved
+        msgs_1 = [SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x01, i]) for i in range(10)]
+        msgs_2 = [SystemExclusive(manufacturer_id = [0x00, 0x10, 0x20], data = [0x02, i]) for i in range(2)]
+
+        sub_midi_1.next_receive_messages = list(msgs_1)
+        sub_midi_2.next_receive_messages = list(msgs_2)
+
+        self.assertEqual(
+            [midi.receive() for _ in range(5)], 
+            [msgs_1[0], msgs_2[0], msgs_1[1], msgs_2[1], msgs_1[2]]
+        )
+
+        self.assertEqual(midi.sources[0].received, 3)
+        self.assertEqual(midi.sources[1].received, 2)
+
+        # Batch
+        buffer = midi.receive_batch(4)
+        self.assertEqual([buffer.pop() for _ in range(4)], msgs_1[3:7])
+
+        self.assertEqual(midi.sources[0].last_batch, 4)
+        self.assertEqual(midi.sources[0].max_batch, 4)
+        self.assertEqual(midi.sources[0].backlogged, 1)
+        self.assertEqual(midi.sources[1].last_batch, 0)
+        self.assertEqual(midi.sources[1].backlogged, 0)
+
+        sub_midi_2.next_receive_messages = list(msgs_2)
+
+        buffer = midi.receive_batch(4)
+        self.assertEqual([buffer.pop() for _ in range(4)], [msgs_2[0], msgs_1[7], msgs_2[1], msgs_1[8]])
+
+        buffer = midi.receive_batch(4)
+        self.assertEqual([buffer.pop() for _ in range(len(buffer))], [msgs_1[9]])
+
+        self.assertEqual(midi.sources[0].received, 10)
+        self.assertEqual(midi.sources[0].last_batch, 1)
+        self.assertEqual(midi.sources[0].max_batch, 4)
+        self.assertEqual(midi.sources[0].backlogged, 2)
+        self.assertEqual(midi.sources[1].received, 4)
+        self.assertEqual(midi.sources[1].backlogged, 1)
+
+
+
+    def test_ring_buffer(self):
+        buffer = MidiRingBuffer(3)
+
+        self.assertEqual(buffer.size, 3)
+        self.assertEqual(buffer.pop(), None)
+
+        self.assertEqual(buffer.push(1), True)
+        self.assertEqual(buffer.push(2), True)
+        self.assertEqual(buffer.pop(), 1)
+        self.assertEqual(buffer.push(3), True)
+        self.assertEqual(buffer.push(4), True)
+        self.assertEqual(buffer.full, True)
+        self.assertEqual(buffer.push(5), False)
+
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual([buffer.pop() for _ in range(3)], [2, 3, 4])
+        self.assertEqual(len(buffer), 0)
+
+        buffer.push(6)
+        buffer.clear()
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.pop(), None)
+
+
+    def test_raw_thru(self):
+        din = MockRawMidiDevice()
+        usb = MockRawMidiDevice()
+        parsed_target = MockMidiController()   # Does not support raw sending
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = din,
+                    target = usb
+                ),
+                MidiRouting(
+                    source = usb,
+                    target = din
+                ),
+                MidiRouting(
+                    source = usb,
+                    target = parsed_target
+                ),
+                MidiRouting(
+                    source = usb,
+                    target = MidiRouting.APPLICATION
+                )
+            ]
+        )
+
+        # Only DIN uses raw thru (one of the USB targets cannot send raw data)
+        self.assertEqual(din.enable_raw_thru_calls, [False])
+        self.assertEqual(usb.enable_raw_thru_calls, [])
+
+        din.next_receive_raw = [
+            bytes([0xb0, 0x07, 0x64, 0xf0, 0x00, 0x20]),
+            bytes([0x33, 0xf8, 0x01, 0xf7])
+        ]
+
+        midi.receive()
+        self.assertEqual(usb.raw_sent, [bytes([0xb0, 0x07, 0x64])])
+
+        midi.receive()
+        self.assertEqual(usb.raw_sent, [bytes([0xb0, 0x07, 0x64]), bytes([0xf8, 0xf0, 0x00, 0x20, 0x33, 0x01, 0xf7])])
+        self.assertEqual(usb.messages_sent, [])
+
+        midi.receive()
+        self.assertEqual(len(usb.raw_sent), 2)
+
+
+    def test_raw_thru_merge_long_sysex(self):
+        din_1 = MockRawMidiDevice()
+        din_2 = MockRawMidiDevice()
+        usb = MockRawMidiDevice()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = din_1,
+                    target = usb
+                ),
+                MidiRouting(
+                    source = din_2,
+                    target = usb
+                )
+            ]
+        )
+
+        # SysEx longer than the framer buffer (256 bytes), coming in in three reads
+        sysex = bytes([0xf0] + [i % 0x80 for i in range(400)] + [0xf7])
+        din_1.next_receive_raw = [sysex[:200], sysex[200:300], sysex[300:]]
+
+        with patch.object(midi_module, "get_current_millis", return_value = 1000):
+            # Nothing complete yet
+            midi.receive_batch()
+            self.assertEqual(usb.raw_sent, [])
+
+            # First chunk passed: The other source is held back until the end of the SysEx
+            din_2.next_receive_raw = [bytes([0xb0, 0x07, 0x64])]
+
+            midi.receive_batch()
+            self.assertEqual(len(usb.raw_sent), 1)
+            self.assertEqual(din_2.next_receive_raw, [bytes([0xb0, 0x07, 0x64])])
+
+            # End of SysEx: The other source is read again
+            midi.receive_batch()
+            self.assertEqual(len(usb.raw_sent), 3)
+            self.assertEqual(usb.raw_sent[0] + usb.raw_sent[1], sysex)
+            self.assertEqual(usb.raw_sent[2], bytes([0xb0, 0x07, 0x64]))
+
+        # A source stopping in the middle of a SysEx only holds back the others for a limited time
+        din_1.next_receive_raw = [sysex[:300]]
+        din_2.next_receive_raw = [bytes([0xb0, 0x08, 0x65])]
+        usb.raw_sent = []
+
+        with patch.object(midi_module, "get_current_millis", return_value = 2000):
+            midi.receive_batch()
+            self.assertEqual(usb.raw_sent, [sysex[:255]])
+
+        with patch.object(midi_module, "get_current_millis", return_value = 2499):
+            midi.receive_batch()
+            self.assertEqual(len(usb.raw_sent), 1)
+
+        with patch.object(midi_module, "get_current_millis", return_value = 2500):
+            midi.receive_batch()
+            self.assertEqual(usb.raw_sent, [sysex[:255], bytes([0xb0, 0x08, 0x65])])
+
+
+    def test_raw_thru_parse(self):
+        din = MockRawMidiDevice()
+        usb = MockRawMidiDevice(raw_thru = False)
+
+        MidiController(
+            routings = [
+                MidiRouting(
+                    source = din,
+                    target = usb
+                ),
+                MidiRouting(
+                    source = din,
+                    target = MidiRouting.APPLICATION
+                )
+            ]
+        )
+
+        self.assertEqual(din.enable_raw_thru_calls, [True])
+        self.assertEqual(usb.enable_raw_thru_calls, [])
+
+
+    def test_raw_framer(self):
+        framer = RawMidiFramer(max_message_length = 8)
+
+        # Complete messages
+        self.assertEqual(framer.frame(bytes([0x90, 0x40, 0x7f, 0xc0, 0x05])), bytes([0x90, 0x40, 0x7f, 0xc0, 0x05]))
+
+        # Incomplete messages are kept
+        self.assertEqual(framer.frame(bytes([0xb0, 0x07])), None)
+        self.assertEqual(framer.frame(bytes([0x64])), bytes([0xb0, 0x07, 0x64]))
+
+        # Running status is resolved
+        self.assertEqual(framer.frame(bytes([0x08, 0x10, 0x09])), bytes([0xb0, 0x08, 0x10]))
+        self.assertEqual(framer.frame(bytes([0x11])), bytes([0xb0, 0x09, 0x11]))
+
+        # Realtime messages are passed immediately
+        self.assertEqual(framer.frame(bytes([0xe0, 0x00, 0xf8, 0x40, 0xfa])), bytes([0xf8, 0xe0, 0x00, 0x40, 0xfa]))
+
+        # System common messages
+        self.assertEqual(framer.frame(bytes([0xf1, 0x10, 0xf2, 0x01, 0x02, 0xf3, 0x03, 0xf6])), bytes([0xf1, 0x10, 0xf2, 0x01, 0x02, 0xf3, 0x03, 0xf6]))
+
+        # Data without status is dropped (system common messages cancel running status)
+        self.assertEqual(framer.frame(bytes([0x10, 0x20])), None)
+
+        # Incomplete messages are dropped when a new status byte comes in
+        self.assertEqual(framer.frame(bytes([0x90, 0x40, 0xc0, 0x01])), bytes([0xc0, 0x01]))
+
+        # SysEx
+        self.assertEqual(framer.frame(bytes([0xf0, 0x00, 0x20, 0x33])), None)
+        self.assertEqual(framer.frame(bytes([0x01, 0xf7])), bytes([0xf0, 0x00, 0x20, 0x33, 0x01, 0xf7]))
+
+        self.assertEqual(framer.in_sysex, False)
+
+        # Long SysEx is passed in chunks
+        self.assertEqual(framer.frame(bytes([0xf0, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08])), bytes([0xf0, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06]))
+        self.assertEqual(framer.in_sysex, True)
+
+        self.assertEqual(framer.frame(bytes([0xf7])), bytes([0x07, 0x08, 0xf7]))
+        self.assertEqual(framer.in_sysex, False)
+
+        # A new status byte ends a partially passed SysEx
+        self.assertEqual(framer.frame(bytes([0xf0, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07])), bytes([0xf0, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06]))
+        self.assertEqual(framer.in_sysex, True)
+
+        self.assertEqual(framer.frame(bytes([0xc0, 0x01])), bytes([0xc0, 0x01]))
+        self.assertEqual(framer.in_sysex, False)
+
+        # Stray SysEx end
+        self.assertEqual(framer.frame(bytes([0xf7])), None)
+
+
+    def test_status_filter(self):
+        filter = MidiStatusFilter([0xb0, 0xf0, 0xf8])
+
+        self.assertEqual(filter.allows(0xb5), True)
+        self.assertEqual(filter.allows(0x90), False)
+        self.assertEqual(filter.allows(0xf8), True)
+        self.assertEqual(filter.allows(0xfe), False)
+
+        # Nothing to drop: Data is returned as is
+        data = bytes([0xb0, 0x07, 0x64, 0xf8])
+        self.assertIs(filter.filter(data), data)
+
+        # Running status is dropped along with its status
+        self.assertEqual(filter.filter(bytes([0x90, 0x40, 0x7f, 0x41, 0x7f, 0xb1, 0x01, 0x02])), bytes([0xb1, 0x01, 0x02]))
+
+        # Data bytes across calls
+        self.assertEqual(filter.filter(bytes([0x03, 0x04, 0x90, 0x40])), bytes([0x03, 0x04]))
+        self.assertEqual(filter.filter(bytes([0x7f, 0xb0, 0x05])), bytes([0xb0, 0x05]))
+
+        # Realtime messages do not change the state
+        self.assertEqual(filter.filter(bytes([0x90, 0xf8, 0xfe, 0x40, 0x7f])), bytes([0xf8]))
+
+        # SysEx
+        self.assertEqual(filter.filter(bytes([0xf0, 0x01, 0xfe, 0x02, 0xf7])), bytes([0xf0, 0x01, 0x02, 0xf7]))
+
+        self.assertEqual(filter.dropped, 5)
+
+        filter = MidiStatusFilter([0xb0])
+        self.assertEqual(filter.filter(bytes([0xf0, 0x01, 0x02, 0xf7, 0xb0, 0x01, 0x02])), bytes([0xb0, 0x01, 0x02]))
+
+
+    def test_set_input_filter(self):
+        usb = MockFilteredMidiDevice()
+        din = MockFilteredMidiDevice()
+        din_2 = MockFilteredMidiDevice()
+        other = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = usb,
+                    target = MidiRouting.APPLICATION
+                ),
+                MidiRouting(
+                    source = usb,
+                    target = din,
+                    allow = [0xf8]
+                ),
+                MidiRouting(
+                    source = din,
+                    target = usb
+                ),
+                MidiRouting(
+                    source = din_2,
+                    target = usb,
+                    allow = [0x90]
+                ),
+                MidiRouting(
+                    source = other,
+                    target = MidiRouting.APPLICATION
+                )
+            ]
+        )
+
+        midi.set_input_filter([0xb0, 0xf0])
+
+        self.assertEqual(usb.filter.allows(0xb0), True)
+        self.assertEqual(usb.filter.allows(0xf0), True)
+        self.assertEqual(usb.filter.allows(0xf8), True)
+        self.assertEqual(usb.filter.allows(0x90), False)
+
+        # Routing without allow list
+        self.assertEqual(din.filter, None)
+
+        # Not routed to the application
+        self.assertEqual(din_2.filter.allows(0x90), True)
+        self.assertEqual(din_2.filter.allows(0xb0), False)
+
+
+    def test_output_queue(self):
+        port = MockOutputPort()
+        queue = MidiOutputQueue(port, running_status = True)
+
+        # Running status
+        queue.add(bytes([0xb0, 0x07, 0x64]))
+        queue.add(bytes([0xb0, 0x08, 0x10]))
+        queue.add(bytes([0xf8]))
+        queue.add(bytes([0xb0, 0x09, 0x11]))
+        queue.add(bytes([0xb1, 0x09, 0x11]))
+        queue.add(bytes([0xf0, 0x01, 0xf7]))
+        queue.add(bytes([0xb1, 0x0a, 0x12]))
+
+        self.assertEqual(len(queue), 17)
+        self.assertEqual(port.written, [])
+
+        self.assertEqual(queue.flush(), 17)
+        self.assertEqual(port.written, [
+            bytes([0xb0, 0x07, 0x64, 0x08, 0x10, 0xf8, 0x09, 0x11, 0xb1, 0x09, 0x11, 0xf0, 0x01, 0xf7, 0xb1, 0x0a, 0x12])
+        ])
+        self.assertEqual(len(queue), 0)
+        self.assertEqual(queue.bytes_sent, 17)
+        self.assertEqual(queue.time_used_micros, 17 * 320)
+
+        # Running status continues over flushes, raw data resets it
+        queue.add(bytes([0xb1, 0x0b, 0x13]))
+        queue.add_raw(bytes([0x90, 0x40, 0x7f]))
+        queue.add(bytes([0xb1, 0x0c, 0x14]))
+        queue.flush()
+
+        self.assertEqual(port.written[1], bytes([0x0b, 0x13, 0x90, 0x40, 0x7f, 0xb1, 0x0c, 0x14]))
+
+        # Empty flush
+        self.assertEqual(queue.flush(), 0)
+        self.assertEqual(len(port.written), 2)
+        self.assertEqual(queue.bytes_sent, 0)
+        self.assertEqual(queue.time_used_micros, 0)
+        self.assertEqual(queue.total_bytes_sent, 25)
+
+
+    def test_output_queue_no_running_status(self):
+        port = MockOutputPort()
+        queue = MidiOutputQueue(port)
+
+        queue.add(bytes([0xb0, 0x07, 0x64]))
+        queue.add(bytes([0xb0, 0x08, 0x10]))
+        queue.add(bytes([0xb0, 0x09, 0x11]))
+
+        self.assertEqual(queue.flush(), 9)
+        self.assertEqual(port.written, [
+            bytes([0xb0, 0x07, 0x64, 0xb0, 0x08, 0x10, 0xb0, 0x09, 0x11])
+        ])
+
+
+    def test_output_queue_budget(self):
+        port = MockOutputPort()
+        queue = MidiOutputQueue(port, max_bytes_per_tick = 4)
+
+        queue.add(bytes([0xf0, 0x01, 0x02, 0x03, 0x04, 0x05, 0xf7]))
+        queue.add(bytes([0xc0, 0x01]))
+
+        self.assertEqual(queue.flush(), 4)
+        self.assertEqual(queue.flush(), 4)
+        self.assertEqual(queue.flush(), 1)
+        self.assertEqual(queue.flush(), 0)
+
+        self.assertEqual(port.written, [
+            bytes([0xf0, 0x01, 0x02, 0x03]),
+            bytes([0x04, 0x05, 0xf7, 0xc0]),
+            bytes([0x01])
+        ])
+
+
+    def test_output_queue_reused_buffer(self):
+        port = MockOutputPort()
+        queue = MidiOutputQueue(port, max_bytes_per_tick = 13)
+
+        mapping = ClientParameterMapping.get(
+            name = "Output Queue Buffer Test",
+            set = SystemExclusive(
+                manufacturer_id = [0x00, 0x10, 0x20],
+                data = [0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa]
+            )
+        )
+
+        # Two SET messages of the same mapping share their buffer: The first one must not be overwritten while waiting
+        mapping.set_value(1)
+        queue.add(mapping.set.__bytes__())
+
+        mapping.set_value(2)
+        queue.add(mapping.set.__bytes__())
+
+        self.assertEqual(queue.flush(), 13)
+        self.assertEqual(queue.flush(), 13)
+
+        self.assertEqual(port.written, [
+            bytes([0xf0, 0x00, 0x10, 0x20, 0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa, 0x00, 0x01, 0xf7]),
+            bytes([0xf0, 0x00, 0x10, 0x20, 0x00, 0x00, 0xd9, 0x01, 0x04, 0xaa, 0x00, 0x02, 0xf7])
+        ])
+
+
+    def test_output_queue_priorities(self):
+        port = MockOutputPort()
+        queue = MidiOutputQueue(port, max_bytes_per_tick = 6, running_status = True)
+
+        queue.add(bytes([0xb0, 0x01, 0x01]), MidiOutputQueue.PRIORITY_LOW)
+        queue.add(bytes([0xb0, 0x02, 0x02]), MidiOutputQueue.PRIORITY_LOW)
+        queue.add(bytes([0xc0, 0x05]))
+        queue.add_raw(bytes([0x90, 0x40, 0x7f]))
+        queue.add(bytes([0xb0, 0x03, 0x03]), MidiOutputQueue.PRIORITY_HIGH)
+
+        self.assertEqual(len(queue), 14)
+        self.assertEqual(port.written, [])
+
+        # High priority first, low priority deferred
+        self.assertEqual(queue.flush(), 6)
+        self.assertEqual(queue.deferred, 2)
+
+        self.assertEqual(port.written, [
+            bytes([0xb0, 0x03, 0x03, 0xc0, 0x05, 0x90])
+        ])
+
+        # The split message is completed first. Newly added high priority messages overtake the low priority ones.
+        queue.add(bytes([0xb0, 0x04, 0x04]), MidiOutputQueue.PRIORITY_HIGH)
+        
+        self.assertEqual(queue.flush(), 6)
+        self.assertEqual(queue.deferred, 1)
+
+        self.assertEqual(port.written[1], bytes([0x40, 0x7f, 0xb0, 0x04, 0x04, 0x01]))
+
+        self.assertEqual(queue.flush(), 3)
+        self.assertEqual(queue.deferred, 0)
+
+        # Running status
+        self.assertEqual(port.written[2], bytes([0x01, 0x02, 0x02]))
+        
+        self.assertEqual(queue.flush(), 0)
+        self.assertEqual(len(queue), 0)
+
+
+    def test_send_prioritized(self):
+        usb = MockMidiController()
+        din = MockBufferedMidiDevice()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = MidiRouting.APPLICATION,
+                    target = usb
+                ),
+                MidiRouting(
+                    source = MidiRouting.APPLICATION,
+                    target = din
+                )
+            ]
+        )
+
+        midi_message_1 = SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x00, 0x00, 0x07, 0x47]
+        )
+
+        midi_message_2 = SystemExclusive(
+            manufacturer_id = [0x00, 0x10, 0x20],
+            data = [0x00, 0x00, 0x08, 0x47]
+        )
+
+        midi.send_prioritized(midi_message_1, MidiOutputQueue.PRIORITY_HIGH)
+        midi.send(midi_message_2)
+
+        self.assertEqual(usb.messages_sent, [midi_message_1, midi_message_2])
+        self.assertEqual(din.messages_sent, [midi_message_1, midi_message_2])
+        self.assertEqual(din.priorities, [MidiOutputQueue.PRIORITY_HIGH])
+
+
+    def test_flush(self):
+        usb = MockMidiController()
+        din = MockBufferedMidiDevice()
+        din_2 = MockBufferedMidiDevice()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = MidiRouting.APPLICATION,
+                    target = din
+                ),
+                MidiRouting(
+                    source = usb,
+                    target = din
+                ),
+                MidiRouting(
+                    source = din,
+                    target = MidiRouting.APPLICATION
+                ),
+                MidiRouting(
+                    source = usb,
+                    target = din_2
+                ),
+                MidiRouting(
+                    source = din_2,
+                    target = usb
+                ),
+            ]
+        )
+
+        midi.flush()
+
+        self.assertEqual(din.num_flush_calls, 1)
+        self.assertEqual(din_2.num_flush_calls, 1)
+
+
+    def test_clock_tracker(self):
+        clock = MidiClockTracker(timeout_millis = 1000)
+
+        self.assertEqual(clock.bpm, None)
+        self.assertEqual(clock.beat_phase, 0)
+        self.assertEqual(clock.beat_on, False)
+        self.assertEqual(clock.running, False)
+
+        with patch.object(midi_module, "get_current_millis", return_value = 0):
+            self.assertEqual(clock.active, False)
+
+        clock.feed(bytearray([0xfa]), now = 0)
+        self.assertEqual(clock.running, True)
+
+        # 120 bpm: 500ms per beat (24 clocks), mixed with other data
+        now = 0
+        for i in range(24 * 3):
+            clock.feed(bytearray([0xb0, 0x07, 0xf8, 0x7f]), now = now)
+            now += 500 / 24
+
+        self.assertEqual(clock.clocks, 72)
+        self.assertEqual(clock.beats, 3)
+        self.assertAlmostEqual(clock.bpm, 120)
+
+        # Position: First clock of the next beat, then half the beat
+        clock.feed(bytearray([0xf8]), now = 1500)
+        self.assertEqual(clock.beat_phase, 0)
+        self.assertEqual(clock.beat_on, True)
+
+        clock.feed(bytearray([0xf8] * 12), now = 1750)
+        self.assertEqual(clock.beat_phase, 0.5)
+        self.assertEqual(clock.beat_on, False)
+
+        with patch.object(midi_module, "get_current_millis", return_value = 2750):
+            self.assertEqual(clock.active, True)
+
+        with patch.object(midi_module, "get_current_millis", return_value = 2751):
+            self.assertEqual(clock.active, False)
+
+        clock.feed(bytearray([0xfc]))
+        self.assertEqual(clock.running, False)
+
+        clock.feed(bytearray([0xfb]))
+        self.assertEqual(clock.running, True)
+
+
+    def test_clock_tracker_strip(self):
+        clock = MidiClockTracker()
+
+        data = bytes([0xb0, 0x07, 0x7f])
+        self.assertIs(clock.strip(data), data)
+
+        self.assertEqual(clock.strip(bytes([0xfa, 0xb0, 0x07, 0xf8, 0x7f, 0xfe, 0xfb, 0xfc, 0xf8])), bytes([0xb0, 0x07, 0x7f, 0xfe]))
+        self.assertEqual(clock.strip(bytes([0xf8] * 24)), bytes())
+
+
+    def test_clock_tracker_jitter(self):
+        clock = MidiClockTracker(smoothing = 0.5, max_deviation = 0.2)
+
+        def beat(interval):
+            for i in range(24):
+                beat.now += interval / 24
+                clock.feed(bytearray([0xf8]), now = beat.now)
+        
+        # First beat starts at zero
+        beat.now = 0
+        clock.feed(bytearray([0xf8]), now = 0)
+
+        beat(500)
+        beat(500)
+        self.assertAlmostEqual(clock.bpm, 120)
+
+        # Small jitter is averaged
+        beat(520)
+        self.assertAlmostEqual(clock.bpm, 60000 / 510)
+
+        beat(500)
+        self.assertAlmostEqual(clock.bpm, 60000 / 505)
+
+        # Single outliers are ignored
+        beat(1000)
+        self.assertAlmostEqual(clock.bpm, 60000 / 505)
+
+        beat(500)
+        self.assertAlmostEqual(clock.bpm, 60000 / 502.5)
+
+        # Tempo changes are followed after three beats
+        beat(1000)
+        beat(1000)
+        self.assertAlmostEqual(clock.bpm, 60000 / 502.5)
+
+        beat(1000)
+        self.assertAlmostEqual(clock.bpm, 60)
+
+        beat(1000)
+        self.assertAlmostEqual(clock.bpm, 60)
+
+
+    def test_set_clock_tracker(self):
+        usb = MockFilteredMidiDevice()
+        din = MockFilteredMidiDevice()
+        other = MockMidiController()
+
+        midi = MidiController(
+            routings = [
+                MidiRouting(
+                    source = usb,
+                    target = MidiRouting.APPLICATION
+                ),
+                MidiRouting(
+                    source = din,
+                    target = usb
+                ),
+                MidiRouting(
+                    source = other,
+                    target = MidiRouting.APPLICATION
+                )
+            ]
+        )
+
+        clock = MidiClockTracker()
+        midi.set_clock_tracker(clock)
+
+        self.assertEqual(usb.clock, clock)
+
+        # Not routed to the application
+        self.assertEqual(din.clock, "not set")
@@ -214,6 +214,211 @@ class TestMiscUpdater(unittest.TestCase):
 ##############################################################################
 
 
+class MockTimedUpdateable(Updateable):
+    def __init__(self, duration_millis):
+        self.duration_millis = duration_millis
+        self.num_update_calls = 0
+
+    def update(self):
+        self.num_update_calls += 1
+        MockTime.mock["monotonicReturn"] += self.duration_millis / 1000
+
+
+class TestMiscUpdateScheduler(unittest.TestCase):
+
+    def test_no_budget(self):
+        u1 = MockTimedUpdateable(20)
+        u2 = MockTimedUpdateable(20)
+
+        updateables = [u1]
+        scheduler = UpdateScheduler(updateables)
+
+        # Updateables added later are respected
+        updateables.append(u2)
+
+        self.assertEqual(scheduler.running, False)
+        self.assertEqual(scheduler.process(), False)
+        self.assertEqual(u1.num_update_calls, 0)
+
+        scheduler.start()
+        self.assertEqual(scheduler.running, True)
+
+        between_calls = []
+        self.assertEqual(scheduler.process(lambda: between_calls.append(1)), True)
+
+        self.assertEqual(scheduler.running, False)
+        self.assertEqual(u1.num_update_calls, 1)
+        self.assertEqual(u2.num_update_calls, 1)
+        self.assertEqual(len(between_calls), 2)
+
+        self.assertEqual(scheduler.rounds, 1)
+        self.assertEqual(scheduler.ticks, 1)
+        self.assertEqual(scheduler.overruns, 0)
+
+
+    def test_budget(self):
+        MockTime.mock["monotonicReturn"] = 1
+
+        u1 = MockTimedUpdateable(4)
+        u2 = MockTimedUpdateable(4)
+        u3 = MockTimedUpdateable(4)
+        u4 = MockTimedUpdateable(15)
+
+        scheduler = UpdateScheduler([u1, u2, u3, u4], budget_millis = 10)
+
+        scheduler.start()
+
+        # First tick: Budget is exceeded after the third update
+        self.assertEqual(scheduler.process(), False)
+        self.assertEqual([u.num_update_calls for u in [u1, u2, u3, u4]], [1, 1, 1, 0])
+        self.assertEqual(scheduler.overruns, 1)
+        self.assertEqual(scheduler.max_overrun_millis, 2)
+
+        # Starting again has no effect while the round is running
+        scheduler.start()
+
+        # Second tick: At least one update is done, even if it exceeds the budget
+        self.assertEqual(scheduler.process(), True)
+        self.assertEqual([u.num_update_calls for u in [u1, u2, u3, u4]], [1, 1, 1, 1])
+        self.assertEqual(scheduler.overruns, 2)
+        self.assertEqual(scheduler.max_overrun_millis, 5)
+
+        self.assertEqual(scheduler.running, False)
+        self.assertEqual(scheduler.rounds, 1)
+        self.assertEqual(scheduler.ticks, 2)
+
+        # Next round
+        u4.duration_millis = 1
+        scheduler.start()
+
+        self.assertEqual(scheduler.process(), False)
+        self.assertEqual(scheduler.process(), True)
+        self.assertEqual([u.num_update_calls for u in [u1, u2, u3, u4]], [2, 2, 2, 2])
+        self.assertEqual(scheduler.overruns, 3)
+        self.assertEqual(scheduler.rounds, 2)
+        self.assertEqual(scheduler.ticks, 2)
+
+
+    def test_timed(self):
+        u1 = MockTimedUpdateable(0)
+        u2 = MockTimedUpdateable(0)
+        u3 = MockTimedUpdateable(0)
+
+        u2.update_interval = 50
+        u3.update_interval = 200
+
+        updater = Updater()
+        updater.add_updateable(u1)
+        updater.add_updateable(u2)
+
+        self.assertEqual(updater.updateables, [u1])
+        self.assertEqual(updater.timed_updateables, [u2])
+
+        scheduler = UpdateScheduler(updater.updateables, timed_updateables = updater.timed_updateables)
+
+        # New updateables are due immediately
+        self.assertEqual(scheduler.process_due(now = 1000), 1)
+        self.assertEqual(u2.num_update_calls, 1)
+
+        updater.add_updateable(u3)
+        updater.add_updateable(u3)
+        self.assertEqual(updater.timed_updateables, [u2, u3])
+
+        self.assertEqual(scheduler.process_due(now = 1001), 1)
+        self.assertEqual(u3.num_update_calls, 1)
+
+        self.assertEqual(scheduler.process_due(now = 1050), 0)
+        self.assertEqual(scheduler.process_due(now = 1051), 1)
+        self.assertEqual(u2.num_update_calls, 2)
+
+        self.assertEqual(scheduler.process_due(now = 1202), 2)
+        self.assertEqual(u2.num_update_calls, 3)
+        self.assertEqual(u3.num_update_calls, 2)
+
+        # Not part of the rounds
+        scheduler.start()
+        scheduler.process()
+
+        self.assertEqual(u1.num_update_calls, 1)
+        self.assertEqual(u2.num_update_calls, 3)
+
+        # Updater.update() includes the timed updateables
+        updater.update()
+        self.assertEqual(u1.num_update_calls, 2)
+        self.assertEqual(u2.num_update_calls, 4)
+        self.assertEqual(u3.num_update_calls, 3)
+
+
+##############################################################################
+
+
+class TestMiscAdaptiveDrainLimit(unittest.TestCase):
+
+    def test_adapt(self):
+        MockTime.mock["monotonicReturn"] = 1
+
+        limit = AdaptiveDrainLimit(initial = 10, max_pass_millis = 100, min_limit = 2, max_limit = 32)
+        self.assertEqual(limit.limit, 10)
+
+        # Burst: Increased up to the max. limit
+        limit.start()
+        limit.received(11, True)
+        self.assertEqual(limit.limit, 20)
+
+        limit.start()
+        MockTime.mock["monotonicReturn"] = 1.0625
+        limit.received(21, True)
+        self.assertEqual(limit.limit, 32)
+
+        # Time between the passes is not relevant
+        MockTime.mock["monotonicReturn"] = 2
+        limit.start()
+        limit.received(33, True)
+        self.assertEqual(limit.limit, 32)
+
+        # Pass too slow: Decreased, even if the burst goes on
+        limit.start()
+        MockTime.mock["monotonicReturn"] = 2.125
+        limit.received(33, True)
+        self.assertEqual(limit.limit, 16)
+
+        # Queue drained: Unchanged
+        limit.start()
+        limit.received(3, False)
+        self.assertEqual(limit.limit, 16)
+
+        self.assertEqual(limit.min_used, 10)
+        self.assertEqual(limit.max_used, 32)
+        self.assertEqual(limit.max_depth, 33)
+        self.assertEqual(limit.max_pass, 125)
+        self.assertEqual(limit.backlogs, 4)
+
+        limit.reset_stats()
+
+        self.assertEqual(limit.min_used, 16)
+        self.assertEqual(limit.max_used, 16)
+        self.assertEqual(limit.max_depth, 0)
+        self.assertEqual(limit.max_pass, 0)
+        self.assertEqual(limit.backlogs, 0)
+
+        # Decreased down to the min. limit
+        for t in [2.5, 3, 3.5, 4]:
+            limit.start()
+            MockTime.mock["monotonicReturn"] = t
+            limit.received(0, False)
+
+        self.assertEqual(limit.limit, 2)
+        self.assertEqual(limit.min_used, 2)
+
+
+    def test_initial_bounds(self):
+        self.assertEqual(AdaptiveDrainLimit(initial = 100, max_pass_millis = 10, max_limit = 50).limit, 50)
+        self.assertEqual(AdaptiveDrainLimit(initial = 0, max_pass_millis = 10).limit, 1)
+
+
+##############################################################################
+
+
 class TestMiscEventEmitter(unittest.TestCase):
 
     def test_add_listener(self):
@@ -306,3 +511,99 @@ class TestMiscPeriodCounter(unittest.TestCase):
         MockTime.mock["monotonicReturn"] = 2.702
         self.assertEqual(p.exceeded, False)
         self.assertEqual(p.passed, 1)
+
+
+##############################################################################
+
+
+class TestMiscDeadlineQueue(unittest.TestCase):
+
+    def test_process(self):
+        q = DeadlineQueue()
+        expired = []
+
+        q.add("a", 100, now = 0)
+        q.add("b", 50, now = 0)
+        q.add("c", 200, now = 0)
+        q.add("d", 50, now = 0)
+
+        self.assertEqual(len(q), 4)
+        self.assertIn("a", q)
+        self.assertEqual(q.deadline("b"), 50)
+        self.assertEqual(q.deadline("x"), None)
+
+        self.assertEqual(q.process(expired.append, now = 50), 0)
+        self.assertEqual(expired, [])
+
+        # Equal deadlines expire in order of adding
+        self.assertEqual(q.process(expired.append, now = 51), 2)
+        self.assertEqual(expired, ["b", "d"])
+        self.assertEqual(len(q), 2)
+        self.assertNotIn("b", q)
+
+        self.assertEqual(q.process(expired.append, now = 1000), 2)
+        self.assertEqual(expired, ["b", "d", "a", "c"])
+        self.assertEqual(len(q), 0)
+
+        self.assertEqual(q.process(expired.append, now = 2000), 0)
+
+    def test_reschedule_and_remove(self):
+        q = DeadlineQueue()
+        expired = []
+
+        q.add("a", 100, now = 0)
+        q.add("b", 100, now = 0)
+        q.add("c", 100, now = 0)
+
+        # Reschedule
+        q.add("a", 100, now = 90)
+        self.assertEqual(q.deadline("a"), 190)
+        self.assertEqual(len(q), 3)
+
+        q.remove("b")
+        q.remove("x")
+        self.assertEqual(len(q), 2)
+
+        self.assertEqual(q.process(expired.append, now = 150), 1)
+        self.assertEqual(expired, ["c"])
+
+        self.assertEqual(q.process(expired.append, now = 191), 1)
+        self.assertEqual(expired, ["c", "a"])
+
+    def test_many(self):
+        q = DeadlineQueue()
+        expired = []
+
+        # Add in reverse order, and remove/reschedule a lot of targets to trigger compaction
+        for i in range(100):
+            q.add(i, 1000 - i, now = 0)
+
+        for i in range(0, 100, 2):
+            q.remove(i)
+
+        for i in range(1, 100, 4):
+            q.add(i, 2000, now = 0)
+
+        self.assertEqual(len(q), 50)
+
+        q.process(expired.append, now = 1001)
+        self.assertEqual(expired, [i for i in range(99, 0, -2) if (i - 1) % 4 != 0])
+
+        q.process(expired.append, now = 2001)
+        self.assertEqual(len(expired), 50)
+        self.assertEqual(expired[-25:], [i for i in range(1, 100, 4)])
+
+    def test_default_time(self):
+        q = DeadlineQueue()
+        expired = []
+
+        MockTime.mock["monotonicReturn"] = 1
+        q.add("a", 100)
+        self.assertEqual(q.deadline("a"), 1100)
+
+        MockTime.mock["monotonicReturn"] = 1.1
+        self.assertEqual(q.process(expired.append), 0)
+
+        MockTime.mock["monotonicReturn"] = 1.101
+        self.assertEqual(q.process(expired.append), 1)
+        self.assertEqual(expired, ["a"])
@@ -99,6 +99,35 @@ class MockImports:
                     return True
 
 
+    class MockAsyncController:
+        controllers = []
+
+        class AsyncController:
+            def __init__(self,
+                         led_driver, 
+                         protocol,
+                         midi,
+                         config,                         
+                         inputs,
+                         ui
+            ):
+                self.midi = midi
+                self.config = config
+                self.inputs = inputs
+                self.ui = ui
+
+                self.init_calls = 0
+                self.start_calls = 0
+
+                MockImports.MockAsyncController.controllers.append(self)
+
+            def init(self):
+                self.init_calls += 1
+
+            def start(self):
+                self.start_calls += 1
+
+
     class MockMidiController:
         class MidiController:
             def __init__(self, routings):
@@ -292,6 +321,43 @@ class TestProcessScript(unittest.TestCase):
             self.assertEqual(controller.ui.splash_callback, "SplashCallback")
 
 
+    def test_async_controller(self):
+        with patch.dict(sys.modules, {
+            "pyswitch.stats": MockImports.MockStats(),
+            "pyswitch.hardware.adafruit": MockImports.MockHardwareAdafruit(),
+            "pyswitch.misc": MockImports.MockMisc(),
+            "config": MockImports.MockConfig(),
+            "pyswitch.controller.controller": MockImports.MockController(),
+            "pyswitch.controller.async_controller": MockImports.MockAsyncController(),
+            "pyswitch.controller.midi": MockImports.MockMidiController(),
+            "pyswitch.ui.UiController": MockImports.MockUiController(),
+            "communication": MockImports.MockCommunication(),
+            "pymidibridge.MidiBridgeWrapper": MockImports.MockMidiBridgeWrapper(),
+            "display": MockImports.MockDisplay(),
+            "inputs": MockImports.MockInputs()
+        }):            
+            MockImports.MockConfig.Config = { "asyncController": True }
+            MockImports.MockController.controllers = []
+            MockImports.MockAsyncController.controllers = []
+            MockImports.MockExploreModeController.controllers = []
+            MockImports.MockController.raise_on_process = None
+
+            import lib.pyswitch.process
+
+            self.assertEqual(len(MockImports.MockController.controllers), 0)
+            self.assertEqual(len(MockImports.MockAsyncController.controllers), 1)
+
+            controller = MockImports.MockAsyncController.controllers[0]
+
+            self.assertEqual(controller.init_calls, 1)
+            self.assertEqual(controller.start_calls, 1)
+
+            self.assertIsInstance(controller.midi, MockImports.MockMidiController.MidiController)
+            self.assertEqual(controller.config, { "asyncController": True })
+            self.assertEqual(controller.inputs, ["someswitch"])
+            self.assertEqual(controller.ui.splash_callback, "SplashCallback")
+
+
     def test_error_handling(self):
         with patch.dict(sys.modules, {
             "pyswitch.stats": MockImports.MockStats(),
@@ -195,6 +195,38 @@ class TestUiController(unittest.TestCase):
         self.assertEqual(element_3.num_update_calls, 1)
 
 
+    def test_add_timed_updateables(self):
+        display_driver = MockDisplayDriver(w = 300, h = 400, init = True)
+
+        element_1 = MockUpdateableDisplayElement(id = 1)
+        element_2 = MockUpdateableDisplayElement(id = 2)
+        element_2.update_interval = 100
+
+        display = DisplayElement(
+            children = [
+                element_1,
+                element_2
+            ]
+        )
+
+        ui = UiController(display_driver, MockFontLoader(), MockSplashCallback(output = display))
+        appl = MockController()
+        appl.add_updateable(ui)
+        ui.init(appl)
+
+        ui.show()
+
+        # Elements with an individual update interval are scheduled by the application
+        self.assertEqual(ui.updateables, [element_1])
+        self.assertEqual(appl.timed_updateables, [element_2])
+
+        # Not added twice when shown again
+        ui._UiController__current_splash_element = None
+        ui.show()
+
+        self.assertEqual(appl.timed_updateables, [element_2])
+
+
     def test_error_show_before_init(self):
         display_driver = MockDisplayDriver(300, 400)
         display_driver.init()
@@ -36,6 +36,9 @@ class TestProtocolState(unittest.TestCase):
 
         self.assertEqual(display.bounds, DisplayBounds(600 - 4 - 2, 200 + 2, 4, 4))
 
+        # Updated more often than the global update interval
+        self.assertEqual(display.update_interval, 100)
+
         protocol = MockBidirectionalProtocol()        
 
         appl = MockController(
@@ -236,6 +236,7 @@ class PySwitchRunner {
 
             this.#loadModule("pyswitch/controller/__init__.py", circuitpyPath),
             this.#loadModule("pyswitch/controller/controller.py", circuitpyPath),
+            this.#loadModule("pyswitch/controller/async_controller.py", circuitpyPath),
             this.#loadModule("pyswitch/controller/client.py", circuitpyPath),
             this.#loadModule("pyswitch/controller/explore.py", circuitpyPath),
             this.#loadModule("pyswitch/controller/inputs.py", circuitpyPath),
@@ -258,6 +259,7 @@ class PySwitchRunner {
             this.#loadModule("pyswitch/hardware/adafruit/AdafruitDinMidiDevice.py", circuitpyPath),
             this.#loadModule("pyswitch/hardware/adafruit/AdafruitEncoder.py", circuitpyPath),
             this.#loadModule("pyswitch/hardware/adafruit/AdafruitPotentiometer.py", circuitpyPath),
+            this.#loadModule("pyswitch/hardware/adafruit/AdafruitRawMidiInput.py", circuitpyPath),
             this.#loadModule("pyswitch/hardware/adafruit/AdafruitSwitch.py", circuitpyPath),
             this.#loadModule("pyswitch/hardware/adafruit/AdafruitUsbMidiDevice.py", circuitpyPath),
 